@@ -0,0 +1,295 @@
+#! /usr/bin/env python
+
+"""
+Times and memory profiles each stage of
+APMSGeneNodeAttributeGenerator, CM4AIGeneNodeAttributeGenerator and
+CellmapsPPIDownloader.run() on synthetic inputs, offline, writing
+results as JSON
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import shutil
+import argparse
+import platform
+import tempfile
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import synthetic
+
+BENCHMARKS = ['apms', 'cm4ai', 'runner']
+
+SIZE_SUFFIXES = {'k': 1000, 'm': 1000000}
+
+
+def _parse_arguments(desc, args):
+    """
+    Parses command line arguments
+
+    :param desc: description to display on command line
+    :type desc: str
+    :param args: command line arguments usually :py:func:`sys.argv[1:]`
+    :type args: list
+    :return: arguments parsed by :py:mod:`argparse`
+    :rtype: :py:class:`argparse.Namespace`
+    """
+    parser = argparse.ArgumentParser(
+        description=desc,
+        formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default='10k,1m,10m',
+                        help='Comma delimited number of edges to '
+                             'benchmark. k and m suffixes are allowed')
+    parser.add_argument('--benchmarks', default=','.join(BENCHMARKS),
+                        help='Comma delimited benchmarks to run. '
+                             'Choices: ' + ', '.join(BENCHMARKS))
+    parser.add_argument('--outfile', default='benchmark_results.json',
+                        help='Path to write JSON results to')
+    parser.add_argument('--workdir',
+                        help='Directory for synthetic inputs and outputs. '
+                             'If unset a temporary directory is used '
+                             'and removed when done')
+    parser.add_argument('--seed', type=int, default=1,
+                        help='Random seed for synthetic inputs')
+    parser.add_argument('--baseline',
+                        help='Path to results from an earlier run. Stages '
+                             'slower than --threshold times the baseline '
+                             'are reported and exit code is 1')
+    parser.add_argument('--threshold', type=float, default=1.25,
+                        help='Ratio of elapsed time to baseline above which '
+                             'a stage is reported as a regression')
+    return parser.parse_args(args)
+
+
+def parse_size(size):
+    """
+    Converts **size** such as ``10k`` or ``1m`` to a number
+
+    :rtype: int
+    """
+    size = size.strip().lower()
+    if size[-1:] in SIZE_SUFFIXES:
+        return int(float(size[:-1]) * SIZE_SUFFIXES[size[-1]])
+    return int(size)
+
+
+def _get_inputs(workdir, num_edges, seed):
+    """
+    Writes synthetic inputs for **num_edges** into **workdir**
+    unless they already exist
+
+    :return: (edgelist, baitlist, cm4ai table) file paths
+    :rtype: tuple
+    """
+    prefix = os.path.join(workdir, str(num_edges) + '_')
+    edgelist = prefix + 'edgelist.tsv'
+    baitlist = prefix + 'baitlist.tsv'
+    cm4ai_table = prefix + 'apms.tsv'
+    if not os.path.isfile(edgelist):
+        synthetic.write_edgelist(edgelist, num_edges, seed=seed)
+        synthetic.write_baitlist(baitlist, num_edges)
+    if not os.path.isfile(cm4ai_table):
+        synthetic.write_cm4ai_table(cm4ai_table, num_edges, seed=seed)
+    return edgelist, baitlist, cm4ai_table
+
+
+def _run_apms(timer, edgelist, baitlist, cm4ai_table, outdir):
+    from cellmaps_ppidownloader.gene import APMSGeneNodeAttributeGenerator
+    genclass = APMSGeneNodeAttributeGenerator
+    with timer.stage('load_edgelist'):
+        apms_edgelist = genclass.get_apms_edgelist_from_tsvfile(edgelist)
+    with timer.stage('load_baitlist'):
+        apms_baitlist = genclass.get_apms_baitlist_from_tsvfile(baitlist)
+    gen = APMSGeneNodeAttributeGenerator(apms_edgelist=apms_edgelist,
+                                         apms_baitlist=apms_baitlist,
+                                         genequery=synthetic.StubGeneQuery())
+    with timer.stage('gene_node_attributes'):
+        gen.get_gene_node_attributes()
+
+
+def _run_cm4ai(timer, edgelist, baitlist, cm4ai_table, outdir):
+    from cellmaps_ppidownloader.gene import CM4AIGeneNodeAttributeGenerator
+    genclass = CM4AIGeneNodeAttributeGenerator
+    with timer.stage('load_table'):
+        raw_edgelist = genclass.get_apms_edgelist_from_tsvfile(
+            cm4ai_table, bfdr_col='BFDR.x', foldchange_col='FoldChange.x')
+    gen = CM4AIGeneNodeAttributeGenerator(apms_edgelist=raw_edgelist,
+                                          genequery=synthetic.StubGeneQuery())
+    with timer.stage('apms_edgelist'):
+        gen.get_apms_edgelist()
+    with timer.stage('gene_node_attributes'):
+        gen.get_gene_node_attributes()
+
+
+def _run_runner(timer, edgelist, baitlist, cm4ai_table, outdir):
+    from cellmaps_ppidownloader.gene import APMSGeneNodeAttributeGenerator
+    from cellmaps_ppidownloader.runner import CellmapsPPIDownloader
+    with timer.stage('load_inputs'):
+        genclass = APMSGeneNodeAttributeGenerator
+        gen = genclass(
+            apms_edgelist=genclass.get_apms_edgelist_from_tsvfile(edgelist),
+            apms_baitlist=genclass.get_apms_baitlist_from_tsvfile(baitlist),
+            genequery=synthetic.StubGeneQuery())
+    provenance = CellmapsPPIDownloader.get_example_provenance()
+    runner = CellmapsPPIDownloader(outdir=outdir, apmsgen=gen,
+                                   provenance=provenance,
+                                   input_data_dict={'outdir': outdir,
+                                                    'edgelist': edgelist,
+                                                    'baitlist': baitlist})
+    with timer.stage('run'):
+        runner.run()
+    return [dict(stage, name='run.' + stage['name'])
+            for stage in runner.get_stage_timings()]
+
+
+BENCHMARK_FUNCS = {'apms': _run_apms,
+                   'cm4ai': _run_cm4ai,
+                   'runner': _run_runner}
+
+
+def run_benchmark(benchmark, num_edges, workdir, seed):
+    """
+    Runs **benchmark** on synthetic inputs with **num_edges** edges.
+    Meant to be run in a fresh process so peak memory reflects only
+    this benchmark
+
+    :return: result of format:
+
+             .. code-block::
+
+                {'benchmark': NAME,
+                 'edges': NUM EDGES,
+                 'elapsed_time': SECONDS,
+                 'max_rss_kb': PEAK MEMORY IN KB,
+                 'stages': [{'name': STAGE, 'elapsed_time': SECONDS,
+                             'overlapped': RAN WITH ANOTHER STAGE,
+                             'rss_delta_kb': CHANGE IN MEMORY IN KB,
+                             'peak_rss_increase_kb': INCREASE OF PEAK IN KB,
+                             'process_max_rss_kb': PEAK SO FAR IN KB}]}
+
+    :rtype: dict
+    """
+    from cellmaps_ppidownloader.profiling import StageTimer, get_max_rss_kb
+    # edges with ambiguous gene ids are skipped with an error
+    # logged for each, keep those messages out of the output
+    logging.disable(logging.CRITICAL)
+    edgelist, baitlist, cm4ai_table = _get_inputs(workdir, num_edges, seed)
+    outdir = os.path.join(workdir, benchmark + '_' + str(num_edges) + '_out')
+    if os.path.isdir(outdir):
+        shutil.rmtree(outdir)
+    timer = StageTimer()
+    start = time.perf_counter()
+    run_stages = BENCHMARK_FUNCS[benchmark](timer, edgelist, baitlist,
+                                            cm4ai_table, outdir)
+    elapsed = time.perf_counter() - start
+    if os.path.isdir(outdir):
+        shutil.rmtree(outdir)
+    return {'benchmark': benchmark,
+            'edges': num_edges,
+            'elapsed_time': round(elapsed, 6),
+            'max_rss_kb': get_max_rss_kb(),
+            'stages': timer.get_stage_timings() + (run_stages or [])}
+
+
+def find_regressions(results, baseline, threshold):
+    """
+    Compares elapsed time of each benchmark and stage in
+    **results** to **baseline**
+
+    :return: descriptions of stages slower than **threshold**
+             times the baseline
+    :rtype: list
+    """
+    def _times(res):
+        times = {}
+        for entry in res['results']:
+            key = (entry['benchmark'], entry['edges'])
+            times[key + ('total',)] = entry['elapsed_time']
+            for stage in entry['stages']:
+                times[key + (stage['name'],)] = stage['elapsed_time']
+        return times
+
+    base_times = _times(baseline)
+    regressions = []
+    for key, elapsed in sorted(_times(results).items()):
+        base = base_times.get(key)
+        # ignore stages too short to time reliably
+        if base is None or base < 0.01:
+            continue
+        if elapsed > base * threshold:
+            regressions.append('/'.join(str(k) for k in key) + ' took ' +
+                               str(round(elapsed, 3)) + 's vs ' +
+                               str(round(base, 3)) + 's baseline')
+    return regressions
+
+
+def main(args):
+    """
+    Main entry point for program
+
+    :param args: arguments passed to command line usually
+                 :py:func:`sys.argv[1:]`
+    :type args: list
+
+    :return: ``0`` upon success, ``1`` if regressions were found
+             compared to **--baseline** or ``2`` for invalid arguments
+    :rtype: int
+    """
+    theargs = _parse_arguments(__doc__, args[1:])
+    import cellmaps_ppidownloader
+
+    benchmarks = [b.strip() for b in theargs.benchmarks.split(',')]
+    for benchmark in benchmarks:
+        if benchmark not in BENCHMARK_FUNCS:
+            sys.stderr.write('Unknown benchmark: ' + benchmark + '\n')
+            return 2
+    sizes = [parse_size(s) for s in theargs.sizes.split(',')]
+
+    workdir = theargs.workdir
+    if workdir is None:
+        workdir = tempfile.mkdtemp()
+    else:
+        os.makedirs(workdir, exist_ok=True)
+    results = {'version': cellmaps_ppidownloader.__version__,
+               'python': platform.python_version(),
+               'platform': platform.platform(),
+               'start_time': int(time.time()),
+               'results': []}
+    try:
+        ctx = multiprocessing.get_context('spawn')
+        for num_edges in sizes:
+            for benchmark in benchmarks:
+                with ProcessPoolExecutor(max_workers=1,
+                                         mp_context=ctx) as executor:
+                    res = executor.submit(run_benchmark, benchmark,
+                                          num_edges, workdir,
+                                          theargs.seed).result()
+                results['results'].append(res)
+                sys.stdout.write(benchmark + ' ' + str(num_edges) +
+                                 ' edges: ' +
+                                 str(round(res['elapsed_time'], 3)) +
+                                 's, ' + str(res['max_rss_kb']) +
+                                 ' KB peak\n')
+    finally:
+        if theargs.workdir is None:
+            shutil.rmtree(workdir)
+
+    with open(theargs.outfile, 'w') as f:
+        json.dump(results, f, indent=2)
+
+    if theargs.baseline is not None:
+        with open(theargs.baseline, 'r') as f:
+            baseline = json.load(f)
+        regressions = find_regressions(results, baseline, theargs.threshold)
+        for regression in regressions:
+            sys.stdout.write('Regression: ' + regression + '\n')
+        if len(regressions) > 0:
+            return 1
+    return 0
+
+
+if __name__ == '__main__':  # pragma: no cover
+    sys.exit(main(sys.argv))
@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+
+"""
+Generates synthetic AP-MS inputs for benchmarks and a
+:py:class:`~cellmaps_ppidownloader.gene.GeneQuery` stand in
+that answers queries offline
+"""
+
+import re
+import csv
+import random
+
+FIRST_GENE_ID = 1000
+"""
+Gene id of first synthetic gene
+"""
+
+AMBIGUOUS_FRACTION = 0.01
+"""
+Fraction of edgelist prey cells listing two comma separated gene ids
+"""
+
+
+def get_num_genes(num_edges):
+    """
+    Gets number of genes for an interactome with **num_edges**
+    edges. Grows with edges up to about the size of the
+    human proteome, as seen in BioPlex
+
+    :rtype: int
+    """
+    return min(20000, max(100, num_edges // 5))
+
+
+def get_num_baits(num_genes):
+    """
+    Gets number of baits for **num_genes** genes
+
+    :rtype: int
+    """
+    return max(10, num_genes // 10)
+
+
+def _get_edge_geneids(num_edges, seed):
+    """
+    Generator of ``(bait index, prey index)`` tuples
+
+    :rtype: tuple
+    """
+    rand = random.Random(seed)
+    num_genes = get_num_genes(num_edges)
+    num_baits = get_num_baits(num_genes)
+    for _ in range(num_edges):
+        yield rand.randrange(num_baits), rand.randrange(num_genes), rand
+
+
+def write_edgelist(tsvfile, num_edges, seed=1):
+    """
+    Writes BioPlex style edgelist with header
+    ``GeneID1 Symbol1 GeneID2 Symbol2`` where baits are the
+    first genes. About :py:const:`AMBIGUOUS_FRACTION` of prey
+    gene ids list two ambiguous genes
+
+    :param tsvfile: path to write to
+    :type tsvfile: str
+    :param num_edges: number of edges
+    :type num_edges: int
+    :param seed: random seed
+    :type seed: int
+    """
+    with open(tsvfile, 'w', newline='', buffering=1024 * 1024) as f:
+        writer = csv.writer(f, delimiter='\t', lineterminator='\n')
+        writer.writerow(['GeneID1', 'Symbol1', 'GeneID2', 'Symbol2'])
+        for bait, prey, rand in _get_edge_geneids(num_edges, seed):
+            bait_id = str(FIRST_GENE_ID + bait)
+            prey_id = str(FIRST_GENE_ID + prey)
+            prey_symbol = 'GENE' + prey_id
+            if rand.random() < AMBIGUOUS_FRACTION:
+                prey_id += ',' + str(FIRST_GENE_ID + prey + 1)
+            writer.writerow([bait_id, 'GENE' + bait_id, prey_id, prey_symbol])
+
+
+def write_baitlist(tsvfile, num_edges):
+    """
+    Writes baitlist matching :py:func:`write_edgelist` with header
+    ``GeneSymbol GeneID # Interactors``. Interactor counts are
+    the expected number of edges per bait
+
+    :param tsvfile: path to write to
+    :type tsvfile: str
+    :param num_edges: number of edges passed to :py:func:`write_edgelist`
+    :type num_edges: int
+    """
+    num_baits = get_num_baits(get_num_genes(num_edges))
+    with open(tsvfile, 'w', newline='') as f:
+        writer = csv.writer(f, delimiter='\t', lineterminator='\n')
+        writer.writerow(['GeneSymbol', 'GeneID', '# Interactors'])
+        for bait in range(num_baits):
+            bait_id = str(FIRST_GENE_ID + bait)
+            writer.writerow(['GENE' + bait_id, bait_id,
+                             num_edges // num_baits])
+
+
+def write_cm4ai_table(tsvfile, num_edges, seed=1):
+    """
+    Writes CM4AI style apms.tsv table with header
+    ``Bait Prey BFDR.x FoldChange.x`` where baits are gene
+    symbols and preys are UniProt style accessions
+
+    :param tsvfile: path to write to
+    :type tsvfile: str
+    :param num_edges: number of edges
+    :type num_edges: int
+    :param seed: random seed
+    :type seed: int
+    """
+    with open(tsvfile, 'w', newline='', buffering=1024 * 1024) as f:
+        writer = csv.writer(f, delimiter='\t', lineterminator='\n')
+        writer.writerow(['Bait', 'Prey', 'BFDR.x', 'FoldChange.x'])
+        for bait, prey, rand in _get_edge_geneids(num_edges, seed):
+            writer.writerow(['GENE' + str(FIRST_GENE_ID + bait),
+                             'P' + str(FIRST_GENE_ID + prey).zfill(5),
+                             round(rand.random() / 10.0, 4),
+                             round(rand.uniform(-1.0, 50.0), 2)])
+
+
+class StubGeneQuery(object):
+    """
+    Answers
+    :py:meth:`~cellmaps_ppidownloader.gene.GeneQuery.get_symbols_for_genes`
+    without network access. The gene id of each query is the number
+    it contains, so gene ids, ``GENE#`` symbols and ``P#`` accessions
+    written by this module all resolve to the same gene
+    """
+
+    NUMBER_RE = re.compile(r'\d+')
+
+    def get_symbols_for_genes(self, genelist=None,
+                              scopes='_id'):
+        """
+        Gets fake MyGene results for **genelist**
+
+        :rtype: list
+        """
+        res = []
+        for query in genelist:
+            match = StubGeneQuery.NUMBER_RE.search(query)
+            if match is None:
+                res.append({'query': query, 'notfound': True})
+                continue
+            geneid = str(int(match.group(0)))
+            res.append({'query': query, '_id': geneid,
+                        'symbol': 'GENE' + geneid,
+                        'ensembl': {'gene': 'ENSG' + geneid.zfill(11)}})
+        return res
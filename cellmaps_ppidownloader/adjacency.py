@@ -0,0 +1,385 @@
+import logging
+from array import array
+
+from cellmaps_ppidownloader.edgetable import EdgeTable, Vocabulary
+
+logger = logging.getLogger(__name__)
+
+
+def count_edge_rows(edgelist, nodes, source_col='GeneID1',
+                    target_col='GeneID2'):
+    """
+    Counts rows of **edgelist** each node in **nodes** is on, which is
+    how the BioPlex baitlist ``# Interactors`` column is defined. Unlike
+    :py:meth:`AdjacencyIndex.get_degree` an edge listed more than once
+    counts each time. A row whose source and target are the same node
+    counts once.
+
+    Codes of an :py:class:`~cellmaps_ppidownloader.edgetable.EdgeTable`
+    are counted in place. Any other iterable of dicts, such as a
+    streaming :py:class:`~cellmaps_ppidownloader.edgetable.TSVEdgeReader`,
+    is read once keeping only the counts
+
+    :param edgelist: edgelist such as
+                     :py:class:`~cellmaps_ppidownloader.edgetable.EdgeTable`
+                     or list of dicts
+    :param nodes: node ids to count rows of
+    :type nodes: list
+    :param source_col: column with source node id
+    :type source_col: str
+    :param target_col: column with target node id
+    :type target_col: str
+    :return: node id => number of rows, ``0`` for nodes on no row
+    :rtype: dict
+    """
+    counts = {node: 0 for node in nodes}
+    if isinstance(edgelist, EdgeTable):
+        columns = edgelist.get_columns()
+        if source_col not in columns or target_col not in columns:
+            return counts
+        import numpy as np
+        vocabulary = edgelist.get_vocabulary()
+        sources = np.frombuffer(edgelist.get_codes(source_col),
+                                dtype=np.intc)
+        targets = np.frombuffer(edgelist.get_codes(target_col),
+                                dtype=np.intc)
+        # a self loop row counts once
+        codes = np.concatenate((sources, targets[targets != sources]))
+        row_counts = np.bincount(codes[codes >= 0],
+                                 minlength=len(vocabulary))
+        for node in counts:
+            code = vocabulary.get_code(node)
+            if code is not None:
+                counts[node] = int(row_counts[code])
+        return counts
+
+    for edge in edgelist:
+        source = edge.get(source_col)
+        target = edge.get(target_col)
+        if source in counts:
+            counts[source] += 1
+        if target != source and target in counts:
+            counts[target] += 1
+    return counts
+
+
+def check_interactor_counts(baitlist, counts, geneid_key='GeneID',
+                            num_key='NumInteractors'):
+    """
+    Compares the number of interactors of each bait in **baitlist**
+    with **counts**
+
+    :param baitlist: baits as dicts
+    :type baitlist: list
+    :param counts: bait id => number of interactors in edgelist, from
+                   :py:func:`count_edge_rows` or
+                   :py:meth:`AdjacencyIndex.get_interactor_counts`
+    :type counts: dict
+    :param geneid_key: key of bait id in each dict
+    :type geneid_key: str
+    :param num_key: key of number of interactors in each dict
+    :type num_key: str
+    :return: description of each bait whose count differs, or
+             is not a number
+    :rtype: list
+    """
+    mismatches = []
+    for bait in baitlist:
+        geneid = bait[geneid_key]
+        try:
+            expected = int(float(bait.get(num_key)))
+        except (TypeError, ValueError):
+            mismatches.append('Bait ' + str(geneid) + ' has non numeric ' +
+                              num_key + ': ' + str(bait.get(num_key)))
+            continue
+        actual = counts.get(geneid, 0)
+        if expected != actual:
+            mismatches.append('Bait ' + str(geneid) + ' has ' +
+                              str(expected) +
+                              ' interactors in baitlist, but ' +
+                              str(actual) + ' in edgelist')
+    return mismatches
+
+
+class AdjacencyIndex(object):
+    """
+    Undirected adjacency of an edgelist in compressed sparse row (CSR)
+    form, backed by two :py:mod:`numpy` arrays. Neighbors of the node
+    at row ``i`` are ``indices[indptr[i]:indptr[i + 1]]``, sorted and
+    without duplicates, so degree is ``indptr[i + 1] - indptr[i]``.
+
+    An edge listed more than once, in either direction, counts once and
+    a self loop counts as one neighbor, matching a ``set`` of neighbors
+    per node. Node ids are kept in a single list instead of one set of
+    Python objects per node.
+
+    Build via :py:meth:`from_edgelist` or :py:meth:`from_arrays`
+    """
+
+    def __init__(self, nodes=None, indptr=None, indices=None):
+        """
+        Constructor
+
+        :param nodes: node id of each row
+        :type nodes: list
+        :param indptr: offsets into **indices** of each row, one
+                       longer than **nodes**
+        :type indptr: :py:class:`numpy.ndarray`
+        :param indices: rows of neighbors of each node
+        :type indices: :py:class:`numpy.ndarray`
+        """
+        self._nodes = nodes
+        self._indptr = indptr
+        self._indices = indices
+        self._node_rows = {node: row for row, node in enumerate(nodes)}
+
+    @staticmethod
+    def from_arrays(sources, targets, nodes=None):
+        """
+        Creates index from parallel arrays of integer codes of source
+        and target of each edge. Negative codes, such as
+        :py:const:`~cellmaps_ppidownloader.edgetable.EdgeTable.MISSING`,
+        mark edges that are skipped
+
+        :param sources: code of source node of each edge
+        :type sources: :py:class:`numpy.ndarray` or sequence
+        :param targets: code of target node of each edge
+        :type targets: :py:class:`numpy.ndarray` or sequence
+        :param nodes: node id for each code, if ``None`` codes are
+                      used as node ids
+        :type nodes: list
+        :rtype: :py:class:`AdjacencyIndex`
+        """
+        import numpy as np
+        sources = np.asarray(sources, dtype=np.int64)
+        targets = np.asarray(targets, dtype=np.int64)
+        valid = (sources >= 0) & (targets >= 0)
+        if not valid.all():
+            logger.debug('Skipping ' + str(int((~valid).sum())) +
+                         ' edges missing a source or target')
+            sources = sources[valid]
+            targets = targets[valid]
+
+        # renumber codes as rows 0..N-1 of nodes that are on an edge
+        codes, rows = np.unique(np.concatenate((sources, targets)),
+                                return_inverse=True)
+        num_nodes = len(codes)
+        num_edges = len(sources)
+        src_rows = rows[:num_edges]
+        tgt_rows = rows[num_edges:]
+
+        # add both directions, then sort and drop duplicates in one
+        # pass by encoding each (row, neighbor) pair as a single integer
+        pairs = np.unique(np.concatenate((src_rows * num_nodes + tgt_rows,
+                                          tgt_rows * num_nodes + src_rows)))
+        pair_rows = pairs // max(num_nodes, 1)
+        indices = (pairs - pair_rows * num_nodes).astype(np.int32)
+        indptr = np.zeros(num_nodes + 1, dtype=np.int64)
+        np.cumsum(np.bincount(pair_rows, minlength=num_nodes), out=indptr[1:])
+
+        if nodes is None:
+            node_ids = codes.tolist()
+        else:
+            node_ids = [nodes[c] for c in codes.tolist()]
+        return AdjacencyIndex(nodes=node_ids, indptr=indptr, indices=indices)
+
+    @staticmethod
+    def from_edgelist(edgelist, source_col='GeneID1', target_col='GeneID2'):
+        """
+        Creates index from **edgelist**. The integer codes of an
+        :py:class:`~cellmaps_ppidownloader.edgetable.EdgeTable` are used
+        as is, without building a dict per edge. Any other iterable of
+        dicts is read once
+
+        :param edgelist: edgelist such as
+            :py:class:`~cellmaps_ppidownloader.edgetable.EdgeTable`,
+            :py:class:`~cellmaps_ppidownloader.edgetable.TSVEdgeReader`
+            or list of dicts
+        :param source_col: column with source node id
+        :type source_col: str
+        :param target_col: column with target node id
+        :type target_col: str
+        :rtype: :py:class:`AdjacencyIndex`
+        """
+        import numpy as np
+        if isinstance(edgelist, EdgeTable):
+            sources = np.frombuffer(edgelist.get_codes(source_col),
+                                    dtype=np.intc)
+            targets = np.frombuffer(edgelist.get_codes(target_col),
+                                    dtype=np.intc)
+            nodes = edgelist.get_vocabulary().get_values()
+            return AdjacencyIndex.from_arrays(sources, targets, nodes=nodes)
+        vocabulary = Vocabulary()
+        sources = array('i')
+        targets = array('i')
+        for edge in edgelist:
+            sources.append(vocabulary.intern(edge.get(source_col)))
+            targets.append(vocabulary.intern(edge.get(target_col)))
+        return AdjacencyIndex.from_arrays(
+            np.frombuffer(sources, dtype=np.intc),
+            np.frombuffer(targets, dtype=np.intc),
+            nodes=vocabulary.get_values())
+
+    def get_nodes(self):
+        """
+        Gets ids of nodes on at least one edge, in row order
+
+        :rtype: list
+        """
+        return list(self._nodes)
+
+    def get_num_nodes(self):
+        """
+        Gets number of nodes on at least one edge
+
+        :rtype: int
+        """
+        return len(self._nodes)
+
+    def get_num_edges(self):
+        """
+        Gets number of unique undirected edges
+
+        :rtype: int
+        """
+        import numpy as np
+        rows = np.repeat(np.arange(len(self._nodes)),
+                         np.diff(self._indptr))
+        num_self_loops = int(np.count_nonzero(self._indices == rows))
+        return (len(self._indices) + num_self_loops) // 2
+
+    def __contains__(self, node):
+        return node in self._node_rows
+
+    def _get_rows(self, nodes):
+        """
+        Gets row of each node in **nodes**, ``-1`` for
+        nodes not in index
+
+        :rtype: :py:class:`numpy.ndarray`
+        """
+        import numpy as np
+        return np.fromiter((self._node_rows.get(n, -1) for n in nodes),
+                           dtype=np.int64, count=len(nodes))
+
+    def _get_values_for_nodes(self, values, nodes):
+        """
+        Gets entry of per row **values** for each node in **nodes**
+
+        :return: values with ``0`` for nodes not in index
+        :rtype: :py:class:`numpy.ndarray`
+        """
+        import numpy as np
+        rows = self._get_rows(nodes)
+        found = rows >= 0
+        res = np.zeros(len(rows), dtype=values.dtype)
+        res[found] = values[rows[found]]
+        return res
+
+    def get_degrees(self, nodes=None):
+        """
+        Gets number of unique neighbors of each node in **nodes**
+
+        :param nodes: node ids, if ``None`` all nodes in row order
+        :type nodes: list
+        :return: degree of each node, ``0`` for nodes not in index
+        :rtype: :py:class:`numpy.ndarray`
+        """
+        degrees = self._indptr[1:] - self._indptr[:-1]
+        if nodes is None:
+            return degrees
+        return self._get_values_for_nodes(degrees, nodes)
+
+    def get_degree(self, node):
+        """
+        Gets number of unique neighbors of **node**
+
+        :return: degree or ``0`` if **node** is not in index
+        :rtype: int
+        """
+        row = self._node_rows.get(node)
+        if row is None:
+            return 0
+        return int(self._indptr[row + 1] - self._indptr[row])
+
+    def get_neighbors(self, node):
+        """
+        Gets ids of unique neighbors of **node**
+
+        :return: neighbors in row order, empty if **node** is
+                 not in index
+        :rtype: list
+        """
+        row = self._node_rows.get(node)
+        if row is None:
+            return []
+        start = self._indptr[row]
+        end = self._indptr[row + 1]
+        return [self._nodes[i] for i in self._indices[start:end].tolist()]
+
+    def get_interactor_counts(self, baits):
+        """
+        Gets number of unique interactors of each bait
+
+        :param baits: bait node ids
+        :type baits: list
+        :return: bait => number of interactors, ``0`` for baits
+                 not on any edge
+        :rtype: dict
+        """
+        baits = list(baits)
+        return dict(zip(baits, self.get_degrees(baits).tolist()))
+
+    def get_bait_neighbor_counts(self, baits, nodes=None):
+        """
+        Gets number of neighbors of each node in **nodes** that
+        are in **baits**, in a single vectorized pass over all edges
+
+        :param baits: bait node ids
+        :type baits: list
+        :param nodes: node ids, if ``None`` all nodes in row order
+        :type nodes: list
+        :return: number of bait neighbors of each node, ``0`` for
+                 nodes not in index
+        :rtype: :py:class:`numpy.ndarray`
+        """
+        import numpy as np
+        is_bait = np.zeros(len(self._nodes), dtype=np.int64)
+        bait_rows = self._get_rows(list(baits))
+        is_bait[bait_rows[bait_rows >= 0]] = 1
+        if len(self._nodes) == 0:
+            counts = is_bait
+        else:
+            # every row has at least one neighbor so no offset is empty
+            counts = np.add.reduceat(is_bait[self._indices], self._indptr[:-1])
+        if nodes is None:
+            return counts
+        return self._get_values_for_nodes(counts, nodes)
+
+    def check_interactor_counts(self, baitlist, geneid_key='GeneID',
+                                num_key='NumInteractors'):
+        """
+        Compares the number of interactors of each bait in **baitlist**
+        with the number of unique interactors in the edgelist via
+        :py:func:`check_interactor_counts`. Use :py:func:`count_edge_rows`
+        instead for baitlists that count edge rows, such as BioPlex
+
+        :param baitlist: baits as dicts
+        :type baitlist: list
+        :param geneid_key: key of bait id in each dict
+        :type geneid_key: str
+        :param num_key: key of number of interactors in each dict
+        :type num_key: str
+        :return: description of each bait whose count differs, or
+                 is not a number
+        :rtype: list
+        """
+        baitlist = list(baitlist)
+        counts = self.get_interactor_counts([b[geneid_key] for b in baitlist])
+        return check_interactor_counts(baitlist, counts,
+                                       geneid_key=geneid_key,
+                                       num_key=num_key)
+
+    def __repr__(self):
+        return 'AdjacencyIndex(nodes=' + str(len(self._nodes)) + \
+               ', entries=' + str(len(self._indices)) + ')'
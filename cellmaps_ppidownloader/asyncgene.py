@@ -0,0 +1,300 @@
+import asyncio
+import logging
+
+from cellmaps_ppidownloader.exceptions import CellMapsPPIDownloaderError
+from cellmaps_ppidownloader.gene import GeneQuery
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncGeneQuery(GeneQuery):
+    """
+    Gets information about genes from the MyGene `query service`_
+    with `httpx <https://www.python-httpx.org>`__ over a pooled
+    HTTP session that keeps connections alive between batches.
+
+    .. _query service:
+       https://docs.mygene.info/en/latest/doc/query_service.html
+
+    Results are the same as :py:class:`~cellmaps_ppidownloader.gene.GeneQuery`
+    so it can be used in its place. Code already running in an event loop
+    must call :py:meth:`aquerymany` or :py:meth:`aget_symbols_for_genes`
+    since the synchronous methods run their own event loop. Synchronous
+    calls always use a session of their own, so they can also be made
+    from other threads while an async session is open.
+    To share one session across several queries use as an async context
+    manager:
+
+    .. code-block:: python
+
+        async with AsyncGeneQuery() as query:
+            res = await query.aget_symbols_for_genes(['1', '2'])
+    """
+
+    DEFAULT_URL = 'https://mygene.info/v3'
+    """
+    Default base url of MyGene service
+    """
+
+    QUERY_ENDPOINT = '/query'
+
+    def __init__(self, url=DEFAULT_URL,
+                 cache=None,
+                 batch_size=GeneQuery.DEFAULT_BATCH_SIZE,
+                 max_concurrency=4,
+                 max_connections=10,
+                 max_keepalive_connections=10,
+                 timeout=30.0,
+                 connect_timeout=10.0,
+                 retries=0,
+                 retry_wait=1.0):
+        """
+        Constructor
+
+        :param url: Base url of MyGene service
+        :type url: str
+        :param cache: If set, results are looked up in this cache
+                      and only cache misses are sent to MyGene
+        :type cache:
+            :py:class:`~cellmaps_ppidownloader.genecache.GeneQueryCache`
+        :param batch_size: Number of genes to send in each request
+        :type batch_size: int
+        :param max_concurrency: Max number of requests in flight at once
+        :type max_concurrency: int
+        :param max_connections: Max number of connections in pool
+        :type max_connections: int
+        :param max_keepalive_connections: Max number of idle connections
+                                          kept open in pool
+        :type max_keepalive_connections: int
+        :param timeout: Seconds to wait on reading a response,
+                        writing a request or getting a connection from pool
+        :type timeout: float
+        :param connect_timeout: Seconds to wait on establishing a connection
+        :type connect_timeout: float
+        :param retries: Number of times to retry a failed batch
+        :type retries: int
+        :param retry_wait: Seconds to wait before first retry of a batch,
+                           doubled on each subsequent retry
+        :type retry_wait: float
+        """
+        if batch_size is None:
+            batch_size = GeneQuery.DEFAULT_BATCH_SIZE
+        super().__init__(cache=cache, batch_size=batch_size,
+                         max_workers=max_concurrency,
+                         retries=retries, retry_wait=retry_wait)
+        self._url = url.rstrip('/')
+        self._max_connections = max_connections
+        self._max_keepalive_connections = max_keepalive_connections
+        self._timeout = timeout
+        self._connect_timeout = connect_timeout
+        self._client = None
+
+    def get_url(self):
+        """
+        Gets base url of MyGene service
+
+        :rtype: str
+        """
+        return self._url
+
+    def _create_client(self):
+        """
+        Creates HTTP session with connection limits and
+        timeouts set via constructor
+
+        :raises CellMapsPPIDownloaderError: If httpx is not installed
+        :rtype: :py:class:`httpx.AsyncClient`
+        """
+        try:
+            import httpx
+        except ImportError:
+            raise CellMapsPPIDownloaderError('httpx is required by '
+                                             'AsyncGeneQuery. Install with: '
+                                             'pip install '
+                                             'cellmaps_ppidownloader[async]')
+        limits = httpx.Limits(
+            max_connections=self._max_connections,
+            max_keepalive_connections=self._max_keepalive_connections)
+        return httpx.AsyncClient(base_url=self._url,
+                                 limits=limits,
+                                 timeout=httpx.Timeout(
+                                     self._timeout,
+                                     connect=self._connect_timeout))
+
+    async def __aenter__(self):
+        self._client = self._create_client()
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        client = self._client
+        self._client = None
+        await client.aclose()
+
+    def _querymany(self, queries, species=None,
+                   scopes=None,
+                   fields=None):
+        """
+        Runs :py:meth:`_aquerymany` in a new event loop with a
+        session created for this call. The session opened via
+        ``async with``, if any, is not used since it is bound to
+        the event loop it was opened in
+
+        :raises CellMapsPPIDownloaderError: If called from a thread
+                                            with a running event loop
+        :return: list of dicts from MyGene
+        :rtype: list
+        """
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            pass
+        else:
+            raise CellMapsPPIDownloaderError('AsyncGeneQuery synchronous '
+                                             'methods cannot be called '
+                                             'from a running event loop. '
+                                             'Use aquerymany() or '
+                                             'aget_symbols_for_genes()')
+        return asyncio.run(self._aquerymany(queries, species=species,
+                                            scopes=scopes, fields=fields,
+                                            use_session=False))
+
+    async def aquerymany(self, queries, species=None,
+                         scopes=None,
+                         fields=None):
+        """
+        Async version of
+        :py:meth:`~cellmaps_ppidownloader.gene.GeneQuery.querymany`
+
+        :param queries: list of gene ids/symbols to query
+        :type queries: list
+        :param species:
+        :type species: str
+        :param scopes:
+        :type scopes: str
+        :param fields:
+        :type fields: list
+        :return: list of dicts from MyGene in order of **queries**
+        :rtype: list
+        """
+        if self._cache is None:
+            return await self._aquerymany(queries, species=species,
+                                          scopes=scopes, fields=fields)
+        cached, missing = self._get_cached(queries, species=species,
+                                           scopes=scopes, fields=fields)
+        mygene_out = []
+        if len(missing) > 0:
+            mygene_out = await self._aquerymany(missing, species=species,
+                                                scopes=scopes, fields=fields)
+        return self._merge_with_cached(queries, cached, mygene_out,
+                                       species=species, scopes=scopes,
+                                       fields=fields)
+
+    async def aget_symbols_for_genes(self, genelist=None,
+                                     scopes='_id'):
+        """
+        Async version of
+        :py:meth:`~cellmaps_ppidownloader.gene.GeneQuery.get_symbols_for_genes`
+
+        :rtype: list
+        """
+        return await self.aquerymany(genelist,
+                                     species='human',
+                                     scopes=scopes,
+                                     fields=['ensembl.gene', 'symbol'])
+
+    async def _aquerymany(self, queries, species=None,
+                          scopes=None,
+                          fields=None,
+                          use_session=True):
+        """
+        Splits **queries** into batches and queries them with at
+        most **max_concurrency** requests in flight, merging results
+        back in input order
+
+        :param use_session: If ``True`` use session opened via
+                            ``async with``, if any, otherwise a
+                            session is created and closed by this call
+        :type use_session: bool
+        :return: list of dicts from MyGene
+        :rtype: list
+        """
+        queries = list(queries)
+        batches = [queries[i:i + self._batch_size]
+                   for i in range(0, len(queries), self._batch_size)]
+        if len(batches) == 0:
+            return []
+        semaphore = asyncio.Semaphore(max(1, self._max_workers or 1))
+        client = self._client if use_session else None
+        close_client = False
+        if client is None:
+            client = self._create_client()
+            close_client = True
+        try:
+            batch_results = await asyncio.gather(
+                *[self._aquery_batch(client, semaphore, b,
+                                     species=species, scopes=scopes,
+                                     fields=fields)
+                  for b in batches])
+        finally:
+            if close_client:
+                await client.aclose()
+        mygene_out = []
+        for res in batch_results:
+            mygene_out.extend(res)
+        return mygene_out
+
+    @staticmethod
+    def _get_query_params(queries, species=None, scopes=None, fields=None):
+        """
+        Gets form parameters of MyGene POST query request in the
+        format sent by :py:mod:`mygene`
+
+        :rtype: dict
+        """
+        params = {'q': ','.join('"' + str(q) + '"' for q in queries)}
+        if scopes is not None:
+            if not isinstance(scopes, str):
+                scopes = ','.join(scopes)
+            params['scopes'] = scopes
+        if fields is not None:
+            if not isinstance(fields, str):
+                fields = ','.join(fields)
+            params['fields'] = fields
+        if species is not None:
+            params['species'] = species
+        return params
+
+    async def _aquery_batch(self, client, semaphore, queries, species=None,
+                            scopes=None, fields=None):
+        """
+        Posts one batch of **queries** retrying on failure as set
+        via constructor
+
+        :raises CellMapsPPIDownloaderError: If all attempts fail
+        :return: list of dicts from MyGene
+        :rtype: list
+        """
+        params = AsyncGeneQuery._get_query_params(queries, species=species,
+                                                  scopes=scopes, fields=fields)
+        attempt = 0
+        while True:
+            try:
+                async with semaphore:
+                    response = await client.post(AsyncGeneQuery.QUERY_ENDPOINT,
+                                                 data=params)
+                response.raise_for_status()
+                return response.json()
+            except Exception as e:
+                if attempt >= self._retries:
+                    if self._retries == 0:
+                        raise
+                    raise CellMapsPPIDownloaderError(
+                        'MyGene query of ' + str(len(queries)) +
+                        ' genes failed after ' + str(attempt + 1) +
+                        ' attempts: ' + str(e)) from e
+                wait = self._retry_wait * (2 ** attempt)
+                logger.warning('MyGene query of ' + str(len(queries)) +
+                               ' genes failed (' + str(e) + '). Retrying in ' +
+                               str(wait) + ' seconds')
+                await asyncio.sleep(wait)
+                attempt += 1
@@ -6,6 +6,8 @@ import sys
 import logging
 import logging.config
 import json
+import time
+from concurrent.futures import ProcessPoolExecutor
 
 from cellmaps_utils import logutils
 from cellmaps_utils import constants
@@ -13,9 +15,57 @@ import cellmaps_ppidownloader
 from cellmaps_ppidownloader.runner import CellmapsPPIDownloader
 from cellmaps_ppidownloader.gene import APMSGeneNodeAttributeGenerator
 from cellmaps_ppidownloader.gene import CM4AIGeneNodeAttributeGenerator
+from cellmaps_ppidownloader.gene import GeneQuery
+from cellmaps_ppidownloader.asyncgene import AsyncGeneQuery
+from cellmaps_ppidownloader.genecache import GeneQueryCache
+from cellmaps_ppidownloader.geneinfo import GeneInfoQuery
+from cellmaps_ppidownloader.profiling import RunProfiler
+from cellmaps_ppidownloader import fileutils
+from cellmaps_ppidownloader.columnar import ColumnarWriter
+from cellmaps_ppidownloader.runcache import RunCache
+from cellmaps_ppidownloader.exceptions import CellMapsPPIDownloaderError
 
 logger = logging.getLogger(__name__)
 
+BATCH_SUMMARY_FILE = 'batch_summary.json'
+"""
+Name of file in output directory with exit code of each
+--batch_manifest job
+"""
+
+BATCH_MYGENE_CACHE_FILE = 'mygene_cache.sqlite'
+"""
+Name of MyGene cache shared by --batch_manifest jobs if
+--mygene_cache is not set
+"""
+
+RUN_CACHE_INPUT_ARGS = ['cm4ai_table', 'edgelist', 'baitlist',
+                        'gene_info', 'uniprot_mapping']
+"""
+Flags set to input files whose contents are part of the
+--run_cache key
+"""
+
+RUN_CACHE_PARAMETER_ARGS = ['edgelist_geneid_one_col', 'edgelist_symbol_one_col',
+                            'edgelist_geneid_two_col', 'edgelist_symbol_two_col',
+                            'baitlist_symbol_col', 'baitlist_geneid_col',
+                            'baitlist_numinteractors_col', 'columnar_format',
+                            'output_compression']
+"""
+Flags that change outputs and are part of the --run_cache key
+"""
+
+CM4AI_EDGELIST_FILTERS = {'bait_col': 'Bait',
+                          'prey_col': 'Prey',
+                          'bfdr_col': None,
+                          'foldchange_col': None,
+                          'foldchange_cutoff': 0.0,
+                          'bfdr_maxcutoff': 0.05}
+"""
+Columns and cutoffs used to load --cm4ai_table, which are part of the
+--run_cache key
+"""
+
 
 def _parse_arguments(desc, args):
     """
@@ -49,6 +99,16 @@ def _parse_arguments(desc, args):
                         help='Name of column containing ensemble Gene ID 2 in --edgelist file')
     parser.add_argument('--edgelist_symbol_two_col', default=APMSGeneNodeAttributeGenerator.SYMBOL_COL2,
                         help='Name of column containing Gene Symbol 2 in --edgelist file')
+    parser.add_argument('--stream_edgelist', action='store_true',
+                        help='If set, --edgelist file is read each time '
+                             'edges are needed instead of being loaded '
+                             'into memory. Lowers memory use for very '
+                             'large edgelists')
+    parser.add_argument('--edgelist_workers', type=int, default=1,
+                        help='If greater than 1, --edgelist file is split '
+                             'into chunks that are parsed across this many '
+                             'processes. Speeds up loading of very large '
+                             'edgelists. Ignored if --stream_edgelist is set')
     parser.add_argument('--baitlist',
                         help='APMS baitlist TSV file in format of:\n'
                              'GeneSymbol\tGeneID\t# Interactors\n'
@@ -62,6 +122,118 @@ def _parse_arguments(desc, args):
     parser.add_argument('--baitlist_numinteractors_col',
                         default=APMSGeneNodeAttributeGenerator.BAITLIST_NUM_INTERACTORS,
                         help='Name of column containing # of interactors in --baitlist file')
+    parser.add_argument('--check_interactor_counts', action='store_true',
+                        help='If set, warn about baits whose number of '
+                             'interactors in --baitlist differs from the '
+                             'number of --edgelist rows they are on')
+    parser.add_argument('--input_copy_mode', choices=fileutils.COPY_MODES,
+                        help='How --edgelist and --baitlist files are put '
+                             'in outdir. link tries a hardlink, then a '
+                             'reflink, then a copy. symlink tries a '
+                             'symbolic link, then a copy. SHA-256 checksum '
+                             'of each file is recorded in the RO-Crate. '
+                             'If unset, files are copied by FAIRSCAPE')
+    parser.add_argument('--columnar_format', choices=ColumnarWriter.FORMATS,
+                        help='If set, ppi edgelist and gene node attributes '
+                             'are also written in this format with gene '
+                             'symbols dictionary encoded. Requires pyarrow, '
+                             'installed with: pip install '
+                             'cellmaps_ppidownloader[columnar]')
+    parser.add_argument('--output_compression', choices=fileutils.COMPRESSIONS,
+                        help='If set, ppi edgelist and gene node attributes '
+                             'files are compressed in this format as they '
+                             'are written, gaining a .gz or .zst suffix. '
+                             'Uncompressed --edgelist and --baitlist files '
+                             'are also compressed when put in outdir. Uses '
+                             'pigz or zstd if found on the path')
+    parser.add_argument('--profile', choices=RunProfiler.PROFILERS,
+                        help='If set, profile the run with this profiler '
+                             'writing ' + RunProfiler.CPROFILE_FILE + ' or ' +
+                             RunProfiler.PYINSTRUMENT_FILE + ' to outdir. '
+                             'pyinstrument must be installed separately')
+    parser.add_argument('--mygene_cache',
+                        help='Path to SQLite file used to cache MyGene '
+                             'query results across runs. If unset, '
+                             'no caching is done')
+    parser.add_argument('--mygene_cache_ttl', type=float,
+                        default=GeneQueryCache.DEFAULT_TTL,
+                        help='Time in seconds entries in --mygene_cache '
+                             'are considered valid')
+    parser.add_argument('--mygene_batch_size', type=int,
+                        default=GeneQuery.DEFAULT_BATCH_SIZE,
+                        help='Number of genes sent in each MyGene request')
+    parser.add_argument('--mygene_workers', type=int, default=4,
+                        help='Max number of MyGene requests to run '
+                             'concurrently')
+    parser.add_argument('--mygene_retries', type=int, default=3,
+                        help='Number of times to retry a failed MyGene '
+                             'request. Waits between retries double '
+                             'starting at 1 second')
+    parser.add_argument('--mygene_async', action='store_true',
+                        help='If set, query MyGene with an asynchronous '
+                             'client that reuses pooled HTTP connections. '
+                             '--mygene_workers sets the number of requests '
+                             'in flight')
+    parser.add_argument('--mygene_url', default=AsyncGeneQuery.DEFAULT_URL,
+                        help='Base url of MyGene service. Only used with '
+                             '--mygene_async')
+    parser.add_argument('--mygene_max_connections', type=int, default=10,
+                        help='Max number of HTTP connections to MyGene. '
+                             'Only used with --mygene_async')
+    parser.add_argument('--mygene_timeout', type=float, default=30.0,
+                        help='Seconds to wait on a MyGene response. '
+                             'Only used with --mygene_async')
+    parser.add_argument('--gene_info',
+                        help='Path to local NCBI gene_info file '
+                             '(ex: Homo_sapiens.gene_info), optionally gzip '
+                             'or zstd compressed. If set, genes '
+                             'are resolved offline using this file instead '
+                             'of querying MyGene')
+    parser.add_argument('--uniprot_mapping',
+                        help='Path to UniProt id mapping file '
+                             '(ex: HUMAN_9606_idmapping_selected.tab) used '
+                             'with --gene_info to resolve UniProt accessions '
+                             'in --cm4ai_table')
+    parser.add_argument('--previous_outdir',
+                        help='Output directory of an earlier run of this '
+                             'tool. If set, gene node attributes from that '
+                             'run are reused so only genes not seen before '
+                             'are queried, and ' +
+                             CellmapsPPIDownloader.PPI_CHANGELOG_FILE +
+                             ' listing added and removed genes and edges '
+                             'is written. Currently only used with --edgelist')
+    parser.add_argument('--run_cache',
+                        help='Path to directory used to cache outputs '
+                             'across runs. Outputs are keyed on the contents '
+                             'of input files, the flags that change outputs '
+                             'and the version of this tool. If a run with '
+                             'the same key was done before, its outputs are '
+                             'hardlinked, or copied, into outdir instead of '
+                             'being generated and only the RO-Crate is '
+                             'created. Entries expire as set via '
+                             '--run_cache_max_age. Ignored if '
+                             '--previous_outdir is set')
+    parser.add_argument('--run_cache_max_age', type=float,
+                        help='Time in seconds entries in --run_cache are '
+                             'considered valid. If unset, entries of runs '
+                             'resolving genes via MyGene expire after '
+                             '--mygene_cache_ttl seconds and entries of runs '
+                             'using --gene_info never expire')
+    parser.add_argument('--batch_manifest',
+                        help='Path to JSON file with a list of jobs to run. '
+                             'Each job is an object whose keys are names of '
+                             'flags of this tool (ex: edgelist, baitlist, '
+                             'cm4ai_table, provenance, outdir) that override '
+                             'values set on the command line. Relative job '
+                             'outdir paths are put under outdir. If set, '
+                             'jobs are run across --batch_workers processes '
+                             'sharing one --mygene_cache and ' +
+                             BATCH_SUMMARY_FILE + ' with exit code of each '
+                             'job is written to outdir')
+    parser.add_argument('--batch_workers', type=int,
+                        default=os.cpu_count(),
+                        help='Number of processes used to run '
+                             '--batch_manifest jobs')
     parser.add_argument('--provenance',
                         help='Path to file containing provenance '
                              'information about input files in JSON format. '
@@ -90,6 +262,260 @@ def _parse_arguments(desc, args):
     return parser.parse_args(args)
 
 
+def _get_genequery(theargs):
+    """
+    Creates :py:class:`~cellmaps_ppidownloader.gene.GeneQuery`, or
+    :py:class:`~cellmaps_ppidownloader.asyncgene.AsyncGeneQuery` if
+    ``theargs.mygene_async`` is set, using
+    cache settings from **theargs** or, if ``theargs.gene_info`` is set,
+    :py:class:`~cellmaps_ppidownloader.geneinfo.GeneInfoQuery`
+
+    :param theargs: parsed command line arguments
+    :type theargs: :py:class:`argparse.Namespace`
+    :return: object to query for gene symbols
+    :rtype: :py:class:`~cellmaps_ppidownloader.gene.GeneQuery`
+    """
+    if theargs.gene_info is not None:
+        return GeneInfoQuery(gene_info_file=theargs.gene_info,
+                             uniprot_mapping_file=theargs.uniprot_mapping)
+    cache = None
+    if theargs.mygene_cache is not None:
+        cache = GeneQueryCache(cachefile=theargs.mygene_cache,
+                               ttl=theargs.mygene_cache_ttl)
+    if theargs.mygene_async:
+        return AsyncGeneQuery(url=theargs.mygene_url,
+                              cache=cache,
+                              batch_size=theargs.mygene_batch_size,
+                              max_concurrency=theargs.mygene_workers,
+                              max_connections=theargs.mygene_max_connections,
+                              max_keepalive_connections=theargs.mygene_max_connections,
+                              timeout=theargs.mygene_timeout,
+                              retries=theargs.mygene_retries)
+    return GeneQuery(cache=cache,
+                     batch_size=theargs.mygene_batch_size,
+                     max_workers=theargs.mygene_workers,
+                     retries=theargs.mygene_retries)
+
+
+def _get_run_cache_key(theargs):
+    """
+    Gets key of run in **theargs** for
+    :py:class:`~cellmaps_ppidownloader.runcache.RunCache` from the
+    contents of input files in :py:const:`RUN_CACHE_INPUT_ARGS`, values
+    of :py:const:`RUN_CACHE_PARAMETER_ARGS`, the source of gene
+    information, ``--mygene_cache_ttl`` if ``--mygene_cache`` is set
+    and, for ``--cm4ai_table``, :py:const:`CM4AI_EDGELIST_FILTERS`
+
+    :param theargs: parsed command line arguments
+    :type theargs: :py:class:`argparse.Namespace`
+    :return: key
+    :rtype: str
+    """
+    input_files = {a: getattr(theargs, a, None) for a in RUN_CACHE_INPUT_ARGS}
+    parameters = {a: getattr(theargs, a, None) for a in RUN_CACHE_PARAMETER_ARGS}
+    if theargs.gene_info is None:
+        parameters['mygene_url'] = theargs.mygene_url
+        if theargs.mygene_cache is not None:
+            parameters['mygene_cache_ttl'] = theargs.mygene_cache_ttl
+    if theargs.cm4ai_table is not None:
+        parameters['cm4ai_filters'] = CM4AI_EDGELIST_FILTERS
+    return RunCache.get_key(input_files=input_files, parameters=parameters)
+
+
+def _get_run_cache_max_age(theargs):
+    """
+    Gets max age in seconds of ``--run_cache`` entries which is
+    ``--run_cache_max_age`` if set. Otherwise it is ``--mygene_cache_ttl``
+    when genes are resolved via MyGene, so cached outputs are not kept
+    longer than MyGene results, or ``None`` when ``--gene_info``
+    is set since its contents are part of the key
+
+    :param theargs: parsed command line arguments
+    :type theargs: :py:class:`argparse.Namespace`
+    :return: max age in seconds or ``None`` if entries never expire
+    :rtype: float
+    """
+    if theargs.run_cache_max_age is not None:
+        return theargs.run_cache_max_age
+    if theargs.gene_info is None:
+        return theargs.mygene_cache_ttl
+    return None
+
+
+def _run(theargs):
+    """
+    Creates gene node attribute generator for input data in **theargs**
+    and runs :py:class:`~cellmaps_ppidownloader.runner.CellmapsPPIDownloader`.
+    If ``--run_cache`` has outputs for this run no generator is created
+
+    :param theargs: parsed command line arguments
+    :type theargs: :py:class:`argparse.Namespace`
+    :return: return value of :py:meth:`cellmaps_ppidownloader.runner.CellmapsPPIDownloader.run`
+    :rtype: int
+    """
+    # load the provenance as a dict
+    with open(theargs.provenance, 'r') as f:
+        json_prov = json.load(f)
+
+    run_cache = None
+    run_cache_key = None
+    run_cache_entry = None
+    if theargs.run_cache is not None:
+        if theargs.previous_outdir is not None:
+            logger.info('--previous_outdir is set, not using --run_cache')
+        else:
+            run_cache = RunCache(cachedir=theargs.run_cache,
+                                 max_age=_get_run_cache_max_age(theargs))
+            run_cache_key = _get_run_cache_key(theargs)
+            # looked up once and passed to runner so entry expiring
+            # or being replaced in between does not fail the run
+            run_cache_entry = run_cache.get_entry(run_cache_key)
+
+    if theargs.cm4ai_table is not None:
+        json_prov[CellmapsPPIDownloader.CM4AI_ROCRATE] = os.path.abspath(os.path.dirname(theargs.cm4ai_table))
+
+    if run_cache_entry is not None:
+        # outputs come from cache so skip loading inputs
+        apmsgen = None
+    elif theargs.cm4ai_table is None:
+        genequery = _get_genequery(theargs)
+        apmsgen = APMSGeneNodeAttributeGenerator(
+            apms_edgelist=APMSGeneNodeAttributeGenerator.get_apms_edgelist_from_tsvfile(theargs.edgelist,
+                                                                                        geneid_one_col=theargs.edgelist_geneid_one_col,
+                                                                                        symbol_one_col=theargs.edgelist_symbol_one_col,
+                                                                                        geneid_two_col=theargs.edgelist_geneid_two_col,
+                                                                                        symbol_two_col=theargs.edgelist_symbol_two_col,
+                                                                                        streaming=theargs.stream_edgelist,
+                                                                                        workers=theargs.edgelist_workers),
+            apms_baitlist=APMSGeneNodeAttributeGenerator.get_apms_baitlist_from_tsvfile(theargs.baitlist,
+                                                                                        symbol_col=theargs.baitlist_symbol_col,
+                                                                                        geneid_col=theargs.baitlist_geneid_col,
+                                                                                        numinteractors_col=theargs.baitlist_numinteractors_col),
+            genequery=genequery,
+            check_interactor_counts=theargs.check_interactor_counts)
+    else:
+        genequery = _get_genequery(theargs)
+        apmsgen = CM4AIGeneNodeAttributeGenerator(apms_edgelist=CM4AIGeneNodeAttributeGenerator.get_apms_edgelist_from_tsvfile(theargs.cm4ai_table,
+                                                                                                                               **CM4AI_EDGELIST_FILTERS),
+                                                  genequery=genequery)
+
+    return CellmapsPPIDownloader(outdir=theargs.outdir,
+                                 apmsgen=apmsgen,
+                                 skip_logging=theargs.skip_logging,
+                                 input_data_dict=theargs.__dict__,
+                                 provenance=json_prov,
+                                 previous_outdir=theargs.previous_outdir,
+                                 profiler=theargs.profile,
+                                 input_copy_mode=theargs.input_copy_mode,
+                                 columnar_format=theargs.columnar_format,
+                                 output_compression=theargs.output_compression,
+                                 run_cache=run_cache,
+                                 run_cache_key=run_cache_key,
+                                 run_cache_entry=run_cache_entry).run()
+
+
+def _get_batch_jobs(theargs):
+    """
+    Reads jobs from ``theargs.batch_manifest`` returning each as a copy
+    of **theargs** updated with values set for the job. Relative job
+    output directories are put under ``theargs.outdir``. If neither
+    ``--mygene_cache`` nor ``--gene_info`` is set, all jobs share a
+    MyGene cache in ``theargs.outdir``
+
+    :param theargs: parsed command line arguments
+    :type theargs: :py:class:`argparse.Namespace`
+    :raises CellMapsPPIDownloaderError: If manifest is not a list of objects
+                                        or a job sets an unknown flag or
+                                        lacks an outdir
+    :return: arguments for each job
+    :rtype: list
+    """
+    with open(theargs.batch_manifest, 'r') as f:
+        manifest = json.load(f)
+    if not isinstance(manifest, list):
+        raise CellMapsPPIDownloaderError('Expected list of jobs in ' + theargs.batch_manifest)
+
+    base_args = dict(vars(theargs))
+    base_args['batch_manifest'] = None
+    if base_args['mygene_cache'] is None and base_args['gene_info'] is None:
+        base_args['mygene_cache'] = os.path.join(theargs.outdir, BATCH_MYGENE_CACHE_FILE)
+
+    jobs = []
+    for index, job in enumerate(manifest):
+        if not isinstance(job, dict):
+            raise CellMapsPPIDownloaderError('Job ' + str(index) + ' in ' +
+                                             theargs.batch_manifest + ' is not an object')
+        if 'outdir' not in job:
+            raise CellMapsPPIDownloaderError('Job ' + str(index) + ' in ' +
+                                             theargs.batch_manifest + ' lacks outdir')
+        job_args = dict(base_args)
+        for key, val in job.items():
+            if key not in job_args or key.startswith('batch_'):
+                raise CellMapsPPIDownloaderError('Job ' + str(index) + ' in ' +
+                                                 theargs.batch_manifest +
+                                                 ' sets unknown flag: ' + str(key))
+            job_args[key] = val
+        job_args['outdir'] = os.path.join(theargs.outdir, job['outdir'])
+        jobs.append(argparse.Namespace(**job_args))
+    return jobs
+
+
+def _run_batch_job(theargs):
+    """
+    Runs a single batch job catching any exception
+
+    :param theargs: arguments for job
+    :type theargs: :py:class:`argparse.Namespace`
+    :return: ``0`` upon success, ``1`` if no provenance was set for
+             job and ``2`` if an exception was raised
+    :rtype: int
+    """
+    try:
+        if theargs.provenance is None:
+            logger.error('provenance is required, skipping job with outdir ' +
+                         str(theargs.outdir))
+            return 1
+        return _run(theargs)
+    except Exception as e:
+        logger.exception('Caught exception running job with outdir ' +
+                         str(theargs.outdir) + ': ' + str(e))
+        return 2
+
+
+def _run_batch(theargs):
+    """
+    Runs jobs in ``theargs.batch_manifest`` across
+    ``theargs.batch_workers`` processes and writes exit code of
+    each job to :py:const:`BATCH_SUMMARY_FILE` in ``theargs.outdir``
+
+    :param theargs: parsed command line arguments
+    :type theargs: :py:class:`argparse.Namespace`
+    :return: ``0`` if all jobs succeeded otherwise highest exit code
+             of any job
+    :rtype: int
+    """
+    jobs = _get_batch_jobs(theargs)
+    os.makedirs(theargs.outdir, mode=0o755, exist_ok=True)
+    start_time = int(time.time())
+    num_workers = max(1, min(theargs.batch_workers or 1, len(jobs)))
+    logger.info('Running ' + str(len(jobs)) + ' jobs with ' +
+                str(num_workers) + ' workers')
+    if num_workers == 1:
+        exitcodes = [_run_batch_job(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=num_workers) as executor:
+            exitcodes = list(executor.map(_run_batch_job, jobs))
+
+    summary = {'manifest': os.path.abspath(theargs.batch_manifest),
+               'start_time': start_time,
+               'end_time': int(time.time()),
+               'jobs': [{'outdir': job.outdir, 'exitcode': exitcode}
+                        for job, exitcode in zip(jobs, exitcodes)]}
+    with open(os.path.join(theargs.outdir, BATCH_SUMMARY_FILE), 'w') as f:
+        json.dump(summary, f, indent=2)
+    return max(exitcodes, default=0)
+
+
 def main(args):
     """
     Main entry point for program
@@ -98,7 +524,9 @@ def main(args):
     :type args: list
 
     :return: return value of :py:meth:`cellmaps_ppidownloader.runner.CellmapsPPIDownloader.run`
-             or ``2`` if an exception is raised
+             or ``2`` if an exception is raised. If ``--batch_manifest``
+             is set, ``0`` if all jobs succeeded otherwise highest exit
+             code of any job
     :rtype: int
     """
     withguids_json = json.dumps(CellmapsPPIDownloader.get_example_provenance(with_ids=True), indent=2)
@@ -130,6 +558,13 @@ For CM4AI data:
 
 To use pass in a CM4AI tsv file stored in RO-CRATE via --cm4ai_table flag
 
+To run many datasets in one invocation pass a JSON list of jobs to
+--batch_manifest where each job sets flags of this tool, for example:
+
+[{{"outdir": "job1", "edgelist": "e1.tsv", "baitlist": "b1.tsv",
+  "provenance": "p1.json"}},
+ {{"outdir": "job2", "cm4ai_table": "apms.tsv", "provenance": "p2.json"}}]
+
 In addition, the --provenance flag is required and must be set to a path
 to a JSON file.
 
@@ -154,6 +589,8 @@ Additional optional fields for registering datasets include
 
     try:
         logutils.setup_cmd_logging(theargs)
+        if theargs.batch_manifest is not None:
+            return _run_batch(theargs)
         if theargs.provenance is None:
             sys.stderr.write('\n\n--provenance flag is required to run this tool. '
                              'Please pass '
@@ -165,30 +602,7 @@ Additional optional fields for registering datasets include
             sys.stderr.write(register_json + '\n\n')
             return 1
 
-        # load the provenance as a dict
-        with open(theargs.provenance, 'r') as f:
-            json_prov = json.load(f)
-
-        if theargs.cm4ai_table is None:
-            apmsgen = APMSGeneNodeAttributeGenerator(
-                apms_edgelist=APMSGeneNodeAttributeGenerator.get_apms_edgelist_from_tsvfile(theargs.edgelist,
-                                                                                            geneid_one_col=theargs.edgelist_geneid_one_col,
-                                                                                            symbol_one_col=theargs.edgelist_symbol_one_col,
-                                                                                            geneid_two_col=theargs.edgelist_geneid_two_col,
-                                                                                            symbol_two_col=theargs.edgelist_symbol_two_col),
-                apms_baitlist=APMSGeneNodeAttributeGenerator.get_apms_baitlist_from_tsvfile(theargs.baitlist,
-                                                                                            symbol_col=theargs.baitlist_symbol_col,
-                                                                                            geneid_col=theargs.baitlist_geneid_col,
-                                                                                            numinteractors_col=theargs.baitlist_numinteractors_col))
-        else:
-            json_prov[CellmapsPPIDownloader.CM4AI_ROCRATE] = os.path.abspath(os.path.dirname(theargs.cm4ai_table))
-            apmsgen = CM4AIGeneNodeAttributeGenerator(apms_edgelist=CM4AIGeneNodeAttributeGenerator.get_apms_edgelist_from_tsvfile(theargs.cm4ai_table))
-
-        return CellmapsPPIDownloader(outdir=theargs.outdir,
-                                     apmsgen=apmsgen,
-                                     skip_logging=theargs.skip_logging,
-                                     input_data_dict=theargs.__dict__,
-                                     provenance=json_prov).run()
+        return _run(theargs)
     except Exception as e:
         logger.exception('Caught exception: ' + str(e))
         return 2
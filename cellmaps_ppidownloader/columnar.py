@@ -0,0 +1,142 @@
+import os
+import logging
+
+from cellmaps_utils import constants
+
+from cellmaps_ppidownloader.exceptions import CellMapsPPIDownloaderError
+from cellmaps_ppidownloader import fileutils
+
+logger = logging.getLogger(__name__)
+
+
+class ColumnarWriter(object):
+    """
+    Writes copies of the ppi edgelist and gene node attribute TSV
+    files as `Parquet <https://parquet.apache.org>`__ or
+    `Arrow IPC <https://arrow.apache.org/docs/format/Columnar.html#ipc-file-format>`__
+    files with gene symbol columns dictionary encoded so downstream
+    tools can load or memory map them without parsing text.
+
+    Requires `pyarrow <https://arrow.apache.org/docs/python>`__ which
+    is not installed with this package
+    """
+
+    PARQUET = 'parquet'
+    ARROW = 'arrow'
+
+    FORMATS = [PARQUET, ARROW]
+
+    DICTIONARY_COLS = constants.PPI_EDGELIST_COLS + ['name']
+    """
+    Columns holding gene symbols that are dictionary encoded
+    """
+
+    def __init__(self, columnar_format=PARQUET):
+        """
+        Constructor
+
+        :param columnar_format: One of :py:const:`FORMATS`
+        :type columnar_format: str
+        :raises CellMapsPPIDownloaderError: If **columnar_format** is unknown
+        """
+        if columnar_format not in ColumnarWriter.FORMATS:
+            raise CellMapsPPIDownloaderError('Unknown columnar format: ' + str(columnar_format) +
+                                             ' must be one of ' +
+                                             ', '.join(ColumnarWriter.FORMATS))
+        self._format = columnar_format
+
+    def get_format(self):
+        """
+        Gets format passed in via constructor
+
+        :rtype: str
+        """
+        return self._format
+
+    def get_columnar_file(self, tsvfile):
+        """
+        Gets path of columnar file written for **tsvfile**, which
+        is **tsvfile** with ``.tsv`` suffix, and any compression
+        suffix, replaced by ``.parquet`` or ``.arrow``
+
+        :rtype: str
+        """
+        return os.path.splitext(fileutils.strip_compression_suffix(tsvfile))[0] + \
+            '.' + self._format
+
+    @staticmethod
+    def _import_pyarrow():
+        """
+        Imports pyarrow
+
+        :raises CellMapsPPIDownloaderError: If pyarrow is not installed
+        :return: (pyarrow, pyarrow.csv) modules
+        :rtype: tuple
+        """
+        try:
+            import pyarrow
+            import pyarrow.csv
+        except ImportError:
+            raise CellMapsPPIDownloaderError('pyarrow is required for columnar '
+                                             'output, but it is not installed. '
+                                             'Install with: pip install '
+                                             'cellmaps_ppidownloader[columnar]')
+        return pyarrow, pyarrow.csv
+
+    def _read_tsvfile(self, tsvfile):
+        """
+        Reads **tsvfile** written by
+        :py:class:`~cellmaps_ppidownloader.runner.CellmapsPPIDownloader`
+        with all columns as strings, except ``bait`` which is boolean,
+        and symbol columns dictionary encoded. **tsvfile** can be gzip
+        or zstd compressed, which is detected from its contents via
+        :py:func:`~cellmaps_ppidownloader.fileutils.open_input` and not
+        its extension. Quoting is parsed as written by the default
+        :py:mod:`csv` dialect used to write the TSV files, where fields
+        with quotes or delimiters are quoted and quotes are doubled
+
+        :rtype: :py:class:`pyarrow.Table`
+        """
+        pa, pacsv = ColumnarWriter._import_pyarrow()
+        with fileutils.open_input(tsvfile, mode='rb') as f:
+            header = f.readline().decode('utf-8').rstrip('\r\n').split('\t')
+        column_types = {c: pa.string() for c in header}
+        if 'bait' in column_types:
+            column_types['bait'] = pa.bool_()
+        parse_options = pacsv.ParseOptions(delimiter='\t', quote_char='"',
+                                           double_quote=True,
+                                           escape_char=False)
+        convert_options = pacsv.ConvertOptions(column_types=column_types,
+                                               strings_can_be_null=False)
+        with fileutils.open_input(tsvfile, mode='rb') as f:
+            table = pacsv.read_csv(f, parse_options=parse_options,
+                                   convert_options=convert_options)
+        for index, colname in enumerate(table.column_names):
+            if colname in ColumnarWriter.DICTIONARY_COLS:
+                table = table.set_column(index, colname,
+                                         table.column(colname).dictionary_encode())
+        return table
+
+    def write(self, tsvfile):
+        """
+        Writes columnar copy of **tsvfile** to
+        :py:meth:`get_columnar_file`
+
+        :param tsvfile: ppi edgelist or gene node attribute TSV file
+        :type tsvfile: str
+        :raises CellMapsPPIDownloaderError: If pyarrow is not installed
+        :return: path to file written
+        :rtype: str
+        """
+        pa, pacsv = ColumnarWriter._import_pyarrow()
+        table = self._read_tsvfile(tsvfile)
+        outfile = self.get_columnar_file(tsvfile)
+        if self._format == ColumnarWriter.PARQUET:
+            import pyarrow.parquet as pq
+            pq.write_table(table, outfile, use_dictionary=True)
+        else:
+            with pa.OSFile(outfile, 'wb') as sink:
+                with pa.ipc.new_file(sink, table.schema) as writer:
+                    writer.write_table(table)
+        logger.debug('Wrote ' + str(table.num_rows) + ' rows to ' + outfile)
+        return outfile
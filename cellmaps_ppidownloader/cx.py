@@ -0,0 +1,231 @@
+import logging
+
+from cellmaps_ppidownloader.exceptions import CellMapsPPIDownloaderError
+from cellmaps_ppidownloader.edgetable import EdgeTable
+from cellmaps_ppidownloader.adjacency import AdjacencyIndex
+
+logger = logging.getLogger(__name__)
+
+
+class CXStreamReader(object):
+    """
+    Reads `CX <https://cytoscape.org/cx/>`__ and CX2 networks
+    element by element using `ijson <https://pypi.org/project/ijson/>`__
+    so the full document never has to be held in memory.
+
+    The source can be a path to a local ``.cx`` or ``.cx2`` file or
+    any binary file-like object, such as the raw stream of an
+    HTTP response from NDEx.
+    """
+
+    NODES = 'nodes'
+    EDGES = 'edges'
+    NODE_ATTRIBUTES = 'nodeAttributes'
+    EDGE_ATTRIBUTES = 'edgeAttributes'
+    ATTRIBUTE_DECLARATIONS = 'attributeDeclarations'
+
+    APMS_ASPECTS = (ATTRIBUTE_DECLARATIONS, NODES, EDGES,
+                    NODE_ATTRIBUTES, EDGE_ATTRIBUTES)
+    """
+    Aspects needed to build AP-MS edgelist, baitlist and
+    gene node attributes
+    """
+
+    def __init__(self, source=None):
+        """
+        Constructor
+
+        :param source: Path to CX or CX2 file or binary file-like object
+        :type source: str or file
+        """
+        if source is None:
+            raise CellMapsPPIDownloaderError('source is None')
+        self._source = source
+
+    def iter_aspect_elements(self, aspects=None):
+        """
+        Generator that yields elements of **aspects** in the order
+        they appear in the document
+
+        :param aspects: names of aspects to return elements for
+        :type aspects: list
+        :return: (aspect name, element as dict)
+        :rtype: tuple
+        """
+        if isinstance(self._source, str):
+            with open(self._source, 'rb') as f:
+                for res in self._iter_aspect_elements(f, aspects):
+                    yield res
+        else:
+            for res in self._iter_aspect_elements(self._source, aspects):
+                yield res
+
+    @staticmethod
+    def _iter_aspect_elements(stream, aspects):
+        """
+        Parses **stream** yielding elements of **aspects**
+        """
+        import ijson
+
+        wanted = {'item.' + a + '.item': a for a in aspects}
+        builder = None
+        builder_prefix = None
+        for prefix, event, value in ijson.parse(stream, use_float=True):
+            if builder is None:
+                if event == 'start_map' and prefix in wanted:
+                    builder = ijson.ObjectBuilder()
+                    builder_prefix = prefix
+                    builder.event(event, value)
+                continue
+            builder.event(event, value)
+            if event == 'end_map' and prefix == builder_prefix:
+                yield wanted[builder_prefix], builder.value
+                builder = None
+
+    @staticmethod
+    def _get_attribute_aliases(declarations):
+        """
+        Gets alias => attribute name maps for nodes and edges from
+        CX2 ``attributeDeclarations`` element
+
+        :return: (node aliases, edge aliases, node defaults, edge defaults)
+        :rtype: tuple
+        """
+        res = []
+        for aspect in [CXStreamReader.NODES, CXStreamReader.EDGES]:
+            aliases = {}
+            defaults = {}
+            for name, decl in declarations.get(aspect, {}).items():
+                if 'a' in decl:
+                    aliases[decl['a']] = name
+                if 'v' in decl:
+                    defaults[name] = decl['v']
+            res.append((aliases, defaults))
+        return res[0][0], res[1][0], res[0][1], res[1][1]
+
+    @staticmethod
+    def _get_cx2_values(element, aliases, defaults):
+        """
+        Gets attributes of CX2 node or edge applying
+        **aliases** and **defaults**
+
+        :rtype: dict
+        """
+        values = dict(defaults)
+        for key, val in element.get('v', {}).items():
+            values[aliases.get(key, key)] = val
+        return values
+
+    @staticmethod
+    def _get_bait_flag(val):
+        """
+        Converts ``bait`` attribute value to ``True``, ``False``
+        or ``None`` if not set or not recognized
+        """
+        if val is True or val == 'true':
+            return True
+        if val is False or val == 'false':
+            return False
+        return None
+
+    def get_apms_tables(self):
+        """
+        Reads network in a single pass returning AP-MS edgelist and
+        baitlist in same format as
+        :py:meth:`~cellmaps_ppidownloader.gene.NdexGeneNodeAttributeGenerator.get_apms_edgelist_from_ndex`
+        and
+        :py:meth:`~cellmaps_ppidownloader.gene.NdexGeneNodeAttributeGenerator.get_apms_baitlist_from_ndex`
+        along with gene node attributes and errors in same format as
+        :py:meth:`~cellmaps_ppidownloader.gene.NdexGeneNodeAttributeGenerator.get_gene_node_attributes`
+
+        Only node names, node attributes and the edgelist itself
+        are kept in memory.
+
+        :return: (edgelist, baitlist, gene node attributes, errors)
+        :rtype: tuple
+        """
+        node_names = {}
+        node_represents = {}
+        node_attrs = {}
+        node_ids = []
+        edgelist = EdgeTable(columns=['GeneID1', 'Symbol1', 'GeneID2', 'Symbol2'])
+        edge_index = {}
+        pending_edge_attrs = {}
+        node_aliases = {}
+        edge_aliases = {}
+        node_defaults = {}
+        edge_defaults = {}
+
+        for aspect, element in self.iter_aspect_elements(CXStreamReader.APMS_ASPECTS):
+            if aspect == CXStreamReader.NODES:
+                if 'id' in element:
+                    # CX2
+                    node_id = element['id']
+                    values = CXStreamReader._get_cx2_values(element, node_aliases,
+                                                            node_defaults)
+                    node_names[node_id] = values.pop('name', None)
+                    node_represents[node_id] = values.pop('represents', None)
+                    node_attrs.setdefault(node_id, {}).update(values)
+                else:
+                    node_id = element['@id']
+                    node_names[node_id] = element.get('n')
+                    node_represents[node_id] = element.get('r')
+                node_ids.append(node_id)
+            elif aspect == CXStreamReader.EDGES:
+                # symbols are set once all nodes have been
+                # read since nodes may appear after edges
+                edge_dict = {'GeneID1': str(element.get('s')),
+                             'GeneID2': str(element.get('t'))}
+                if 'id' in element:
+                    edge_id = element['id']
+                    values = CXStreamReader._get_cx2_values(element, edge_aliases,
+                                                            edge_defaults)
+                    values.pop('name', None)
+                    edge_dict.update(values)
+                else:
+                    edge_id = element.get('@id')
+                edge_dict.update(pending_edge_attrs.pop(edge_id, {}))
+                edge_index[edge_id] = len(edgelist)
+                edgelist.append(edge_dict)
+            elif aspect == CXStreamReader.NODE_ATTRIBUTES:
+                node_attrs.setdefault(element['po'], {})[element['n']] = element['v']
+            elif aspect == CXStreamReader.EDGE_ATTRIBUTES:
+                if element['n'] == 'name':
+                    continue
+                if element['po'] in edge_index:
+                    edgelist.set_value(edge_index[element['po']], element['n'], element['v'])
+                else:
+                    pending_edge_attrs.setdefault(element['po'], {})[element['n']] = element['v']
+            elif aspect == CXStreamReader.ATTRIBUTE_DECLARATIONS:
+                node_aliases, edge_aliases, node_defaults, edge_defaults = \
+                    CXStreamReader._get_attribute_aliases(element)
+
+        del edge_index
+        bait_ids = [str(node_id) for node_id in node_ids
+                    if str(node_attrs.get(node_id, {}).get('bait', '')).lower() == 'true']
+
+        names_by_gene_id = {str(node_id): name for node_id, name in node_names.items()}
+        for index, (source, target) in enumerate(zip(edgelist.get_column('GeneID1'),
+                                                     edgelist.get_column('GeneID2'))):
+            edgelist.set_value(index, 'Symbol1', names_by_gene_id.get(source))
+            edgelist.set_value(index, 'Symbol2', names_by_gene_id.get(target))
+        interactor_counts = AdjacencyIndex.from_edgelist(edgelist).get_interactor_counts(bait_ids)
+
+        baitlist = []
+        gene_node_attrs = {}
+        errors = []
+        for node_id in node_ids:
+            attrs = node_attrs.get(node_id, {})
+            gene_id = str(node_id)
+            if gene_id in interactor_counts:
+                baitlist.append({'GeneSymbol': node_names[node_id],
+                                 'GeneID': gene_id,
+                                 'NumInteractors': interactor_counts[gene_id]})
+            if node_names[node_id] is None:
+                errors.append(f"Node {node_id} has no 'name'")
+                continue
+            gene_node_attrs[gene_id] = {'name': node_names[node_id],
+                                        'represents': node_represents[node_id],
+                                        'ambiguous': attrs.get('ambiguous', None),
+                                        'bait': CXStreamReader._get_bait_flag(attrs.get('bait', None))}
+        return edgelist, baitlist, gene_node_attrs, errors
@@ -0,0 +1,496 @@
+import io
+import os
+import csv
+import mmap
+import logging
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+
+from cellmaps_ppidownloader.exceptions import CellMapsPPIDownloaderError
+from cellmaps_ppidownloader import fileutils
+
+logger = logging.getLogger(__name__)
+
+
+class Vocabulary(object):
+    """
+    Interns values, usually gene ids and symbols, assigning each
+    unique value a dense integer code starting at ``0``
+    """
+
+    def __init__(self):
+        """
+        Constructor
+        """
+        self._values = []
+        self._codes = {}
+
+    def intern(self, value):
+        """
+        Gets code for **value** adding it to the vocabulary
+        if not already present. Values that can not be hashed
+        are stored without deduplication
+
+        :param value: value to intern
+        :return: code for value
+        :rtype: int
+        """
+        try:
+            code = self._codes.get(value)
+        except TypeError:
+            self._values.append(value)
+            return len(self._values) - 1
+        if code is None:
+            code = len(self._values)
+            self._codes[value] = code
+            self._values.append(value)
+        return code
+
+    def intern_many(self, values):
+        """
+        Interns each of **values**, which must all be hashable, in a
+        single tight loop
+
+        :param values: values to intern
+        :type values: iterable
+        :raises TypeError: If a value can not be hashed
+        :return: code for each value
+        :rtype: :py:class:`array.array`
+        """
+        codes = self._codes
+        known = self._values
+        num_known = len(known)
+        res = []
+        for value in values:
+            code = codes.setdefault(value, num_known)
+            if code == num_known:
+                known.append(value)
+                num_known += 1
+            res.append(code)
+        return array('i', res)
+
+    def get_code(self, value):
+        """
+        Gets code for **value** without adding it
+
+        :return: code or ``None`` if **value** is not in vocabulary
+        :rtype: int
+        """
+        try:
+            return self._codes.get(value)
+        except TypeError:
+            return None
+
+    def get_value(self, code):
+        """
+        Gets value for **code**
+        """
+        return self._values[code]
+
+    def get_values(self):
+        """
+        Gets all values indexed by code. Caller should not modify
+        the returned list
+
+        :rtype: list
+        """
+        return self._values
+
+    def __len__(self):
+        return len(self._values)
+
+
+class EdgeTable(object):
+    """
+    Compact columnar edgelist. Each column is stored as an
+    :py:class:`array.array` of integer codes into a shared
+    :py:class:`Vocabulary` so a gene id or symbol repeated on many
+    edges is stored once.
+
+    For backwards compatibility the table behaves like the list of
+    dicts returned by earlier versions: it supports :py:func:`len`,
+    indexing and iteration which return a new dict per row with the
+    keys that were set for that row.
+    """
+
+    MISSING = -1
+    """
+    Code for a column not set in a row
+    """
+
+    def __init__(self, columns=None, vocabulary=None):
+        """
+        Constructor
+
+        :param columns: names of columns
+        :type columns: list
+        :param vocabulary: vocabulary to intern values into, if ``None``
+                           a new one is created
+        :type vocabulary: :py:class:`Vocabulary`
+        """
+        if vocabulary is None:
+            vocabulary = Vocabulary()
+        self._vocabulary = vocabulary
+        self._columns = []
+        self._codes = {}
+        self._num_rows = 0
+        if columns is not None:
+            for colname in columns:
+                self._add_column(colname)
+
+    @staticmethod
+    def from_rows(rows, columns=None):
+        """
+        Creates table from iterable of dicts
+
+        :param rows: rows as dicts
+        :type rows: iterable
+        :param columns: initial column order. Keys not in this list are
+                        added as new columns when first seen
+        :type columns: list
+        :rtype: :py:class:`EdgeTable`
+        """
+        table = EdgeTable(columns=columns)
+        for row in rows:
+            table.append(row)
+        return table
+
+    @staticmethod
+    def from_columns(columns):
+        """
+        Creates table from dict of column name => list of values.
+        All lists must be the same length
+
+        :param columns: column name => list of values
+        :type columns: dict
+        :raises CellMapsPPIDownloaderError: If columns differ in length
+        :rtype: :py:class:`EdgeTable`
+        """
+        table = EdgeTable()
+        num_rows = None
+        for colname, values in columns.items():
+            values = list(values)
+            if num_rows is None:
+                num_rows = len(values)
+            elif num_rows != len(values):
+                raise CellMapsPPIDownloaderError('Column ' + str(colname) +
+                                                 ' has ' + str(len(values)) +
+                                                 ' values, expected ' + str(num_rows))
+            table._columns.append(colname)
+            try:
+                table._codes[colname] = table._vocabulary.intern_many(values)
+            except TypeError:
+                table._codes[colname] = array('i', [table._vocabulary.intern(v) for v in values])
+        if num_rows is not None:
+            table._num_rows = num_rows
+        return table
+
+    def _add_column(self, colname):
+        """
+        Adds column with all existing rows set to :py:const:`MISSING`
+        """
+        self._columns.append(colname)
+        self._codes[colname] = array('i', [EdgeTable.MISSING]) * self._num_rows
+
+    def get_columns(self):
+        """
+        Gets column names
+
+        :rtype: list
+        """
+        return list(self._columns)
+
+    def get_vocabulary(self):
+        """
+        Gets vocabulary values in this table are interned in
+
+        :rtype: :py:class:`Vocabulary`
+        """
+        return self._vocabulary
+
+    def get_codes(self, colname):
+        """
+        Gets integer codes for column **colname**. Caller
+        should not modify the returned array
+
+        :rtype: :py:class:`array.array`
+        """
+        return self._codes[colname]
+
+    def get_column(self, colname):
+        """
+        Gets values of column **colname** with ``None`` for rows
+        where the column is not set
+
+        :rtype: list
+        """
+        values = self._vocabulary.get_values()
+        return [None if c == EdgeTable.MISSING else values[c]
+                for c in self._codes[colname]]
+
+    def append(self, row):
+        """
+        Appends **row** adding columns for keys not yet in table
+
+        :param row: column name => value
+        :type row: dict
+        """
+        for colname in row:
+            if colname not in self._codes:
+                self._add_column(colname)
+        for colname in self._columns:
+            if colname in row:
+                self._codes[colname].append(self._vocabulary.intern(row[colname]))
+            else:
+                self._codes[colname].append(EdgeTable.MISSING)
+        self._num_rows += 1
+
+    def append_values(self, values):
+        """
+        Appends row given as values in column order
+
+        :param values: one value per column
+        :type values: list or tuple
+        """
+        for colname, value in zip(self._columns, values):
+            self._codes[colname].append(self._vocabulary.intern(value))
+        self._num_rows += 1
+
+    def set_value(self, index, colname, value):
+        """
+        Sets value of column **colname** in row **index**, adding
+        the column if needed
+        """
+        if colname not in self._codes:
+            self._add_column(colname)
+        self._codes[colname][index] = self._vocabulary.intern(value)
+
+    def __len__(self):
+        return self._num_rows
+
+    def __getitem__(self, index):
+        if not isinstance(index, int):
+            raise TypeError('EdgeTable indices must be integers')
+        if index < 0:
+            index += self._num_rows
+        if index < 0 or index >= self._num_rows:
+            raise IndexError('EdgeTable index out of range')
+        values = self._vocabulary.get_values()
+        row = {}
+        for colname in self._columns:
+            code = self._codes[colname][index]
+            if code != EdgeTable.MISSING:
+                row[colname] = values[code]
+        return row
+
+    def __iter__(self):
+        for index in range(self._num_rows):
+            yield self[index]
+
+    def __eq__(self, other):
+        if isinstance(other, (EdgeTable, list)):
+            return len(self) == len(other) and list(self) == list(other)
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        return 'EdgeTable(columns=' + str(self._columns) + ', rows=' + \
+               str(self._num_rows) + ')'
+
+
+class TSVEdgeReader(object):
+    """
+    Edgelist backed by a TSV file that is read again each time it is
+    iterated so edges never have to be held in memory. Rows are
+    returned as dicts in the same format as :py:class:`EdgeTable`.
+    gzip and zstd compressed files are decompressed as they are read
+    """
+
+    def __init__(self, tsvfile=None, columns=None):
+        """
+        Constructor
+
+        :param tsvfile: Path to TSV file with header
+        :type tsvfile: str
+        :param columns: name of column in returned rows => name of column
+                        in **tsvfile**
+        :type columns: dict
+        """
+        if tsvfile is None:
+            raise CellMapsPPIDownloaderError('tsvfile is None')
+        self._tsvfile = tsvfile
+        self._columns = columns
+
+    def get_tsvfile(self):
+        """
+        Gets path to TSV file
+
+        :rtype: str
+        """
+        return self._tsvfile
+
+    def __iter__(self):
+        with fileutils.open_input(self._tsvfile) as f:
+            reader = csv.DictReader(f, delimiter='\t')
+            for row in reader:
+                yield {colname: row[filecol] for colname, filecol in self._columns.items()}
+
+
+def _parse_tsv_chunk(tsvfile, start, end, colindexes):
+    """
+    Parses rows of **tsvfile** between byte offsets **start** and
+    **end**, which must fall on line boundaries. Run in a worker
+    process by :py:class:`ParallelTSVEdgeReader`
+
+    :param colindexes: index in row of each column to keep
+    :type colindexes: list
+    :return: (values, codes) where values are the unique values seen
+             in this chunk and codes holds an :py:class:`array.array`
+             of indexes into values per column
+    :rtype: tuple
+    """
+    with open(tsvfile, 'rb') as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            text = mm[start:end].decode('utf-8')
+    values = []
+    known = {}
+    codes = [array('i') for _ in colindexes]
+    for row in csv.reader(io.StringIO(text, newline=''), delimiter='\t'):
+        if not row:
+            # blank lines are skipped as done by csv.DictReader
+            continue
+        num_fields = len(row)
+        for colcodes, index in zip(codes, colindexes):
+            value = row[index] if index < num_fields else None
+            code = known.setdefault(value, len(values))
+            if code == len(values):
+                values.append(value)
+            colcodes.append(code)
+    return values, codes
+
+
+class ParallelTSVEdgeReader(object):
+    """
+    Loads a TSV file with header into an :py:class:`EdgeTable` by
+    memory mapping the file, splitting it on line boundaries into
+    chunks and parsing the chunks in a process pool. Chunks are
+    merged in file order so the result matches a serial read.
+
+    Fields containing newlines within quotes and compressed
+    files, which cannot be memory mapped, are not supported.
+    """
+
+    DEFAULT_CHUNK_SIZE = 16 * 1024 * 1024
+    """
+    Default size of chunks in bytes
+    """
+
+    def __init__(self, tsvfile=None, columns=None, workers=None,
+                 chunk_size=DEFAULT_CHUNK_SIZE):
+        """
+        Constructor
+
+        :param tsvfile: Path to TSV file with header
+        :type tsvfile: str
+        :param columns: name of column in returned table => name of column
+                        in **tsvfile**
+        :type columns: dict
+        :param workers: number of processes used to parse chunks.
+                        If ``None`` number of CPUs is used. If ``1``
+                        chunks are parsed in this process
+        :type workers: int
+        :param chunk_size: approximate size of each chunk in bytes
+        :type chunk_size: int
+        """
+        if tsvfile is None:
+            raise CellMapsPPIDownloaderError('tsvfile is None')
+        self._tsvfile = tsvfile
+        self._columns = columns
+        self._workers = workers if workers is not None else os.cpu_count()
+        self._chunk_size = max(1, chunk_size)
+
+    def _get_chunks(self, mm):
+        """
+        Splits memory mapped file **mm** after the header line
+        into byte ranges ending on line boundaries
+
+        :return: (header line, list of (start, end) tuples)
+        :rtype: tuple
+        """
+        size = len(mm)
+        header_end = mm.find(b'\n')
+        header_end = size if header_end == -1 else header_end + 1
+        chunks = []
+        start = header_end
+        while start < size:
+            end = min(start + self._chunk_size, size)
+            if end < size:
+                newline = mm.find(b'\n', end - 1)
+                end = size if newline == -1 else newline + 1
+            chunks.append((start, end))
+            start = end
+        return mm[:header_end].decode('utf-8'), chunks
+
+    def _get_column_indexes(self, header):
+        """
+        Gets index of each column in **header** line
+
+        :raises CellMapsPPIDownloaderError: If a column is not in header
+        :rtype: list
+        """
+        header_cols = next(csv.reader([header.rstrip('\r\n')], delimiter='\t'), [])
+        colindexes = []
+        for filecol in self._columns.values():
+            if filecol not in header_cols:
+                raise CellMapsPPIDownloaderError('Column ' + str(filecol) +
+                                                 ' not found in ' +
+                                                 str(self._tsvfile))
+            colindexes.append(header_cols.index(filecol))
+        return colindexes
+
+    def read(self):
+        """
+        Reads the TSV file
+
+        :raises CellMapsPPIDownloaderError: If a column is not in header
+        :return: edges in file order
+        :rtype: :py:class:`EdgeTable`
+        """
+        table = EdgeTable(columns=list(self._columns.keys()))
+        if os.path.getsize(self._tsvfile) == 0:
+            return table
+        with open(self._tsvfile, 'rb') as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                header, chunks = self._get_chunks(mm)
+        colindexes = self._get_column_indexes(header)
+        logger.debug('Parsing ' + str(self._tsvfile) + ' in ' +
+                     str(len(chunks)) + ' chunks')
+
+        num_workers = max(1, min(self._workers, len(chunks)))
+        args = [[self._tsvfile] * len(chunks),
+                [c[0] for c in chunks],
+                [c[1] for c in chunks],
+                [colindexes] * len(chunks)]
+        if num_workers == 1:
+            results = map(_parse_tsv_chunk, *args)
+            self._merge_chunks(table, results)
+        else:
+            with ProcessPoolExecutor(max_workers=num_workers) as executor:
+                self._merge_chunks(table, executor.map(_parse_tsv_chunk, *args))
+        return table
+
+    @staticmethod
+    def _merge_chunks(table, results):
+        """
+        Appends parsed chunks in **results** to **table** remapping
+        chunk local codes into the vocabulary of **table**
+        """
+        vocabulary = table.get_vocabulary()
+        for values, codes in results:
+            mapping = vocabulary.intern_many(values)
+            num_rows = 0
+            for colname, colcodes in zip(table.get_columns(), codes):
+                table.get_codes(colname).extend([mapping[c] for c in colcodes])
+                num_rows = len(colcodes)
+            table._num_rows += num_rows
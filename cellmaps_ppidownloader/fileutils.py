@@ -0,0 +1,575 @@
+import io
+import os
+import gzip
+import shutil
+import hashlib
+import queue
+import logging
+import threading
+import subprocess
+
+from cellmaps_ppidownloader.exceptions import CellMapsPPIDownloaderError
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 8 * 1024 * 1024
+"""
+Size in bytes of chunks read when copying or checksumming files
+"""
+
+FICLONE = 0x40049409
+"""
+Linux ioctl request that makes a file share the data blocks of
+another (reflink) on filesystems that support it, such as
+Btrfs and XFS
+"""
+
+COPY_MODE = 'copy'
+LINK_MODE = 'link'
+SYMLINK_MODE = 'symlink'
+
+COPY_MODES = [COPY_MODE, LINK_MODE, SYMLINK_MODE]
+"""
+Modes accepted by :py:func:`link_or_copy_file`
+"""
+
+
+def sha256_file(path, chunk_size=CHUNK_SIZE):
+    """
+    Computes SHA-256 checksum of **path** reading it
+    in chunks of **chunk_size** bytes
+
+    :return: hex digest
+    :rtype: str
+    """
+    sha = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+def copy_file(source, dest, chunk_size=CHUNK_SIZE):
+    """
+    Copies **source** to **dest** in chunks of **chunk_size**
+    bytes computing SHA-256 checksum in the same pass
+
+    :return: hex digest of SHA-256 checksum
+    :rtype: str
+    """
+    sha = hashlib.sha256()
+    with open(source, 'rb') as in_f:
+        with open(dest, 'wb') as out_f:
+            for chunk in iter(lambda: in_f.read(chunk_size), b''):
+                sha.update(chunk)
+                out_f.write(chunk)
+    return sha.hexdigest()
+
+
+def reflink_file(source, dest):
+    """
+    Creates **dest** sharing data blocks of **source** via the
+    Linux ``FICLONE`` ioctl. **dest** is removed if this fails
+
+    :raises OSError: If platform or filesystem does not support reflinks
+    """
+    try:
+        import fcntl
+    except ImportError:
+        raise OSError('reflinks not supported on this platform')
+    with open(source, 'rb') as in_f:
+        with open(dest, 'wb') as out_f:
+            try:
+                fcntl.ioctl(out_f.fileno(), FICLONE, in_f.fileno())
+                return
+            except OSError:
+                pass
+    os.remove(dest)
+    raise OSError('reflink of ' + str(source) + ' not supported')
+
+
+def link_or_copy_file(source, dest, mode=LINK_MODE, checksum=True):
+    """
+    Puts **source** at **dest** without rewriting its contents
+    when possible and computes its SHA-256 checksum, reading
+    **source** only once
+
+    For ``link`` mode a hardlink is tried, then a reflink, then
+    a chunked copy. For ``symlink`` mode a symbolic link is tried
+    and then a chunked copy. ``copy`` mode always does a chunked copy.
+
+    .. note::
+
+        A hardlinked **dest** shares its contents with **source**
+        so changes to one are seen in the other
+
+    :param source: path to existing file
+    :type source: str
+    :param dest: path to create, must not exist
+    :type dest: str
+    :param mode: One of :py:const:`COPY_MODES`
+    :type mode: str
+    :param checksum: If ``False`` skip computing checksum of a
+                     linked **source** so it is not read at all
+    :type checksum: bool
+    :raises CellMapsPPIDownloaderError: If **mode** is unknown
+    :return: (method used which is one of ``hardlink``, ``reflink``,
+              ``symlink`` or ``copy``, hex digest of SHA-256 checksum
+              or ``None`` if **checksum** is ``False`` and a link was made)
+    :rtype: tuple
+    """
+    if mode not in COPY_MODES:
+        raise CellMapsPPIDownloaderError('Unknown copy mode: ' + str(mode) +
+                                         ' must be one of ' + ', '.join(COPY_MODES))
+    source = os.path.abspath(source)
+    attempts = []
+    if mode == LINK_MODE:
+        attempts = [('hardlink', os.link), ('reflink', reflink_file)]
+    elif mode == SYMLINK_MODE:
+        attempts = [('symlink', os.symlink)]
+
+    for method, link_func in attempts:
+        try:
+            link_func(source, dest)
+            logger.debug('Created ' + method + ' ' + dest + ' to ' + source)
+            if not checksum:
+                return method, None
+            return method, sha256_file(source)
+        except OSError as e:
+            logger.debug(method + ' of ' + source + ' failed: ' + str(e))
+
+    return COPY_MODE, copy_file(source, dest)
+
+
+GZIP = 'gzip'
+ZSTD = 'zstd'
+
+COMPRESSIONS = [GZIP, ZSTD]
+
+MAGIC_BYTES = {GZIP: b'\x1f\x8b',
+               ZSTD: b'\x28\xb5\x2f\xfd'}
+"""
+Leading bytes identifying each compression format
+"""
+
+SUFFIXES = {GZIP: '.gz',
+            ZSTD: '.zst'}
+"""
+File name suffix of each compression format
+"""
+
+DECOMPRESS_COMMANDS = {GZIP: ['pigz', '-dc'],
+                       ZSTD: ['zstd', '-dcq']}
+"""
+External commands used, when found on the path, to decompress
+each format in a separate process running concurrently with
+parsing of the decompressed data
+"""
+
+COMPRESS_COMMANDS = {GZIP: ['pigz', '-c'],
+                     ZSTD: ['zstd', '-cq', '-T0']}
+"""
+External commands used, when found on the path, to compress
+each format in a separate multithreaded process fed data as
+it is written
+"""
+
+READ_BUFFER_SIZE = 1024 * 1024
+"""
+Size in bytes of buffer used when reading decompressed data
+"""
+
+WRITE_BUFFER_SIZE = 1024 * 1024
+"""
+Size in bytes of chunks handed off to be compressed
+"""
+
+MAX_QUEUED_CHUNKS = 4
+"""
+Max number of chunks waiting on a background compression thread
+before writes block
+"""
+
+
+def get_compression(path):
+    """
+    Detects compression of **path** from its leading magic bytes
+
+    :return: :py:const:`GZIP`, :py:const:`ZSTD` or ``None`` if
+             not compressed in a known format
+    :rtype: str
+    """
+    with open(path, 'rb') as f:
+        header = f.read(4)
+    for compression, magic in MAGIC_BYTES.items():
+        if header.startswith(magic):
+            return compression
+    return None
+
+
+class _ProcessOutput(io.RawIOBase):
+    """
+    Readable stream of the standard output of a command
+    """
+
+    def __init__(self, cmd):
+        """
+        Constructor
+
+        :param cmd: command to run
+        :type cmd: list
+        """
+        super().__init__()
+        self._cmd = cmd
+        self._proc = subprocess.Popen(cmd, stdout=subprocess.PIPE,
+                                      stderr=subprocess.PIPE)
+        self._eof = False
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        num_read = self._proc.stdout.readinto(b)
+        if num_read == 0:
+            self._eof = True
+        return num_read
+
+    def close(self):
+        """
+        Closes stream and waits for command to exit. If the
+        stream was not read to the end the command is terminated
+
+        :raises CellMapsPPIDownloaderError: If command read to the
+                                            end exited with an error
+        """
+        if self.closed:
+            return
+        super().close()
+        if not self._eof:
+            self._proc.terminate()
+        self._proc.stdout.close()
+        err = self._proc.stderr.read()
+        self._proc.stderr.close()
+        exitcode = self._proc.wait()
+        if self._eof and exitcode != 0:
+            raise CellMapsPPIDownloaderError(' '.join(self._cmd) + ' failed with exit code ' +
+                                             str(exitcode) + ': ' +
+                                             err.decode('utf-8', errors='replace').strip())
+
+
+def _open_decompressed(path, compression):
+    """
+    Opens **path** compressed in format **compression** for
+    reading decompressed bytes. Uses the external command in
+    :py:const:`DECOMPRESS_COMMANDS` if found on the path. Otherwise
+    gzip is read with `python-isal <https://pypi.org/project/isal/>`__
+    threaded reader, if installed, or :py:mod:`gzip` and zstd with
+    `zstandard <https://pypi.org/project/zstandard/>`__
+
+    :raises CellMapsPPIDownloaderError: If zstd input is given and neither
+                                        zstd command or zstandard package
+                                        is available
+    :return: binary file object
+    """
+    cmd = DECOMPRESS_COMMANDS[compression]
+    if shutil.which(cmd[0]) is not None:
+        logger.debug('Decompressing ' + path + ' with ' + cmd[0])
+        return io.BufferedReader(_ProcessOutput(cmd + [path]),
+                                 buffer_size=READ_BUFFER_SIZE)
+    if compression == GZIP:
+        try:
+            from isal import igzip_threaded
+            return igzip_threaded.open(path, 'rb')
+        except ImportError:
+            return gzip.open(path, 'rb')
+    try:
+        import zstandard
+    except ImportError:
+        raise CellMapsPPIDownloaderError(path + ' is zstd compressed, but neither '
+                                         'the zstd command or zstandard package '
+                                         'is available')
+    return io.BufferedReader(zstandard.ZstdDecompressor().stream_reader(open(path, 'rb'),
+                                                                        read_across_frames=True,
+                                                                        closefd=True),
+                             buffer_size=READ_BUFFER_SIZE)
+
+
+def open_input(path, mode='r', newline=None, encoding=None):
+    """
+    Opens **path** for reading, transparently decompressing gzip
+    and zstd files detected by :py:func:`get_compression`, as they
+    are read so the decompressed data is never written to disk
+
+    :param path: path to file
+    :type path: str
+    :param mode: ``r`` for text or ``rb`` for bytes
+    :type mode: str
+    :param newline: passed to :py:func:`open` in text mode
+    :type newline: str
+    :param encoding: passed to :py:func:`open` in text mode
+    :type encoding: str
+    :return: file object
+    """
+    compression = get_compression(path)
+    binary = 'b' in mode
+    if compression is None:
+        if binary:
+            return open(path, 'rb')
+        return open(path, 'r', newline=newline, encoding=encoding)
+    raw = _open_decompressed(path, compression)
+    if binary:
+        return raw
+    return io.TextIOWrapper(raw, encoding=encoding, newline=newline)
+
+
+def get_compressed_file(path, compression=None):
+    """
+    Gets name of **path** once compressed in format **compression**
+
+    :param path: path to file
+    :type path: str
+    :param compression: One of :py:const:`COMPRESSIONS` or ``None``
+    :type compression: str
+    :return: **path** with suffix from :py:const:`SUFFIXES` appended
+             or **path** if **compression** is ``None``
+    :rtype: str
+    """
+    if compression is None:
+        return path
+    if compression not in COMPRESSIONS:
+        raise CellMapsPPIDownloaderError('Unknown compression: ' + str(compression) +
+                                         ' must be one of ' + ', '.join(COMPRESSIONS))
+    return path + SUFFIXES[compression]
+
+
+def strip_compression_suffix(path):
+    """
+    Removes any suffix in :py:const:`SUFFIXES` from **path**
+
+    :rtype: str
+    """
+    for suffix in SUFFIXES.values():
+        if path.endswith(suffix):
+            return path[:-len(suffix)]
+    return path
+
+
+class _ProcessInput(io.RawIOBase):
+    """
+    Writable stream feeding the standard input of a command
+    whose standard output is written to a file
+    """
+
+    def __init__(self, cmd, path):
+        """
+        Constructor
+
+        :param cmd: command to run
+        :type cmd: list
+        :param path: file command output is written to
+        :type path: str
+        """
+        super().__init__()
+        self._cmd = cmd
+        with open(path, 'wb') as out_f:
+            self._proc = subprocess.Popen(cmd, stdin=subprocess.PIPE,
+                                          stdout=out_f,
+                                          stderr=subprocess.PIPE)
+
+    def writable(self):
+        return True
+
+    def write(self, b):
+        self._proc.stdin.write(b)
+        return len(b)
+
+    def close(self):
+        """
+        Closes stream and waits for command to exit
+
+        :raises CellMapsPPIDownloaderError: If command exited with an error
+        """
+        if self.closed:
+            return
+        super().close()
+        try:
+            self._proc.stdin.close()
+        except BrokenPipeError:
+            pass
+        err = self._proc.stderr.read()
+        self._proc.stderr.close()
+        exitcode = self._proc.wait()
+        if exitcode != 0:
+            raise CellMapsPPIDownloaderError(' '.join(self._cmd) + ' failed with exit code ' +
+                                             str(exitcode) + ': ' +
+                                             err.decode('utf-8', errors='replace').strip())
+
+
+class _BackgroundWriter(io.RawIOBase):
+    """
+    Writable stream that hands each chunk written to a thread which
+    writes it to a compressing file object, so compression overlaps
+    with producing the data. :py:mod:`zlib` and
+    `zstandard <https://pypi.org/project/zstandard/>`__ release the
+    GIL while compressing
+    """
+
+    def __init__(self, fileobj):
+        """
+        Constructor
+
+        :param fileobj: binary file object that compresses what is
+                        written to it, closed when this stream is closed
+        """
+        super().__init__()
+        self._fileobj = fileobj
+        self._queue = queue.Queue(maxsize=MAX_QUEUED_CHUNKS)
+        self._error = None
+        self._thread = threading.Thread(target=self._write_chunks, daemon=True)
+        self._thread.start()
+
+    def _write_chunks(self):
+        """
+        Writes chunks from queue to file object until ``None`` is
+        received, keeping the first error raised
+        """
+        while True:
+            chunk = self._queue.get()
+            if chunk is None:
+                return
+            if self._error is not None:
+                continue
+            try:
+                self._fileobj.write(chunk)
+            except Exception as e:
+                self._error = e
+
+    def _raise_error(self):
+        if self._error is not None:
+            raise CellMapsPPIDownloaderError('Error compressing output: ' +
+                                             str(self._error)) from self._error
+
+    def writable(self):
+        return True
+
+    def write(self, b):
+        self._raise_error()
+        self._queue.put(bytes(b))
+        return len(b)
+
+    def close(self):
+        """
+        Waits for queued chunks to be compressed and closes file object
+
+        :raises CellMapsPPIDownloaderError: If compression failed
+        """
+        if self.closed:
+            return
+        super().close()
+        self._queue.put(None)
+        self._thread.join()
+        self._fileobj.close()
+        self._raise_error()
+
+
+def _open_compressed(path, compression, buffer_size=WRITE_BUFFER_SIZE):
+    """
+    Opens **path** for writing bytes that are compressed in format
+    **compression**. Uses the external command in
+    :py:const:`COMPRESS_COMMANDS` if found on the path. Otherwise
+    compresses in a background thread with
+    `python-isal <https://pypi.org/project/isal/>`__, if installed,
+    or :py:mod:`gzip` for gzip and with
+    `zstandard <https://pypi.org/project/zstandard/>`__ for zstd
+
+    :raises CellMapsPPIDownloaderError: If zstd is requested and neither
+                                        zstd command or zstandard package
+                                        is available
+    :return: binary file object
+    """
+    cmd = COMPRESS_COMMANDS[compression]
+    if shutil.which(cmd[0]) is not None:
+        logger.debug('Compressing ' + path + ' with ' + cmd[0])
+        return io.BufferedWriter(_ProcessInput(cmd, path),
+                                 buffer_size=buffer_size)
+    if compression == GZIP:
+        try:
+            from isal import igzip_threaded
+            # already compresses in background threads
+            return igzip_threaded.open(path, 'wb')
+        except ImportError:
+            fileobj = gzip.open(path, 'wb')
+    else:
+        try:
+            import zstandard
+        except ImportError:
+            raise CellMapsPPIDownloaderError('Unable to write ' + path + ' zstd '
+                                             'compressed, neither the zstd command '
+                                             'or zstandard package is available')
+        fileobj = zstandard.ZstdCompressor(threads=-1).stream_writer(open(path, 'wb'),
+                                                                     closefd=True)
+    return io.BufferedWriter(_BackgroundWriter(fileobj),
+                             buffer_size=buffer_size)
+
+
+def open_output(path, compression=None, mode='w', newline=None,
+                encoding=None, buffer_size=WRITE_BUFFER_SIZE):
+    """
+    Opens **path** for writing, compressing data in format
+    **compression** as it is written
+
+    :param path: path to file, which is used as is so it should
+                 already end with suffix from :py:func:`get_compressed_file`
+    :type path: str
+    :param compression: One of :py:const:`COMPRESSIONS` or ``None``
+                        to write uncompressed
+    :type compression: str
+    :param mode: ``w`` for text or ``wb`` for bytes
+    :type mode: str
+    :param newline: passed to :py:func:`open` in text mode
+    :type newline: str
+    :param encoding: passed to :py:func:`open` in text mode
+    :type encoding: str
+    :param buffer_size: size in bytes of write buffer and so of the
+                        chunks handed off to be compressed
+    :type buffer_size: int
+    :raises CellMapsPPIDownloaderError: If **compression** is unknown
+    :return: file object
+    """
+    binary = 'b' in mode
+    if compression is None:
+        if binary:
+            return open(path, 'wb', buffering=buffer_size)
+        return open(path, 'w', newline=newline, encoding=encoding,
+                    buffering=buffer_size)
+    if compression not in COMPRESSIONS:
+        raise CellMapsPPIDownloaderError('Unknown compression: ' + str(compression) +
+                                         ' must be one of ' + ', '.join(COMPRESSIONS))
+    raw = _open_compressed(path, compression, buffer_size=buffer_size)
+    if binary:
+        return raw
+    return io.TextIOWrapper(raw, encoding=encoding, newline=newline)
+
+
+def compress_file(source, dest, compression, chunk_size=CHUNK_SIZE):
+    """
+    Writes **source** compressed in format **compression** to
+    **dest** computing SHA-256 checksum of **source** in the same pass
+
+    :param source: path to existing file
+    :type source: str
+    :param dest: path to write
+    :type dest: str
+    :param compression: One of :py:const:`COMPRESSIONS`
+    :type compression: str
+    :return: hex digest of SHA-256 checksum of **source**
+    :rtype: str
+    """
+    sha = hashlib.sha256()
+    with open(source, 'rb') as in_f:
+        with open_output(dest, compression=compression, mode='wb') as out_f:
+            for chunk in iter(lambda: in_f.read(chunk_size), b''):
+                sha.update(chunk)
+                out_f.write(chunk)
+    return sha.hexdigest()
+
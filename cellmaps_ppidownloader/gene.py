@@ -1,29 +1,113 @@
 import re
 import csv
+import time
 import logging
-import mygene
-from tqdm import tqdm
-
-import ndex2
-from ndex2.nice_cx_network import NiceCXNetwork
-import pandas as pd
+import functools
+import threading
+from array import array
+from itertools import chain
+from concurrent.futures import ThreadPoolExecutor
 from collections import defaultdict
 
 from cellmaps_ppidownloader.exceptions import CellMapsPPIDownloaderError
+from cellmaps_ppidownloader import fileutils
+from cellmaps_ppidownloader.ndexloader import NdexNetworkLoader
+from cellmaps_ppidownloader.cx import CXStreamReader
+from cellmaps_ppidownloader.edgetable import EdgeTable, TSVEdgeReader, ParallelTSVEdgeReader, Vocabulary
+from cellmaps_ppidownloader.adjacency import AdjacencyIndex
+from cellmaps_ppidownloader import adjacency
 
 logger = logging.getLogger(__name__)
 
+AMBIGUOUS_GENE_DELIMITER_RE = re.compile(r'\W*,\W*')
+"""
+Splits a gene id cell listing several ambiguous genes
+"""
+
+
+@functools.lru_cache(maxsize=65536)
+def _split_geneids(geneid):
+    """
+    Splits **geneid** on commas with
+    :py:const:`AMBIGUOUS_GENE_DELIMITER_RE`, skipping the regex
+    when there is no comma. Results are cached by raw value since
+    the same ids repeat on many edges
+
+    :return: genes in **geneid**
+    :rtype: tuple
+    """
+    if ',' not in geneid:
+        return (geneid,)
+    return tuple(AMBIGUOUS_GENE_DELIMITER_RE.split(geneid))
+
 
 class GeneQuery(object):
     """
     Gets information about genes from mygene
     """
 
-    def __init__(self, mygeneinfo=mygene.MyGeneInfo()):
+    DEFAULT_BATCH_SIZE = 1000
+    """
+    Default number of genes sent in each MyGene request when batching
+    """
+
+    def __init__(self, mygeneinfo=None,
+                 cache=None,
+                 batch_size=None,
+                 max_workers=1,
+                 retries=0,
+                 retry_wait=1.0):
         """
         Constructor
+
+        :param mygeneinfo: MyGene client, if ``None`` one is created
+                           when first needed
+        :type mygeneinfo: :py:class:`mygene.MyGeneInfo`
+        :param cache: If set, results are looked up in this cache
+                      and only cache misses are sent to MyGene
+        :type cache: :py:class:`~cellmaps_ppidownloader.genecache.GeneQueryCache`
+        :param batch_size: Number of genes to send in each MyGene request.
+                           If ``None`` and **max_workers** is ``1``
+                           all genes are passed in a single call to MyGene
+                           which does its own serial batching
+        :type batch_size: int
+        :param max_workers: Max number of batches to query concurrently
+        :type max_workers: int
+        :param retries: Number of times to retry a failed batch
+        :type retries: int
+        :param retry_wait: Seconds to wait before first retry of a batch,
+                           doubled on each subsequent retry
+        :type retry_wait: float
         """
         self._mg = mygeneinfo
+        self._mg_lock = threading.Lock()
+        self._cache = cache
+        self._batch_size = batch_size
+        self._max_workers = max_workers
+        self._retries = retries
+        self._retry_wait = retry_wait
+
+    def _get_mygeneinfo(self):
+        """
+        Gets MyGene client, importing :py:mod:`mygene` and creating
+        the client on first call so importing this module stays fast
+
+        :rtype: :py:class:`mygene.MyGeneInfo`
+        """
+        with self._mg_lock:
+            if self._mg is None:
+                import mygene
+                self._mg = mygene.MyGeneInfo()
+            return self._mg
+
+    def get_cache(self):
+        """
+        Gets cache passed in via constructor
+
+        :return: cache or ``None``
+        :rtype: :py:class:`~cellmaps_ppidownloader.genecache.GeneQueryCache`
+        """
+        return self._cache
 
     def querymany(self, queries, species=None,
                   scopes=None,
@@ -32,6 +116,10 @@ class GeneQuery(object):
         Simple wrapper that calls MyGene querymany
         returning the results
 
+        If a cache was passed in via the constructor, only
+        queries missing from the cache are sent to MyGene
+        and results are returned in the order of **queries**
+
         :param queries: list of gene ids/symbols to query
         :type queries: list
         :param species:
@@ -43,12 +131,125 @@ class GeneQuery(object):
         :return: dict from MyGene usually in format of
         :rtype: list
         """
-        mygene_out = self._mg.querymany(queries,
-                                        scopes=scopes,
-                                        fields=fields,
-                                        species=species)
+        if self._cache is None:
+            return self._querymany(queries, species=species,
+                                   scopes=scopes, fields=fields)
+
+        cached, missing = self._get_cached(queries, species=species,
+                                           scopes=scopes, fields=fields)
+        mygene_out = []
+        if len(missing) > 0:
+            mygene_out = self._querymany(missing, species=species,
+                                         scopes=scopes, fields=fields)
+        return self._merge_with_cached(queries, cached, mygene_out,
+                                       species=species, scopes=scopes,
+                                       fields=fields)
+
+    def _get_cached(self, queries, species=None,
+                    scopes=None, fields=None):
+        """
+        Looks up **queries** in cache passed in via constructor
+
+        :return: (query => list of cached results, list of queries
+                  missing from cache)
+        :rtype: tuple
+        """
+        cached, missing = self._cache.get_many(queries, species=species,
+                                               scopes=scopes, fields=fields)
+        logger.info('MyGene cache ' + self._cache.get_cachefile() +
+                    ': ' + str(len(cached)) + ' hits, ' +
+                    str(len(missing)) + ' misses')
+        return cached, missing
+
+    def _merge_with_cached(self, queries, cached, mygene_out,
+                           species=None, scopes=None, fields=None):
+        """
+        Stores **mygene_out** in cache passed in via constructor and
+        merges it with **cached** results in the order of **queries**
+
+        :rtype: list
+        """
+        if len(mygene_out) > 0:
+            self._cache.put_many(mygene_out, species=species,
+                                 scopes=scopes, fields=fields)
+            for entry in mygene_out:
+                cached.setdefault(str(entry['query']), []).append(entry)
+
+        res = []
+        for query in queries:
+            res.extend(cached.get(str(query), []))
+        return res
+
+    def _querymany(self, queries, species=None,
+                   scopes=None,
+                   fields=None):
+        """
+        Calls MyGene querymany returning the results. If batching
+        is enabled via constructor, **queries** are split into batches
+        that are queried concurrently and merged back in input order
+
+        :return: list of dicts from MyGene
+        :rtype: list
+        """
+        if self._batch_size is None and (self._max_workers is None or
+                                         self._max_workers <= 1):
+            return self._query_batch(queries, species=species,
+                                     scopes=scopes, fields=fields)
+
+        batch_size = self._batch_size
+        if batch_size is None:
+            batch_size = GeneQuery.DEFAULT_BATCH_SIZE
+        queries = list(queries)
+        batches = [queries[i:i + batch_size]
+                   for i in range(0, len(queries), batch_size)]
+        if len(batches) <= 1 or self._max_workers is None or self._max_workers <= 1:
+            batch_results = [self._query_batch(b, species=species,
+                                               scopes=scopes, fields=fields)
+                             for b in batches]
+        else:
+            with ThreadPoolExecutor(max_workers=min(self._max_workers,
+                                                    len(batches))) as executor:
+                batch_results = list(executor.map(lambda b: self._query_batch(b, species=species,
+                                                                              scopes=scopes,
+                                                                              fields=fields),
+                                                  batches))
+        mygene_out = []
+        for res in batch_results:
+            mygene_out.extend(res)
         return mygene_out
 
+    def _query_batch(self, queries, species=None,
+                     scopes=None,
+                     fields=None):
+        """
+        Calls MyGene querymany on **queries** retrying on failure
+        as set via constructor
+
+        :raises CellMapsPPIDownloaderError: If all attempts fail
+        :return: list of dicts from MyGene
+        :rtype: list
+        """
+        attempt = 0
+        while True:
+            try:
+                return self._get_mygeneinfo().querymany(queries,
+                                                        scopes=scopes,
+                                                        fields=fields,
+                                                        species=species)
+            except Exception as e:
+                if attempt >= self._retries:
+                    if self._retries == 0:
+                        raise
+                    raise CellMapsPPIDownloaderError('MyGene query of ' + str(len(queries)) +
+                                                     ' genes failed after ' + str(attempt + 1) +
+                                                     ' attempts: ' + str(e)) from e
+                wait = self._retry_wait * (2 ** attempt)
+                logger.warning('MyGene query of ' + str(len(queries)) +
+                               ' genes failed (' + str(e) + '). Retrying in ' +
+                               str(wait) + ' seconds')
+                time.sleep(wait)
+                attempt += 1
+
     def get_symbols_for_genes(self, genelist=None,
                               scopes='_id'):
         """
@@ -87,7 +288,87 @@ class GeneNodeAttributeGenerator(object):
         """
         Constructor
         """
-        pass
+        self._known_gene_node_attrs = None
+        self._adjacency_index = None
+
+    def get_adjacency_index(self):
+        """
+        Gets undirected adjacency of edgelist from ``get_apms_edgelist()``
+        of subclass, built on first call
+
+        :rtype: :py:class:`~cellmaps_ppidownloader.adjacency.AdjacencyIndex`
+        """
+        if self._adjacency_index is None:
+            self._adjacency_index = AdjacencyIndex.from_edgelist(self.get_apms_edgelist())
+        return self._adjacency_index
+
+    def get_bait_interactor_counts(self):
+        """
+        Gets number of unique interactors in the edgelist of each
+        bait from ``_get_apms_bait_set()`` of subclass
+
+        :return: bait gene id => number of interactors
+        :rtype: dict
+        """
+        return self.get_adjacency_index().get_interactor_counts(sorted(self._get_apms_bait_set()))
+
+    def check_baitlist_interactor_counts(self, baitlist=None,
+                                         unique_interactors=False):
+        """
+        Compares ``NumInteractors`` of each bait in **baitlist** with the
+        number of interactors of the bait in the edgelist, logging
+        a warning if any differ
+
+        :param baitlist: baits as dicts with ``GeneID`` and
+                         ``NumInteractors``
+        :type baitlist: list
+        :param unique_interactors: If ``False`` count edge rows each bait
+                                   is on, as in BioPlex baitlists, via
+                                   :py:func:`~cellmaps_ppidownloader.adjacency.count_edge_rows`.
+                                   If ``True`` count unique neighbors via
+                                   :py:meth:`get_adjacency_index`
+        :type unique_interactors: bool
+        :return: description of each bait whose count differs
+        :rtype: list
+        """
+        if baitlist is None:
+            return []
+        baitlist = list(baitlist)
+        if unique_interactors:
+            mismatches = self.get_adjacency_index().check_interactor_counts(baitlist)
+        else:
+            counts = adjacency.count_edge_rows(self.get_apms_edgelist(),
+                                               [b['GeneID'] for b in baitlist])
+            mismatches = adjacency.check_interactor_counts(baitlist, counts)
+        for mismatch in mismatches:
+            logger.debug(mismatch)
+        if len(mismatches) > 0:
+            logger.warning(str(len(mismatches)) + ' of ' + str(len(baitlist)) +
+                           ' baits have a number of interactors that differs '
+                           'from the edgelist. First: ' + mismatches[0])
+        return mismatches
+
+    def set_known_gene_node_attributes(self, gene_node_attrs=None):
+        """
+        Sets gene node attributes from a previous run, in same format as
+        returned by :py:meth:`get_gene_node_attributes`. Generators that
+        support it reuse these for genes already seen instead of
+        querying for them again
+
+        :param gene_node_attrs: gene id => gene node attributes
+        :type gene_node_attrs: dict
+        """
+        self._known_gene_node_attrs = gene_node_attrs
+
+    def get_known_gene_node_attributes(self):
+        """
+        Gets gene node attributes set via
+        :py:meth:`set_known_gene_node_attributes`
+
+        :return: gene id => gene node attributes or ``None``
+        :rtype: dict
+        """
+        return self._known_gene_node_attrs
 
     @staticmethod
     def add_geneids_to_set(gene_set=None,
@@ -113,13 +394,13 @@ class GeneNodeAttributeGenerator(object):
         if geneid is None:
             return None
 
-        split_str = re.split('\W*,\W*', geneid)
+        split_str = _split_geneids(geneid)
         gene_set.update(split_str)
         if ambiguous_gene_dict is not None:
             if len(split_str) > 1:
                 for entry in split_str:
                     ambiguous_gene_dict[entry] = geneid
-        return split_str
+        return list(split_str)
 
     def get_gene_node_attributes(self):
         """
@@ -143,7 +424,7 @@ class APMSGeneNodeAttributeGenerator(GeneNodeAttributeGenerator):
     BAITLIST_NUM_INTERACTORS = '# Interactors'
 
     def __init__(self, apms_edgelist=None, apms_baitlist=None,
-                 genequery=GeneQuery()):
+                 genequery=GeneQuery(), check_interactor_counts=False):
         """
         Constructor
 
@@ -167,18 +448,30 @@ class APMSGeneNodeAttributeGenerator(GeneNodeAttributeGenerator):
                                     'NumIteractors': VAL }
         :type apms_baitlist: list
         :param genequery:
+        :param check_interactor_counts: If ``True``
+                                        :py:meth:`get_gene_node_attributes`
+                                        warns about baits whose number of
+                                        interactors in **apms_baitlist**
+                                        differs from the edge rows in
+                                        **apms_edgelist**. Reads a streaming
+                                        edgelist one more time
+        :type check_interactor_counts: bool
         """
         super().__init__()
         self._apms_edgelist = apms_edgelist
         self._apms_baitlist = apms_baitlist
         self._genequery = genequery
+        self._check_interactor_counts = check_interactor_counts
+        self._gene_vocabulary = None
 
     @staticmethod
     def get_apms_edgelist_from_tsvfile(tsvfile=None,
                                        geneid_one_col=GENEID_COL1,
                                        symbol_one_col=SYMBOL_COL1,
                                        geneid_two_col=GENEID_COL2,
-                                       symbol_two_col=SYMBOL_COL2):
+                                       symbol_two_col=SYMBOL_COL2,
+                                       streaming=False,
+                                       workers=1):
         """
         Generates list of dicts by parsing TSV file specified
         by **tsvfile** with the
@@ -188,9 +481,21 @@ class APMSGeneNodeAttributeGenerator(GeneNodeAttributeGenerator):
 
             GeneID1\tSymbol1\tGeneID2\tSymbol2
 
-        :param tsvfile: Path to TSV file with above format
+        :param tsvfile: Path to TSV file with above format, which
+                        can be gzip or zstd compressed
         :type tsvfile: str
-        :return: list of dicts, with each dict of format:
+        :param streaming: If ``True`` return a
+                          :py:class:`~cellmaps_ppidownloader.edgetable.TSVEdgeReader`
+                          that reads **tsvfile** each time it is iterated
+                          instead of loading all edges into memory
+        :type streaming: bool
+        :param workers: If greater than ``1`` **tsvfile** is split into
+                        chunks parsed across this many processes by
+                        :py:class:`~cellmaps_ppidownloader.edgetable.ParallelTSVEdgeReader`.
+                        Ignored if **streaming** is ``True`` or **tsvfile**
+                        is compressed
+        :type workers: int
+        :return: edgelist where each row is a dict of format:
 
                  .. code-block::
 
@@ -198,16 +503,29 @@ class APMSGeneNodeAttributeGenerator(GeneNodeAttributeGenerator):
                        'Symbol1': VAL,
                        'GeneID2': VAL,
                        'Symbol2': VAL}
-        :rtype: list
+        :rtype: :py:class:`~cellmaps_ppidownloader.edgetable.EdgeTable` or
+                :py:class:`~cellmaps_ppidownloader.edgetable.TSVEdgeReader`
         """
-        edgelist = []
-        with open(tsvfile, 'r') as f:
+        columns = {'GeneID1': geneid_one_col,
+                   'Symbol1': symbol_one_col,
+                   'GeneID2': geneid_two_col,
+                   'Symbol2': symbol_two_col}
+        if streaming:
+            return TSVEdgeReader(tsvfile, columns=columns)
+        if workers is not None and workers > 1:
+            if fileutils.get_compression(tsvfile) is None:
+                return ParallelTSVEdgeReader(tsvfile, columns=columns,
+                                             workers=workers).read()
+            logger.info(tsvfile + ' is compressed, parsing in a single process')
+        edgelist = EdgeTable(columns=['GeneID1', 'Symbol1',
+                                      'GeneID2', 'Symbol2'])
+        with fileutils.open_input(tsvfile) as f:
             reader = csv.DictReader(f, delimiter='\t')
             for row in reader:
-                edgelist.append({'GeneID1': row[geneid_one_col],
-                                 'Symbol1': row[symbol_one_col],
-                                 'GeneID2': row[geneid_two_col],
-                                 'Symbol2': row[symbol_two_col]})
+                edgelist.append_values((row[geneid_one_col],
+                                        row[symbol_one_col],
+                                        row[geneid_two_col],
+                                        row[symbol_two_col]))
         return edgelist
 
     @staticmethod
@@ -224,7 +542,8 @@ class APMSGeneNodeAttributeGenerator(GeneNodeAttributeGenerator):
 
             GeneSymbol\tGeneID\t# Interactors
 
-        :param tsvfile: Path to TSV file with above format
+        :param tsvfile: Path to TSV file with above format, which
+                        can be gzip or zstd compressed
         :type tsvfile: str
         :return: list of dicts, with each dict of format:
 
@@ -237,7 +556,7 @@ class APMSGeneNodeAttributeGenerator(GeneNodeAttributeGenerator):
         """
         edgelist = []
         if tsvfile is not None:
-            with open(tsvfile, 'r') as f:
+            with fileutils.open_input(tsvfile) as f:
                 reader = csv.DictReader(f, delimiter='\t')
                 for row in reader:
                     edgelist.append({'GeneSymbol': row[symbol_col],
@@ -262,20 +581,46 @@ class APMSGeneNodeAttributeGenerator(GeneNodeAttributeGenerator):
 
         ``{'GENEID': 'AMBIGUOUS ID aka x,y,z'}``
 
+        Genes are listed in edgelist order, by last occurrence of
+        each gene id cell, so the list does not depend on set
+        ordering and is the same on every run over the same edgelist.
+        Each gene is interned once in a
+        :py:class:`~cellmaps_ppidownloader.edgetable.Vocabulary` that
+        :py:meth:`_get_gene_node_attributes_from_query_results` reuses
+
         :return: (list of genes, dict of ambiguous genes)
         :rtype: list
         """
         gene_set = set()
+        gene_vocabulary = Vocabulary()
         ambiguous_gene_dict = {}
 
-        for row in self._apms_edgelist:
-            GeneNodeAttributeGenerator.add_geneids_to_set(gene_set=gene_set,
-                                                          ambiguous_gene_dict=ambiguous_gene_dict,
-                                                          geneid=row['GeneID1'])
-            GeneNodeAttributeGenerator.add_geneids_to_set(gene_set=gene_set,
-                                                          ambiguous_gene_dict=ambiguous_gene_dict,
-                                                          geneid=row['GeneID2'])
-        return list(gene_set), ambiguous_gene_dict
+        # each distinct id cell is split once instead of once per edge,
+        # visiting cells in order of last occurrence so ambiguous_gene_dict
+        # ends up as if every edge was visited
+        if isinstance(self._apms_edgelist, EdgeTable):
+            last_pos = {}
+            for pos, code in enumerate(chain.from_iterable(zip(self._apms_edgelist.get_codes('GeneID1'),
+                                                               self._apms_edgelist.get_codes('GeneID2')))):
+                last_pos[code] = pos
+            last_pos.pop(EdgeTable.MISSING, None)
+            values = self._apms_edgelist.get_vocabulary().get_values()
+            unique_geneids = [values[code] for code in sorted(last_pos, key=last_pos.get)]
+        else:
+            last_seen = {}
+            for row in self._apms_edgelist:
+                for geneid in (row['GeneID1'], row['GeneID2']):
+                    last_seen.pop(geneid, None)
+                    last_seen[geneid] = None
+            unique_geneids = last_seen
+
+        for geneid in unique_geneids:
+            genes = GeneNodeAttributeGenerator.add_geneids_to_set(gene_set=gene_set,
+                                                                  ambiguous_gene_dict=ambiguous_gene_dict,
+                                                                  geneid=geneid)
+            gene_vocabulary.intern_many(genes or [])
+        self._gene_vocabulary = gene_vocabulary
+        return list(gene_vocabulary.get_values()), ambiguous_gene_dict
 
     def _get_apms_bait_set(self):
         """
@@ -289,88 +634,135 @@ class APMSGeneNodeAttributeGenerator(GeneNodeAttributeGenerator):
             bait_set.add(entry['GeneID'])
         return bait_set
 
-    def _process_query_results(self, query_res):
+    @staticmethod
+    def _add_ensembl_ids(ensembl_set, query_result):
         """
-        Processes the results from a gene symbol query, organizing the data into mappings
-        between queries, symbols, and Ensembl IDs, while capturing errors for any entries
-        that lack necessary information.
-
-        This method iterates over the query results, constructing three main dictionaries:
-        - A mapping from query strings to the corresponding gene name or query (if symbol is missing).
-        - A mapping from gene name to sets of queries that resulted in those symbols (maps gene name back to query
-        gene node attributes and filters it by GENE SYMBOL, column has associated ensembl ID(s) to keep track).
-        - A mapping from gene n to sets of associated Ensembl IDs.
+        Adds Ensembl gene ids in MyGene **query_result** to **ensembl_set**
+        """
+        if len(query_result['ensembl']) > 1:
+            for g in query_result['ensembl']:
+                ensembl_set.add(g['gene'])
+        else:
+            ensembl_set.add(query_result['ensembl']['gene'])
 
-        Entries without an 'ensembl' field are skipped, and an error is logged for each skipped entry.
+    def _get_gene_node_attributes_from_query_results(self, query_res, bait_set, ambiguous_gene_dict):
+        """
+        Builds gene node attributes from MyGene **query_res** taking the
+        first result of each query and merging Ensembl ids of queries
+        with the same symbol. Queries are coded by the gene vocabulary
+        built when the edgelist was loaded by
+        :py:meth:`_get_unique_genelist_from_edgelist`, and symbols, which
+        are only known once queried, are interned here. Per gene symbol
+        and per symbol Ensembl ids are kept in lists indexed by those
+        codes and strings are only looked up again when building the
+        returned dict, which is ordered by symbol then query. Results
+        without Ensembl ids are skipped with an error
 
         :param query_res: A list of dictionaries, each representing a query result.
         :type query_res: list
-        :return: A tuple containing mappings of query to symbol, symbol to queries, symbol to Ensembl IDs,
-                and a list of errors.
-        :rtype: (dict, dict, dict, list)
+        :param bait_set: gene ids of baits
+        :type bait_set: set
+        :param ambiguous_gene_dict: Mapping of ambiguous genes.
+        :type ambiguous_gene_dict: dict
+        :return: (gene node attributes, list of errors)
+        :rtype: tuple
         """
         errors = []
-        query_symbol_dict = {}
-        symbol_query_dict = {}
-        symbol_ensembl_dict = {}
+        valid_res = []
         for x in query_res:
-            if 'symbol' not in x:
-                symbol = x['query']
-            else:
-                symbol = x['symbol']
-
             if 'ensembl' not in x:
                 errors.append('Skipping ' + str(x) +
                               ' no ensembl in query result: ' + str(x))
                 logger.error(errors[-1])
                 continue
+            valid_res.append(x)
+
+        genes = self._gene_vocabulary
+        if genes is None:
+            genes = Vocabulary()
+        gene_codes = genes.intern_many(x['query'] for x in valid_res)
+
+        # duplicate query, just take first result
+        seen = bytearray(len(genes))
+        first_codes = []
+        first_res = []
+        for x, gene_code in zip(valid_res, gene_codes):
+            if not seen[gene_code]:
+                seen[gene_code] = 1
+                first_codes.append(gene_code)
+                first_res.append(x)
+
+        # res_symbol and first_codes are indexed by position in first_res
+        symbols = Vocabulary()
+        res_symbol = symbols.intern_many(x['symbol'] if 'symbol' in x else x['query']
+                                         for x in first_res)
+        symbol_ensembl = [set() for _ in range(len(symbols))]
+        for x, symbol_code in zip(first_res, res_symbol):
+            APMSGeneNodeAttributeGenerator._add_ensembl_ids(symbol_ensembl[symbol_code], x)
+
+        gene_values = genes.get_values()
+        symbol_values = symbols.get_values()
+        ensembl_strs = [','.join(sorted(e)) for e in symbol_ensembl]
+        gene_node_attrs = {}
+        for pos in sorted(range(len(res_symbol)), key=res_symbol.__getitem__):
+            query = gene_values[first_codes[pos]]
+            symbol_code = res_symbol[pos]
+            gene_node_attrs[query] = {'name': symbol_values[symbol_code],
+                                      'represents': ensembl_strs[symbol_code],
+                                      'ambiguous': ambiguous_gene_dict.get(query, ''),
+                                      'bait': query in bait_set}
+        return gene_node_attrs, errors
 
-            if x['query'] in query_symbol_dict:
-                continue  # duplicate query, just take first result
-            query_symbol_dict[x['query']] = symbol
-
-            if symbol not in symbol_query_dict:
-                symbol_query_dict[symbol] = set()
-            symbol_query_dict[symbol].add(x['query'])
-
-            if symbol not in symbol_ensembl_dict:
-                symbol_ensembl_dict[symbol] = set()
-            if len(x['ensembl']) > 1:
-                for g in x['ensembl']:
-                    symbol_ensembl_dict[symbol].add(g['gene'])
-            else:
-                symbol_ensembl_dict[symbol].add(x['ensembl']['gene'])
-
-        return query_symbol_dict, symbol_query_dict, symbol_ensembl_dict, errors
-
-    def _create_gene_node_attributes_dict(self, symbol_query_dict, symbol_ensembl_dict, bait_set, ambiguous_gene_dict):
+    def _get_known_gene_node_attributes_dict(self, genelist, bait_set, ambiguous_gene_dict):
         """
-        Compiles gene node attributes into a dictionary based on several mappings and the fold.
-        It loops through unique gene symbols, make gene nodes attribute dictionary that contains
-        gene symbol, ensembl ids, antibodies, ambiguous gene symbols and image filenames.
+        Gets gene node attributes for genes in **genelist** that are in
+        the known gene node attributes set via
+        :py:meth:`~GeneNodeAttributeGenerator.set_known_gene_node_attributes`.
+        Name and represents are reused while ambiguous and bait
+        are set from the current edgelist and baitlist
 
-        :param symbol_query_dict: Mapping of gene symbols to their queries.
-        :param symbol_ensembl_dict: Mapping of gene symbols to Ensembl IDs.
-        :param bait_set: Set with boolean values, indicating bait proteins with True
-        :param ambiguous_gene_dict: Mapping of ambiguous genes.
-        :return: A dictionary of gene node attributes.
+        :return: gene id => gene node attributes
         :rtype: dict
         """
         gene_node_attrs = {}
-        for symbol, queries in symbol_query_dict.items():
-
-            ensemble_str = ','.join(sorted(symbol_ensembl_dict[symbol]))
+        if self._known_gene_node_attrs is None:
+            return gene_node_attrs
+        for gene in genelist:
+            known = self._known_gene_node_attrs.get(gene)
+            if known is None:
+                continue
+            gene_node_attrs[gene] = {'name': known['name'],
+                                     'represents': known['represents'],
+                                     'ambiguous': ambiguous_gene_dict.get(gene, ''),
+                                     'bait': gene in bait_set}
+        return gene_node_attrs
 
-            for query in queries:
-                ambiguous_str = ''
-                if query in ambiguous_gene_dict:
-                    ambiguous_str = ambiguous_gene_dict[query]
+    @staticmethod
+    def _merge_gene_node_attributes(genelist, gene_node_attrs, known_gene_node_attrs):
+        """
+        Merges **gene_node_attrs** from a query with **known_gene_node_attrs**
+        in the order :py:meth:`_get_gene_node_attributes_from_query_results`
+        would return them had all genes in **genelist** been queried, which
+        is by first appearance of each name in **genelist**, then by
+        **genelist** order
 
-                gene_node_attrs[query] = {'name': symbol,
-                                          'represents': ensemble_str,
-                                          'ambiguous': ambiguous_str,
-                                          'bait': query in bait_set}
-        return gene_node_attrs
+        :param genelist: all gene ids in edgelist order
+        :type genelist: list
+        :return: gene id => gene node attributes
+        :rtype: dict
+        """
+        merged = []
+        name_order = {}
+        for gene in genelist:
+            attrs = gene_node_attrs.get(gene)
+            if attrs is None:
+                attrs = known_gene_node_attrs.get(gene)
+            if attrs is None:
+                continue
+            name_order.setdefault(attrs['name'], len(name_order))
+            merged.append((gene, attrs))
+        merged.sort(key=lambda x: name_order[x[1]['name']])
+        return dict(merged)
 
     def get_gene_node_attributes(self):
         """
@@ -384,25 +776,45 @@ class APMSGeneNodeAttributeGenerator(GeneNodeAttributeGenerator):
                           'ambiguous': 'ALTERNATE GENEs' }
             }
 
-
+        If known gene node attributes were set via
+        :py:meth:`~GeneNodeAttributeGenerator.set_known_gene_node_attributes`
+        only genes not found in them are queried and the result is in the
+        same order as if all genes had been queried. If
+        **check_interactor_counts** was set, number of interactors
+        in the baitlist is checked against the edgelist via
+        :py:meth:`~GeneNodeAttributeGenerator.check_baitlist_interactor_counts`
 
         :return: (list of dicts containing gene node attributes,
                   list of str describing any errors encountered)
         :rtype: tuple
         """
+        from tqdm import tqdm
         t = tqdm(total=2, desc='Get updated gene symbols', unit='steps')
         try:
             t.update()
             genelist, ambiguous_gene_dict = self._get_unique_genelist_from_edgelist()
-            t.update()
-            query_res = self._genequery.get_symbols_for_genes(genelist=genelist)
             bait_set = self._get_apms_bait_set()
-
-            query_symbol_dict, symbol_query_dict, symbol_ensembl_dict, errors = self._process_query_results(query_res)
-
-            gene_node_attrs = self._create_gene_node_attributes_dict(symbol_query_dict, symbol_ensembl_dict,
-                                                                     bait_set, ambiguous_gene_dict)
-
+            if self._check_interactor_counts:
+                self.check_baitlist_interactor_counts(self._apms_baitlist)
+            known_gene_node_attrs = self._get_known_gene_node_attributes_dict(genelist, bait_set,
+                                                                              ambiguous_gene_dict)
+            query_genelist = genelist
+            if self._known_gene_node_attrs is not None:
+                query_genelist = [g for g in genelist if g not in known_gene_node_attrs]
+                logger.info('Reusing ' + str(len(known_gene_node_attrs)) +
+                            ' known genes, querying ' + str(len(query_genelist)) + ' new genes')
+            t.update()
+            if len(query_genelist) == 0 and self._known_gene_node_attrs is not None:
+                query_res = []
+            else:
+                query_res = self._genequery.get_symbols_for_genes(genelist=query_genelist)
+
+            gene_node_attrs, errors = self._get_gene_node_attributes_from_query_results(query_res, bait_set,
+                                                                                        ambiguous_gene_dict)
+            if self._known_gene_node_attrs is not None:
+                gene_node_attrs = APMSGeneNodeAttributeGenerator._merge_gene_node_attributes(genelist,
+                                                                                             gene_node_attrs,
+                                                                                             known_gene_node_attrs)
             return gene_node_attrs, errors
         finally:
             t.close()
@@ -413,6 +825,13 @@ class CM4AIGeneNodeAttributeGenerator(GeneNodeAttributeGenerator):
     Creates APMS Gene Node Attributes table from CM4AI data
     """
 
+    RESOLUTION_PLAN = (('Bait', 'symbol'),
+                       ('Prey', 'uniprot'))
+    """
+    Raw edgelist columns and the MyGene scope used to resolve
+    the identifiers in each column
+    """
+
     def __init__(self, apms_edgelist=None,
                  genequery=GeneQuery()):
         """
@@ -458,7 +877,13 @@ class CM4AIGeneNodeAttributeGenerator(GeneNodeAttributeGenerator):
            If BFDR.x column does not exist, no BFDR filtering will occur
            Same goes if FoldChange.x column does not exist
 
-        :param tsvfile: Path to TSV file with above format
+        The table is parsed once by :py:func:`pandas.read_csv` with
+        numeric BFDR and FoldChange columns and both filters are applied
+        as bulk masks. When filtering on a column, rows where its value
+        is missing or not a number are dropped
+
+        :param tsvfile: Path to TSV file with above format, which
+                        can be gzip or zstd compressed
         :type tsvfile: str
         :param bait_col: Name of bait column
         :type bait_col: str
@@ -480,27 +905,49 @@ class CM4AIGeneNodeAttributeGenerator(GeneNodeAttributeGenerator):
                                If this value is ``None`` no filtering will
                                occur
         :type bfdr_maxcutoff: float
-        :return: list of dicts, with each dict of format:
+        :return: edgelist where each row is a dict of format:
 
                  .. code-block::
 
                       {'Bait': VAL,
                        'Prey': VAL}
-        :rtype: list
+        :rtype: :py:class:`~cellmaps_ppidownloader.edgetable.EdgeTable`
         """
-        edgelist = []
-        with open(tsvfile, 'r') as f:
-            reader = csv.DictReader(f, delimiter='\t')
-            for row in reader:
-                if bfdr_col is not None and bfdr_col in row \
-                    and row[bfdr_col] > bfdr_maxcutoff:
-                    continue
-                if foldchange_col is not None and foldchange_col in row \
-                    and row[foldchange_col] <= foldchange_cutoff:
-                    continue
-                edgelist.append({'Bait': row[bait_col],
-                                 'Prey': row[prey_col]})
-        return edgelist
+        import pandas as pd
+
+        numeric_cols = []
+        if bfdr_col is not None and bfdr_maxcutoff is not None:
+            numeric_cols.append(bfdr_col)
+        if foldchange_col is not None and foldchange_cutoff is not None:
+            numeric_cols.append(foldchange_col)
+        wanted_cols = {bait_col, prey_col}.union(numeric_cols)
+
+        # bait and prey are kept as strings exactly as they appear in the
+        # file so values such as NA are not converted to missing values
+        with fileutils.open_input(tsvfile, mode='rb') as f:
+            df = pd.read_csv(f, sep='\t',
+                             usecols=lambda c: c in wanted_cols,
+                             dtype={bait_col: str, prey_col: str},
+                             keep_default_na=False,
+                             na_values={c: [''] for c in numeric_cols})
+        for colname in [bait_col, prey_col]:
+            if colname not in df.columns:
+                raise CellMapsPPIDownloaderError('Column ' + str(colname) +
+                                                 ' not found in ' + str(tsvfile))
+
+        mask = None
+        if bfdr_col in numeric_cols and bfdr_col in df.columns:
+            mask = pd.to_numeric(df[bfdr_col], errors='coerce') <= bfdr_maxcutoff
+        if foldchange_col in numeric_cols and foldchange_col in df.columns:
+            fc_mask = pd.to_numeric(df[foldchange_col], errors='coerce') > foldchange_cutoff
+            mask = fc_mask if mask is None else mask & fc_mask
+        if mask is not None:
+            logger.debug('Keeping ' + str(int(mask.sum())) + ' of ' +
+                         str(len(df)) + ' rows after BFDR and FoldChange filtering')
+            df = df[mask]
+
+        return EdgeTable.from_columns({'Bait': df[bait_col].tolist(),
+                                       'Prey': df[prey_col].tolist()})
 
     def _get_unique_set_from_raw_edgelist(self, colname=None):
         """
@@ -515,18 +962,57 @@ class CM4AIGeneNodeAttributeGenerator(GeneNodeAttributeGenerator):
             col_set.add(entry[colname])
         return col_set
 
-    def _get_baits_to_ensemblsymbolmap(self):
+    def _get_unique_sets_from_raw_edgelist(self, colnames=None):
+        """
+        Given column names **colnames** extract unique set of values
+        for each column from raw apms edgelist passed in via constructor
+        in a single pass
+
+        :return: column name => set of unique values
+        :rtype: dict
+        """
+        col_sets = {colname: set() for colname in colnames}
+        for entry in self._raw_apms_edgelist:
+            for colname, col_set in col_sets.items():
+                col_set.add(entry[colname])
+        return col_sets
+
+    def _query_raw_edgelist_genes(self):
+        """
+        Collects unique identifiers for each column in
+        :py:const:`RESOLUTION_PLAN` in one pass over the raw apms
+        edgelist and queries mygene for each column concurrently
+
+        :return: column name => query results from
+                 :py:meth:`GeneQuery.get_symbols_for_genes`
+        :rtype: dict
+        """
+        col_sets = self._get_unique_sets_from_raw_edgelist([colname for colname, scope in
+                                                            CM4AIGeneNodeAttributeGenerator.RESOLUTION_PLAN])
+        with ThreadPoolExecutor(max_workers=len(CM4AIGeneNodeAttributeGenerator.RESOLUTION_PLAN)) as executor:
+            futures = {colname: executor.submit(self._genequery.get_symbols_for_genes,
+                                                list(col_sets[colname]),
+                                                scopes=scope)
+                       for colname, scope in CM4AIGeneNodeAttributeGenerator.RESOLUTION_PLAN}
+            return {colname: future.result() for colname, future in futures.items()}
+
+    def _get_baits_to_ensemblsymbolmap(self, query_res=None):
         """
         Get unique set of bait names from raw apms edgelist
         and query mygene to get symbols and ensembl gene ids
 
+        :param query_res: Results of bait query. If ``None``
+                          mygene is queried
+        :type query_res: list
         :return: original bait name to mapped to tuple
                  (id, symbol, ensembl gene id)
         :rtype: dict
         """
-        bait_set = self._get_unique_set_from_raw_edgelist('Bait')
-        res = self._genequery.get_symbols_for_genes(list(bait_set),
-                                                    scopes='symbol')
+        res = query_res
+        if res is None:
+            bait_set = self._get_unique_set_from_raw_edgelist('Bait')
+            res = self._genequery.get_symbols_for_genes(list(bait_set),
+                                                        scopes='symbol')
         bait_to_id = {}
         for entry in res:
             bait_to_id[entry['query']] = (entry['_id'],
@@ -534,18 +1020,23 @@ class CM4AIGeneNodeAttributeGenerator(GeneNodeAttributeGenerator):
                                           entry['ensembl']['gene'])
         return bait_to_id
 
-    def _get_prey_to_ensemblsymbolmap(self):
+    def _get_prey_to_ensemblsymbolmap(self, query_res=None):
         """
         Get unique set of prey names from raw apms edgelist
         and query mygene to get symbols and ensembl gene ids
 
+        :param query_res: Results of prey query. If ``None``
+                          mygene is queried
+        :type query_res: list
         :return: original bait name to mapped to tuple
                  (id, symbol, ensembl gene id)
         :rtype: dict
         """
-        prey_set = self._get_unique_set_from_raw_edgelist('Prey')
-        res = self._genequery.get_symbols_for_genes(list(prey_set),
-                                                    scopes='uniprot')
+        res = query_res
+        if res is None:
+            prey_set = self._get_unique_set_from_raw_edgelist('Prey')
+            res = self._genequery.get_symbols_for_genes(list(prey_set),
+                                                        scopes='uniprot')
         prey_to_id = {}
         for entry in res:
             ensemblstr = ''
@@ -566,18 +1057,17 @@ class CM4AIGeneNodeAttributeGenerator(GeneNodeAttributeGenerator):
         Gets apms edgelist
 
         :return:
-        :rtype: list
+        :rtype: :py:class:`~cellmaps_ppidownloader.edgetable.EdgeTable`
         """
         if self._apms_edgelist is not None:
             return self._apms_edgelist
 
         # we need to generate this list
-        baits_to_idmap = self._get_baits_to_ensemblsymbolmap()
-
-        prey_set = self._get_unique_set_from_raw_edgelist('Prey')
-
-        prey_to_idmap = self._get_prey_to_ensemblsymbolmap()
-        self._apms_edgelist = []
+        query_res = self._query_raw_edgelist_genes()
+        baits_to_idmap = self._get_baits_to_ensemblsymbolmap(query_res=query_res['Bait'])
+        prey_to_idmap = self._get_prey_to_ensemblsymbolmap(query_res=query_res['Prey'])
+        self._apms_edgelist = EdgeTable(columns=['GeneID1', 'Symbol1', 'Ensembl1',
+                                                 'GeneID2', 'Symbol2', 'Ensembl2'])
         for row in self._raw_apms_edgelist:
             if row['Bait'] not in baits_to_idmap:
                 logger.warning('Bait ' + str(row['Bait']) + ' not in map. Skipping')
@@ -587,25 +1077,19 @@ class CM4AIGeneNodeAttributeGenerator(GeneNodeAttributeGenerator):
                 continue
             bait_tuple = baits_to_idmap[row['Bait']]
             prey_tuple = prey_to_idmap[row['Prey']]
-            self._apms_edgelist.append({'GeneID1': bait_tuple[0],
-                                        'Symbol1': bait_tuple[1],
-                                        'Ensembl1': bait_tuple[2],
-                                        'GeneID2': prey_tuple[0],
-                                        'Symbol2': prey_tuple[1],
-                                        'Ensembl2': prey_tuple[2]})
+            self._apms_edgelist.append_values(bait_tuple + prey_tuple)
         return self._apms_edgelist
 
     def _get_apms_bait_set(self):
         """
-        Gets unique set of baits
+        Gets unique set of baits, which are the genes in
+        ``GeneID1`` column of edgelist since CM4AI tables lack
+        a baitlist
 
         :return:
         :rtype: set
         """
-        bait_set = set()
-        for entry in self._apms_baitlist:
-            bait_set.add(entry['GeneID'])
-        return bait_set
+        return set(self.get_apms_edgelist().get_column('GeneID1'))
 
     def get_gene_node_attributes(self):
         """
@@ -652,7 +1136,7 @@ class NdexGeneNodeAttributeGenerator(GeneNodeAttributeGenerator):
     """
 
     def __init__(self, apms_edgelist=None, apms_baitlist=None, uuid=None,
-                 genequery=GeneQuery()):
+                 genequery=GeneQuery(), loader=None):
         """
         Constructor
 
@@ -668,29 +1152,103 @@ class NdexGeneNodeAttributeGenerator(GeneNodeAttributeGenerator):
                                    'BFDR.x': VAL}
         :type apms_edgelist: list
         :param genequery:
+        :param loader: Loads network with **uuid** from NDEx. Pass the same
+                       loader used to get **apms_edgelist** and **apms_baitlist**
+                       so the network is only downloaded once.
+                       If ``None`` a new loader is created
+        :type loader: :py:class:`~cellmaps_ppidownloader.ndexloader.NdexNetworkLoader`
         """
         super().__init__()
         self._apms_edgelist = apms_edgelist
         self._apms_baitlist = apms_baitlist
         self._genequery = genequery
+        self._gene_node_attrs = None
+        self._gene_node_errors = None
         self.uuid = uuid
-        self.nice_cx = ndex2.create_nice_cx_from_server("http://public.ndexbio.org", uuid=uuid)
-    
+        self.nice_cx = None
+        if uuid is not None:
+            if loader is None:
+                loader = NdexNetworkLoader()
+            self.nice_cx = loader.get_network(uuid)
+
+    @staticmethod
+    def create_from_cx(source=None, genequery=GeneQuery()):
+        """
+        Creates generator from CX or CX2 network read in a single
+        streaming pass by
+        :py:class:`~cellmaps_ppidownloader.cx.CXStreamReader`
+        without building a :py:class:`~ndex2.nice_cx_network.NiceCXNetwork`
+
+        :param source: Path to CX or CX2 file or binary file-like object
+        :type source: str or file
+        :param genequery:
+        :return: generator
+        :rtype: :py:class:`NdexGeneNodeAttributeGenerator`
+        """
+        edgelist, baitlist, gene_node_attrs, errors = CXStreamReader(source).get_apms_tables()
+        gen = NdexGeneNodeAttributeGenerator(apms_edgelist=edgelist,
+                                             apms_baitlist=baitlist,
+                                             genequery=genequery)
+        gen._gene_node_attrs = gene_node_attrs
+        gen._gene_node_errors = errors
+        return gen
+
     @staticmethod
-    def get_apms_edgelist_from_ndex (uuid=None):
+    def create_from_ndex(uuid=None, loader=None, genequery=GeneQuery(),
+                         streaming=False):
+        """
+        Creates generator with edgelist and baitlist extracted from
+        network with **uuid** on NDEx downloading and parsing the network
+        only once
+
+        :param uuid: UUID of network on NDEx
+        :type uuid: str
+        :param loader: Loads network from NDEx, if ``None`` a new loader is
+                       created
+        :type loader: :py:class:`~cellmaps_ppidownloader.ndexloader.NdexNetworkLoader`
+        :param genequery:
+        :param streaming: If ``True`` parse CX as it is read via
+                          :py:meth:`create_from_cx` instead of building
+                          a :py:class:`~ndex2.nice_cx_network.NiceCXNetwork`
+        :type streaming: bool
+        :return: generator
+        :rtype: :py:class:`NdexGeneNodeAttributeGenerator`
+        """
+        if loader is None:
+            loader = NdexNetworkLoader()
+        if streaming:
+            stream = loader.open_cx_stream(uuid)
+            try:
+                gen = NdexGeneNodeAttributeGenerator.create_from_cx(stream,
+                                                                    genequery=genequery)
+            finally:
+                stream.close()
+            gen.uuid = uuid
+            return gen
+        return NdexGeneNodeAttributeGenerator(
+            apms_edgelist=NdexGeneNodeAttributeGenerator.get_apms_edgelist_from_ndex(uuid, loader=loader),
+            apms_baitlist=NdexGeneNodeAttributeGenerator.get_apms_baitlist_from_ndex(uuid, loader=loader),
+            uuid=uuid, genequery=genequery, loader=loader)
+
+    @staticmethod
+    def get_apms_edgelist_from_ndex(uuid=None, loader=None):
         """
         Gets AP-MS edgelist from niceCX and gene node attributes.
         Adds safe guards for missing/malformed data.
 
-        :param nice_cx: NiceCXNetwork
-        :param gene_node_attrs: DataFrame with 'node_id', 'name', 'represents', etc.
-        :return: List of dicts (edges)
-        :rtype: list
+        :param uuid: UUID of network on NDEx
+        :type uuid: str
+        :param loader: Loads network from NDEx, if ``None`` a new loader is
+                       created
+        :type loader: :py:class:`~cellmaps_ppidownloader.ndexloader.NdexNetworkLoader`
+        :return: edges as dicts
+        :rtype: :py:class:`~cellmaps_ppidownloader.edgetable.EdgeTable`
         """
 
         # we need to generate this list
-
-        nice_cx = ndex2.create_nice_cx_from_server("http://public.ndexbio.org", uuid=uuid)
+        if loader is None:
+            loader = NdexNetworkLoader()
+        nice_cx = loader.get_network(uuid)
 
         nodes = nice_cx.nodes
         edges = nice_cx.edges
@@ -705,7 +1263,7 @@ class NdexGeneNodeAttributeGenerator(GeneNodeAttributeGenerator):
                     continue
                 attr_by_edge_id[edge_id][attr_name] = attr_value
 
-        edgelist = []
+        edgelist = EdgeTable(columns=['GeneID1', 'Symbol1', 'GeneID2', 'Symbol2'])
         for edge_id, edge_data in edges.items():
             source = edge_data.get('s')
             target = edge_data.get('t')
@@ -726,9 +1284,28 @@ class NdexGeneNodeAttributeGenerator(GeneNodeAttributeGenerator):
         return edgelist
     
     @staticmethod
-    def get_apms_baitlist_from_ndex(uuid=None):
+    def get_apms_baitlist_from_ndex(uuid=None, loader=None):
+        """
+        Gets AP-MS baitlist from network on NDEx. Nodes with
+        ``bait`` attribute set to ``true`` are baits
+
+        :param uuid: UUID of network on NDEx
+        :type uuid: str
+        :param loader: Loads network from NDEx, if ``None`` a new loader is
+                       created
+        :type loader: :py:class:`~cellmaps_ppidownloader.ndexloader.NdexNetworkLoader`
+        :return: list of dicts, with each dict of format:
 
-        nice_cx = ndex2.create_nice_cx_from_server("http://public.ndexbio.org", uuid=uuid)
+                 .. code-block::
+
+                      { 'GeneSymbol': VAL,
+                        'GeneID': VAL,
+                        'NumInteractors': VAL }
+        :rtype: list
+        """
+        if loader is None:
+            loader = NdexNetworkLoader()
+        nice_cx = loader.get_network(uuid)
 
         nodes = nice_cx.nodes
         node_attrs = nice_cx.nodeAttributes
@@ -739,27 +1316,23 @@ class NdexGeneNodeAttributeGenerator(GeneNodeAttributeGenerator):
             for attr in attr_list:
                 attr_by_node_id[node_id][attr['n']] = attr['v']
 
-        adjacency = defaultdict(set)
-        for edge_id, edge_data in edges.items():
-            source = edge_data['s']
-            target = edge_data['t']
-            adjacency[source].add(target)
-            adjacency[target].add(source)
+        bait_ids = [node_id for node_id in nodes.keys()
+                    if attr_by_node_id[node_id].get('bait', '').lower() == 'true']
+        if len(bait_ids) == 0:
+            return []
 
-        baitlist = []
-
-        for node_id, node_data in nodes.items():
-            is_bait = attr_by_node_id[node_id].get('bait', '').lower() == 'true'
-            if is_bait:
-                gene_symbol = node_data.get('n')
-                gene_id = str(node_id)
-                num_interactors = len(adjacency[node_id])
-                baitlist.append({
-                    'GeneSymbol': gene_symbol,
-                    'GeneID': gene_id,
-                    'NumInteractors': num_interactors
-                })
+        # node ids in CX are integers so they are used as codes as is
+        sources = array('q', (edge_data['s'] for edge_data in edges.values()))
+        targets = array('q', (edge_data['t'] for edge_data in edges.values()))
+        interactor_counts = AdjacencyIndex.from_arrays(sources, targets).get_interactor_counts(bait_ids)
 
+        baitlist = []
+        for node_id in bait_ids:
+            baitlist.append({
+                'GeneSymbol': nodes[node_id].get('n'),
+                'GeneID': str(node_id),
+                'NumInteractors': interactor_counts[node_id]
+            })
         return baitlist
 
     def get_apms_edgelist(self):
@@ -860,6 +1433,8 @@ class NdexGeneNodeAttributeGenerator(GeneNodeAttributeGenerator):
 
         :return: (list of nodes and attributes in df format
         """
+        if self._gene_node_attrs is not None:
+            return self._gene_node_attrs, list(self._gene_node_errors)
         nice_cx = self.nice_cx
         nodes = nice_cx.nodes
         node_attrs = nice_cx.nodeAttributes
@@ -0,0 +1,219 @@
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+
+from cellmaps_ppidownloader.exceptions import CellMapsPPIDownloaderError
+
+logger = logging.getLogger(__name__)
+
+
+class GeneQueryCache(object):
+    """
+    Persistent on disk cache of MyGene query results stored
+    in a `SQLite <https://sqlite.org>`__ database file.
+
+    Each result is keyed by (scope, species, fields, query id)
+    and entries older than **ttl** seconds are treated as misses
+    and evicted.
+    """
+
+    DEFAULT_TTL = 30 * 24 * 60 * 60
+    """
+    Default time to live for cache entries in seconds (30 days)
+    """
+
+    SQL_BATCH_SIZE = 500
+    """
+    Max number of query ids passed to a single SQL select
+    """
+
+    def __init__(self, cachefile=None, ttl=DEFAULT_TTL):
+        """
+        Constructor
+
+        :param cachefile: Path to SQLite database file. Created if
+                          it does not exist
+        :type cachefile: str
+        :param ttl: Time in seconds entries are considered valid. If
+                    ``None`` entries never expire
+        :type ttl: float
+        :raises CellMapsPPIDownloaderError: If **cachefile** is ``None``
+        """
+        if cachefile is None:
+            raise CellMapsPPIDownloaderError('cachefile is None')
+        self._cachefile = os.path.abspath(cachefile)
+        self._ttl = ttl
+        self._hits = 0
+        self._misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self._cachefile, timeout=60,
+                                     check_same_thread=False)
+        # WAL lets processes sharing the cache read while another writes
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('CREATE TABLE IF NOT EXISTS genequery ('
+                           'scope TEXT NOT NULL, '
+                           'species TEXT NOT NULL, '
+                           'fields TEXT NOT NULL, '
+                           'query TEXT NOT NULL, '
+                           'result TEXT NOT NULL, '
+                           'created REAL NOT NULL, '
+                           'PRIMARY KEY (scope, species, fields, query))')
+        self._conn.commit()
+        self.evict_expired()
+
+    def get_cachefile(self):
+        """
+        Gets path to cache database file
+
+        :return: path to cache file
+        :rtype: str
+        """
+        return self._cachefile
+
+    def get_hits(self):
+        """
+        Gets number of query ids found in cache
+
+        :return:
+        :rtype: int
+        """
+        return self._hits
+
+    def get_misses(self):
+        """
+        Gets number of query ids not found in cache
+
+        :return:
+        :rtype: int
+        """
+        return self._misses
+
+    @staticmethod
+    def _get_key_prefix(scopes=None, species=None, fields=None):
+        """
+        Converts **scopes**, **species**, and **fields** into
+        normalized strings used as part of the cache key
+
+        :return: (scope, species, fields)
+        :rtype: tuple
+        """
+        if fields is None:
+            fields_str = ''
+        elif isinstance(fields, str):
+            fields_str = fields
+        else:
+            fields_str = ','.join(sorted(fields))
+        if scopes is not None and not isinstance(scopes, str):
+            scopes = ','.join(scopes)
+        return ('' if scopes is None else scopes,
+                '' if species is None else str(species),
+                fields_str)
+
+    def _get_expire_time(self):
+        """
+        Gets time before which entries are considered expired
+
+        :return: epoch time in seconds or ``None`` if entries never expire
+        :rtype: float
+        """
+        if self._ttl is None:
+            return None
+        return time.time() - self._ttl
+
+    def evict_expired(self):
+        """
+        Removes entries older than ttl passed in via constructor
+
+        :return: number of entries removed
+        :rtype: int
+        """
+        expire_time = self._get_expire_time()
+        if expire_time is None:
+            return 0
+        with self._lock:
+            cursor = self._conn.execute('DELETE FROM genequery WHERE created < ?',
+                                        (expire_time,))
+            self._conn.commit()
+        if cursor.rowcount > 0:
+            logger.debug('Evicted ' + str(cursor.rowcount) +
+                         ' expired entries from ' + self._cachefile)
+        return cursor.rowcount
+
+    def get_many(self, queries, species=None, scopes=None, fields=None):
+        """
+        Looks up **queries** in cache
+
+        :param queries: gene ids/symbols to look up
+        :type queries: list
+        :param species:
+        :type species: str
+        :param scopes:
+        :type scopes: str
+        :param fields:
+        :type fields: list
+        :return: (dict of query id => list of MyGene result dicts,
+                  list of query ids not in cache in input order)
+        :rtype: tuple
+        """
+        prefix = GeneQueryCache._get_key_prefix(scopes=scopes,
+                                                species=species,
+                                                fields=fields)
+        unique_queries = list(dict.fromkeys([str(q) for q in queries]))
+        expire_time = self._get_expire_time()
+        found = {}
+        with self._lock:
+            for i in range(0, len(unique_queries), GeneQueryCache.SQL_BATCH_SIZE):
+                batch = unique_queries[i:i + GeneQueryCache.SQL_BATCH_SIZE]
+                sql = 'SELECT query, result, created FROM genequery WHERE ' \
+                      'scope = ? AND species = ? AND fields = ? AND query IN (' + \
+                      ','.join(['?'] * len(batch)) + ')'
+                for query, result, created in self._conn.execute(sql, prefix + tuple(batch)):
+                    if expire_time is not None and created < expire_time:
+                        continue
+                    found[query] = json.loads(result)
+
+            missing = [q for q in unique_queries if q not in found]
+            # updated under lock since batches can call from several threads
+            self._hits += len(found)
+            self._misses += len(missing)
+        return found, missing
+
+    def put_many(self, results, species=None, scopes=None, fields=None):
+        """
+        Stores MyGene **results** in cache grouping them by
+        the ``query`` value in each result
+
+        :param results: list of result dicts from MyGene querymany
+        :type results: list
+        :param species:
+        :type species: str
+        :param scopes:
+        :type scopes: str
+        :param fields:
+        :type fields: list
+        """
+        prefix = GeneQueryCache._get_key_prefix(scopes=scopes,
+                                                species=species,
+                                                fields=fields)
+        grouped = {}
+        for entry in results:
+            grouped.setdefault(str(entry['query']), []).append(entry)
+
+        now = time.time()
+        with self._lock:
+            self._conn.executemany('INSERT OR REPLACE INTO genequery '
+                                   '(scope, species, fields, query, result, created) '
+                                   'VALUES (?, ?, ?, ?, ?, ?)',
+                                   [prefix + (query, json.dumps(entries), now)
+                                    for query, entries in grouped.items()])
+            self._conn.commit()
+
+    def close(self):
+        """
+        Closes connection to cache database
+        """
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,298 @@
+import os
+import mmap
+import logging
+import threading
+
+from cellmaps_ppidownloader import fileutils
+from cellmaps_ppidownloader.exceptions import CellMapsPPIDownloaderError
+
+logger = logging.getLogger(__name__)
+
+
+class GeneInfoQuery(object):
+    """
+    Offline alternative to :py:class:`~cellmaps_ppidownloader.gene.GeneQuery`
+    that resolves genes using a local snapshot of the
+    `NCBI gene_info <https://ftp.ncbi.nlm.nih.gov/gene/DATA/GENE_INFO/>`__
+    file, for example ``Homo_sapiens.gene_info``
+
+    An uncompressed file is memory mapped while a gzip or zstd
+    compressed file is decompressed into memory via
+    :py:func:`~cellmaps_ppidownloader.fileutils.open_input`. On first
+    query, in memory dicts are built mapping gene id, symbol then
+    taxonomy id, and Ensembl gene id to byte offsets of lines in the
+    file which are only parsed when a query hits them. The indexes are
+    rebuilt by each instance and are not saved to disk.
+
+    UniProt accessions can also be resolved by passing a UniProt id mapping
+    file (such as ``HUMAN_9606_idmapping_selected.tab``) where the first
+    column is the UniProt accession and column **uniprot_geneid_col** contains
+    NCBI gene ids delimited by ``;``
+    """
+
+    TAXID_COL = 0
+    GENEID_COL = 1
+    SYMBOL_COL = 2
+    DBXREFS_COL = 5
+
+    ENSEMBL_PREFIX = 'Ensembl:'
+
+    SPECIES_TO_TAXID = {'human': '9606',
+                        'mouse': '10090',
+                        'rat': '10116'}
+    """
+    Maps common species names to NCBI taxonomy ids
+    """
+
+    ID_SCOPES = ('_id', 'entrezgene')
+    SYMBOL_SCOPE = 'symbol'
+    ENSEMBL_SCOPE = 'ensembl.gene'
+    UNIPROT_SCOPE = 'uniprot'
+
+    def __init__(self, gene_info_file=None,
+                 uniprot_mapping_file=None,
+                 uniprot_geneid_col=2):
+        """
+        Constructor
+
+        :param gene_info_file: Path to NCBI gene_info file
+        :type gene_info_file: str
+        :param uniprot_mapping_file: Path to optional tab delimited file
+                                     mapping UniProt accessions to NCBI
+                                     gene ids. Needed for ``uniprot`` scope
+        :type uniprot_mapping_file: str
+        :param uniprot_geneid_col: Index of column in **uniprot_mapping_file**
+                                   with NCBI gene ids
+        :type uniprot_geneid_col: int
+        :raises CellMapsPPIDownloaderError: If **gene_info_file** is ``None``
+        """
+        if gene_info_file is None:
+            raise CellMapsPPIDownloaderError('gene_info_file is None')
+        self._gene_info_file = gene_info_file
+        self._uniprot_mapping_file = uniprot_mapping_file
+        self._uniprot_geneid_col = uniprot_geneid_col
+        self._mm = None
+        self._index = None
+        self._lock = threading.Lock()
+
+    def _get_taxid(self, species=None):
+        """
+        Converts **species** to NCBI taxonomy id
+
+        :return: taxonomy id or ``None`` if **species** is ``None``
+        :rtype: str
+        """
+        if species is None:
+            return None
+        species = str(species)
+        return GeneInfoQuery.SPECIES_TO_TAXID.get(species.lower(), species)
+
+    def _load_index(self):
+        """
+        Loads gene_info file and builds indexes of byte offsets
+        keyed by gene id, upper case symbol then taxonomy id, Ensembl
+        gene id and, if set, UniProt accession
+        """
+        with self._lock:
+            if self._index is None:
+                self._build_index()
+
+    def _build_index(self):
+        """
+        Builds indexes described in :py:meth:`_load_index`
+        """
+        if not os.path.isfile(self._gene_info_file) or \
+                os.path.getsize(self._gene_info_file) == 0:
+            raise CellMapsPPIDownloaderError(str(self._gene_info_file) +
+                                             ' is not a file or is empty')
+        if fileutils.get_compression(self._gene_info_file) is None:
+            with open(self._gene_info_file, 'rb') as f:
+                self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            with fileutils.open_input(self._gene_info_file, mode='rb') as f:
+                self._mm = f.read()
+
+        id_index = {}
+        symbol_index = {}
+        ensembl_index = {}
+        offset = 0
+        data_len = len(self._mm)
+        while offset < data_len:
+            line_offset = offset
+            end = self._mm.find(b'\n', offset)
+            offset = data_len if end == -1 else end + 1
+            line = self._mm[line_offset:offset]
+            if line.startswith(b'#'):
+                continue
+            cols = line.rstrip(b'\r\n').split(b'\t', GeneInfoQuery.DBXREFS_COL + 1)
+            if len(cols) <= GeneInfoQuery.DBXREFS_COL:
+                continue
+            taxid = cols[GeneInfoQuery.TAXID_COL].decode()
+            id_index[cols[GeneInfoQuery.GENEID_COL].decode()] = line_offset
+            symbol = cols[GeneInfoQuery.SYMBOL_COL].decode().upper()
+            symbol_index.setdefault(symbol, {}).setdefault(taxid,
+                                                           []).append(line_offset)
+            for xref in cols[GeneInfoQuery.DBXREFS_COL].decode().split('|'):
+                if xref.startswith(GeneInfoQuery.ENSEMBL_PREFIX):
+                    ensembl_index.setdefault(xref[len(GeneInfoQuery.ENSEMBL_PREFIX):],
+                                             []).append(line_offset)
+
+        self._index = {GeneInfoQuery.SYMBOL_SCOPE: symbol_index,
+                       GeneInfoQuery.ENSEMBL_SCOPE: ensembl_index,
+                       GeneInfoQuery.UNIPROT_SCOPE: self._load_uniprot_index(id_index)}
+        for scope in GeneInfoQuery.ID_SCOPES:
+            self._index[scope] = id_index
+        logger.debug('Indexed ' + str(len(id_index)) + ' genes from ' +
+                     str(self._gene_info_file))
+
+    def _load_uniprot_index(self, id_index):
+        """
+        Builds index of UniProt accession to gene_info byte offsets
+        using uniprot mapping file passed in via constructor
+
+        :param id_index: gene id to byte offset
+        :type id_index: dict
+        :return: UniProt accession => list of byte offsets
+        :rtype: dict
+        """
+        uniprot_index = {}
+        if self._uniprot_mapping_file is None:
+            return uniprot_index
+        with fileutils.open_input(self._uniprot_mapping_file) as f:
+            for line in f:
+                cols = line.rstrip('\r\n').split('\t')
+                if len(cols) <= self._uniprot_geneid_col:
+                    continue
+                for geneid in cols[self._uniprot_geneid_col].split(';'):
+                    geneid = geneid.strip()
+                    if geneid in id_index:
+                        uniprot_index.setdefault(cols[0], []).append(id_index[geneid])
+        return uniprot_index
+
+    def _get_offsets(self, query, scope, taxid):
+        """
+        Gets byte offsets of gene_info lines matching **query**
+
+        :return: list of byte offsets
+        :rtype: list
+        """
+        if scope not in self._index:
+            raise CellMapsPPIDownloaderError('Unsupported scope: ' + str(scope))
+        if scope == GeneInfoQuery.SYMBOL_SCOPE:
+            taxid_offsets = self._index[scope].get(query.upper())
+            if taxid_offsets is None:
+                return []
+            if taxid is None:
+                return [o for offsets in taxid_offsets.values()
+                        for o in offsets]
+            return taxid_offsets.get(taxid, [])
+        offset = self._index[scope].get(query)
+        if offset is None:
+            return []
+        if isinstance(offset, list):
+            return offset
+        return [offset]
+
+    def _get_result(self, query, offset, taxid):
+        """
+        Parses gene_info line at **offset** into dict matching format
+        returned by MyGene
+
+        :return: result or ``None`` if taxonomy id does not match **taxid**
+        :rtype: dict
+        """
+        end = self._mm.find(b'\n', offset)
+        if end == -1:
+            end = len(self._mm)
+        cols = self._mm[offset:end].rstrip(b'\r').decode().split('\t')
+        if taxid is not None and cols[GeneInfoQuery.TAXID_COL] != taxid:
+            return None
+        res = {'query': query,
+               '_id': cols[GeneInfoQuery.GENEID_COL],
+               'symbol': cols[GeneInfoQuery.SYMBOL_COL]}
+        ensembl_ids = [x[len(GeneInfoQuery.ENSEMBL_PREFIX):]
+                       for x in cols[GeneInfoQuery.DBXREFS_COL].split('|')
+                       if x.startswith(GeneInfoQuery.ENSEMBL_PREFIX)]
+        if len(ensembl_ids) == 1:
+            res['ensembl'] = {'gene': ensembl_ids[0]}
+        elif len(ensembl_ids) > 1:
+            res['ensembl'] = [{'gene': e} for e in ensembl_ids]
+        return res
+
+    def querymany(self, queries, species=None,
+                  scopes=None,
+                  fields=None):
+        """
+        Looks up **queries** in gene_info file returning results in
+        same format as :py:meth:`~cellmaps_ppidownloader.gene.GeneQuery.querymany`
+
+        :param queries: list of gene ids/symbols to query
+        :type queries: list
+        :param species: species name (ex: human) or NCBI taxonomy id
+        :type species: str
+        :param scopes: one of ``_id``, ``entrezgene``, ``symbol``,
+                       ``ensembl.gene`` or ``uniprot``
+        :type scopes: str
+        :param fields: Ignored, results always contain ``symbol`` and
+                       ``ensembl`` if available
+        :type fields: list
+        :raises CellMapsPPIDownloaderError: If scope is not supported
+        :return: list of dicts, one per hit with
+                 ``{'query': QUERY, 'notfound': True}`` for queries that
+                 do not match any gene
+        :rtype: list
+        """
+        self._load_index()
+        if scopes is None:
+            scopes = '_id'
+        taxid = self._get_taxid(species)
+        res = []
+        for query in queries:
+            query = str(query)
+            hits = []
+            for offset in self._get_offsets(query, scopes, taxid):
+                hit = self._get_result(query, offset, taxid)
+                if hit is not None:
+                    hits.append(hit)
+            if len(hits) == 0:
+                hits.append({'query': query, 'notfound': True})
+            res.extend(hits)
+        return res
+
+    def get_symbols_for_genes(self, genelist=None,
+                              scopes='_id'):
+        """
+        Looks up genes in gene_info file. Same contract as
+        :py:meth:`~cellmaps_ppidownloader.gene.GeneQuery.get_symbols_for_genes`
+
+        :param genelist: genes to query for valid symbols and ensembl ids
+        :type genelist: list
+        :param scopes: field to query on _id for gene id, ensembl.gene
+                       for ENSEMBL IDs, symbol for gene symbols and
+                       uniprot for UniProt accessions
+        :type scopes: str
+        :return: list of dict objects where each dict is of format:
+
+                 .. code-block::
+
+                     { 'query': 'ID',
+                       '_id': 'ID',
+                       'ensembl': { 'gene': 'ENSEMBLEID' },
+                       'symbol': 'GENESYMBOL' }
+        :rtype: list
+        """
+        return self.querymany(genelist,
+                              species='human',
+                              scopes=scopes,
+                              fields=['ensembl.gene', 'symbol'])
+
+    def close(self):
+        """
+        Closes memory mapped gene_info file or releases
+        decompressed copy
+        """
+        if self._mm is not None:
+            if isinstance(self._mm, mmap.mmap):
+                self._mm.close()
+            self._mm = None
+        self._index = None
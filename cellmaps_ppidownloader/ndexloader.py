@@ -0,0 +1,196 @@
+import os
+import json
+import logging
+import threading
+
+from cellmaps_ppidownloader.exceptions import CellMapsPPIDownloaderError
+
+logger = logging.getLogger(__name__)
+
+
+class NdexNetworkLoader(object):
+    """
+    Loads networks from `NDEx <https://www.ndexbio.org>`__ as
+    :py:class:`~ndex2.nice_cx_network.NiceCXNetwork` objects, keeping each
+    parsed network in memory by UUID so repeated requests for the
+    same network do not download and parse it again.
+
+    If **cachedir** is set, the raw CX of each network is also saved to
+    ``<cachedir>/<UUID>.cx`` and reused on later runs as long as the
+    modification time reported by NDEx has not changed.
+    """
+
+    DEFAULT_SERVER = 'http://public.ndexbio.org'
+
+    CHUNK_SIZE = 1024 * 1024
+    """
+    Size in bytes of chunks written when saving CX to cache directory
+    """
+
+    def __init__(self, server=DEFAULT_SERVER,
+                 cachedir=None,
+                 ndex_client=None):
+        """
+        Constructor
+
+        :param server: NDEx server to download networks from
+        :type server: str
+        :param cachedir: Directory to store downloaded CX files. If
+                         ``None`` networks are only cached in memory
+        :type cachedir: str
+        :param ndex_client: NDEx client, if ``None`` one is created
+                            when first needed
+        :type ndex_client: :py:class:`~ndex2.client.Ndex2`
+        """
+        self._server = server
+        self._cachedir = cachedir
+        self._client = ndex_client
+        self._networks = {}
+        self._lock = threading.Lock()
+
+    def _get_client(self):
+        """
+        Gets NDEx client, creating it if needed
+
+        :return:
+        :rtype: :py:class:`~ndex2.client.Ndex2`
+        """
+        if self._client is None:
+            from ndex2.client import Ndex2
+            self._client = Ndex2(host=self._server, skip_version_check=True)
+        return self._client
+
+    def _get_cx_file(self, uuid):
+        """
+        Gets path to CX file for **uuid** in cache directory
+        """
+        return os.path.join(self._cachedir, str(uuid) + '.cx')
+
+    def _get_cx_metadata_file(self, uuid):
+        """
+        Gets path to JSON file storing modification time of CX file
+        for **uuid** in cache directory
+        """
+        return os.path.join(self._cachedir, str(uuid) + '.json')
+
+    def _get_modification_time(self, uuid):
+        """
+        Gets modification time of network on NDEx
+
+        :return: modification time as reported by NDEx
+        """
+        summary = self._get_client().get_network_summary(str(uuid))
+        return summary.get('modificationTime')
+
+    def _is_cached_cx_file_valid(self, uuid, modification_time):
+        """
+        Checks if CX file in cache directory exists and was
+        saved for network with **modification_time**
+
+        :rtype: bool
+        """
+        metadata_file = self._get_cx_metadata_file(uuid)
+        if not os.path.isfile(self._get_cx_file(uuid)) or not os.path.isfile(metadata_file):
+            return False
+        with open(metadata_file, 'r') as f:
+            metadata = json.load(f)
+        return metadata.get('modificationTime') == modification_time
+
+    def _download_cx_file(self, uuid, modification_time):
+        """
+        Streams CX of network from NDEx into cache directory
+        """
+        os.makedirs(self._cachedir, exist_ok=True)
+        cx_file = self._get_cx_file(uuid)
+        tmp_cx_file = cx_file + '.tmp'
+        resp = self._get_client().get_network_as_cx_stream(str(uuid))
+        try:
+            if resp.status_code != 200:
+                raise CellMapsPPIDownloaderError('Unable to download network ' +
+                                                 str(uuid) + ' from ' + str(self._server) +
+                                                 ' status code: ' + str(resp.status_code))
+            with open(tmp_cx_file, 'wb') as f:
+                for chunk in resp.iter_content(chunk_size=NdexNetworkLoader.CHUNK_SIZE):
+                    f.write(chunk)
+        finally:
+            resp.close()
+        os.replace(tmp_cx_file, cx_file)
+        with open(self._get_cx_metadata_file(uuid), 'w') as f:
+            json.dump({'uuid': str(uuid),
+                       'server': self._server,
+                       'modificationTime': modification_time}, f)
+
+    def get_cx_file(self, uuid):
+        """
+        Gets path to up to date CX file for network in cache directory,
+        downloading it if it is missing or the network was modified on NDEx
+
+        :param uuid: UUID of network on NDEx
+        :type uuid: str
+        :raises CellMapsPPIDownloaderError: If no cache directory was set
+                                            or download fails
+        :return: path to CX file
+        :rtype: str
+        """
+        if self._cachedir is None:
+            raise CellMapsPPIDownloaderError('No cache directory set')
+        modification_time = self._get_modification_time(uuid)
+        if self._is_cached_cx_file_valid(uuid, modification_time):
+            logger.debug('Using cached CX for ' + str(uuid))
+        else:
+            logger.debug('Downloading CX for ' + str(uuid))
+            self._download_cx_file(uuid, modification_time)
+        return self._get_cx_file(uuid)
+
+    def open_cx_stream(self, uuid):
+        """
+        Opens CX of network with **uuid** as a binary stream. If a cache
+        directory was set, the stream is the up to date CX file in
+        that directory, otherwise it is the body of the download
+        from NDEx read as it arrives.
+
+        Caller must close the returned stream
+
+        :param uuid: UUID of network on NDEx
+        :type uuid: str
+        :raises CellMapsPPIDownloaderError: If download fails
+        :return: binary file-like object
+        """
+        if self._cachedir is not None:
+            return open(self.get_cx_file(uuid), 'rb')
+        resp = self._get_client().get_network_as_cx_stream(str(uuid))
+        if resp.status_code != 200:
+            resp.close()
+            raise CellMapsPPIDownloaderError('Unable to download network ' +
+                                             str(uuid) + ' from ' + str(self._server) +
+                                             ' status code: ' + str(resp.status_code))
+        resp.raw.decode_content = True
+        return resp.raw
+
+    def get_network(self, uuid):
+        """
+        Gets network with **uuid**, downloading and parsing it only
+        if it has not already been loaded by this object
+
+        :param uuid: UUID of network on NDEx
+        :type uuid: str
+        :return: network
+        :rtype: :py:class:`~ndex2.nice_cx_network.NiceCXNetwork`
+        """
+        with self._lock:
+            if uuid not in self._networks:
+                import ndex2
+                if self._cachedir is None:
+                    self._networks[uuid] = ndex2.create_nice_cx_from_server(self._server,
+                                                                            uuid=uuid,
+                                                                            ndex_client=self._client)
+                else:
+                    self._networks[uuid] = ndex2.create_nice_cx_from_file(self.get_cx_file(uuid))
+            return self._networks[uuid]
+
+    def clear(self):
+        """
+        Removes all networks held in memory
+        """
+        with self._lock:
+            self._networks.clear()
@@ -0,0 +1,250 @@
+import os
+import sys
+import time
+import logging
+import threading
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # pragma: no cover
+    # not available on Windows
+    resource = None
+
+from cellmaps_ppidownloader.exceptions import CellMapsPPIDownloaderError
+
+logger = logging.getLogger(__name__)
+
+
+def get_max_rss_kb():
+    """
+    Gets peak resident set size of this process in kilobytes
+
+    :return: peak memory or ``None`` if it can not be determined
+             on this platform
+    :rtype: int
+    """
+    if resource is None:
+        return None
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == 'darwin':
+        # reported in bytes on macOS, kilobytes elsewhere
+        max_rss = max_rss // 1024
+    return int(max_rss)
+
+
+def get_rss_kb():
+    """
+    Gets current resident set size of this process in kilobytes,
+    read from ``/proc/self/statm``
+
+    :return: current memory or ``None`` if it can not be determined
+             on this platform
+    :rtype: int
+    """
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            resident_pages = int(f.read().split()[1])
+    except (OSError, IndexError, ValueError):
+        return None
+    return resident_pages * os.sysconf('SC_PAGE_SIZE') // 1024
+
+
+def _subtract(end, start):
+    """
+    Gets **end** minus **start** or ``None`` if either is ``None``
+    """
+    if end is None or start is None:
+        return None
+    return end - start
+
+
+class StageTimer(object):
+    """
+    Records wall clock time and memory use of named stages
+    of a run. Safe to use from several threads. Memory is
+    measured for the whole process, so it is only attributed
+    to a stage that ran alone. Stages that overlap another
+    stage are marked ``overlapped`` and get ``None`` for
+    their memory change
+
+    .. code-block:: python
+
+        timer = StageTimer()
+        with timer.stage('download'):
+            pass
+        print(timer.get_stage_timings())
+    """
+
+    def __init__(self):
+        """
+        Constructor
+        """
+        self._stages = []
+        self._active = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name):
+        """
+        Context manager timing the enclosed block as stage **name**.
+        The stage is recorded even if the block raises an exception
+
+        :param name: name of stage
+        :type name: str
+        """
+        state = {'overlapped': False}
+        with self._lock:
+            if len(self._active) > 0:
+                state['overlapped'] = True
+                for active in self._active:
+                    active['overlapped'] = True
+            self._active.append(state)
+        start_rss = get_rss_kb()
+        start_max_rss = get_max_rss_kb()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            max_rss = get_max_rss_kb()
+            rss = get_rss_kb()
+            with self._lock:
+                self._active.remove(state)
+                overlapped = state['overlapped']
+                rss_delta = None
+                peak_rss_increase = None
+                if not overlapped:
+                    rss_delta = _subtract(rss, start_rss)
+                    peak_rss_increase = _subtract(max_rss, start_max_rss)
+                self._stages.append({'name': name,
+                                     'elapsed_time': round(elapsed, 6),
+                                     'overlapped': overlapped,
+                                     'rss_delta_kb': rss_delta,
+                                     'peak_rss_increase_kb': peak_rss_increase,
+                                     'process_max_rss_kb': max_rss})
+            logger.debug('Stage ' + str(name) + ' took ' +
+                         str(round(elapsed, 3)) + ' seconds')
+
+    def get_stage_timings(self):
+        """
+        Gets recorded stages in the order they finished
+
+        :return: list of dicts of format:
+
+                 .. code-block::
+
+                    {'name': STAGE NAME,
+                     'elapsed_time': SECONDS AS FLOAT,
+                     'overlapped': TRUE IF STAGE RAN WHILE ANOTHER STAGE RAN,
+                     'rss_delta_kb': CHANGE IN PROCESS MEMORY FROM START TO END OF STAGE IN KB,
+                     'peak_rss_increase_kb': AMOUNT STAGE RAISED PEAK MEMORY OF PROCESS IN KB,
+                     'process_max_rss_kb': PEAK MEMORY OF PROCESS SINCE IT STARTED IN KB}
+
+                 ``rss_delta_kb`` and ``peak_rss_increase_kb`` are ``None``
+                 for overlapped stages, since process memory can not be
+                 split between them. Memory values are also ``None`` if
+                 they can not be determined on this platform
+
+        :rtype: list
+        """
+        with self._lock:
+            return [dict(s) for s in self._stages]
+
+
+class RunProfiler(object):
+    """
+    Profiles a run with :py:mod:`cProfile` or, if installed,
+    `pyinstrument <https://pyinstrument.readthedocs.io>`__
+    and writes the result to a file
+    """
+
+    CPROFILE = 'cprofile'
+    PYINSTRUMENT = 'pyinstrument'
+
+    PROFILERS = [CPROFILE, PYINSTRUMENT]
+
+    CPROFILE_FILE = 'ppi_profile.prof'
+    """
+    :py:mod:`pstats` file written by :py:const:`CPROFILE` profiler
+    """
+
+    PYINSTRUMENT_FILE = 'ppi_profile.html'
+    """
+    HTML report written by :py:const:`PYINSTRUMENT` profiler
+    """
+
+    def __init__(self, profiler=CPROFILE):
+        """
+        Constructor
+
+        :param profiler: One of :py:const:`PROFILERS`
+        :type profiler: str
+        :raises CellMapsPPIDownloaderError: If **profiler** is unknown
+        """
+        if profiler not in RunProfiler.PROFILERS:
+            raise CellMapsPPIDownloaderError('Unknown profiler: ' + str(profiler) +
+                                             ' must be one of ' +
+                                             ', '.join(RunProfiler.PROFILERS))
+        self._profiler_name = profiler
+        self._profiler = None
+
+    def get_profile_file(self, outdir):
+        """
+        Gets path to file the profile is written to under **outdir**
+
+        :rtype: str
+        """
+        if self._profiler_name == RunProfiler.PYINSTRUMENT:
+            return os.path.join(outdir, RunProfiler.PYINSTRUMENT_FILE)
+        return os.path.join(outdir, RunProfiler.CPROFILE_FILE)
+
+    def start(self):
+        """
+        Starts profiling
+
+        :raises CellMapsPPIDownloaderError: If pyinstrument
+                                            profiler is requested but
+                                            not installed
+        """
+        if self._profiler_name == RunProfiler.PYINSTRUMENT:
+            try:
+                from pyinstrument import Profiler
+            except ImportError:
+                raise CellMapsPPIDownloaderError('pyinstrument profiler requested, '
+                                                 'but pyinstrument is not installed')
+            self._profiler = Profiler()
+        else:
+            import cProfile
+            self._profiler = cProfile.Profile()
+        if self._profiler_name == RunProfiler.PYINSTRUMENT:
+            self._profiler.start()
+        else:
+            self._profiler.enable()
+
+    def stop(self, outdir):
+        """
+        Stops profiling and writes profile to
+        :py:meth:`get_profile_file` if **outdir** exists
+
+        :return: path to profile written or ``None``
+        :rtype: str
+        """
+        if self._profiler is None:
+            return None
+        if self._profiler_name == RunProfiler.PYINSTRUMENT:
+            self._profiler.stop()
+        else:
+            self._profiler.disable()
+        if outdir is None or not os.path.isdir(outdir):
+            logger.error('Output directory does not exist, '
+                         'not writing profile')
+            return None
+        profile_file = self.get_profile_file(outdir)
+        if self._profiler_name == RunProfiler.PYINSTRUMENT:
+            with open(profile_file, 'w') as f:
+                f.write(self._profiler.output_html())
+        else:
+            self._profiler.dump_stats(profile_file)
+        logger.info('Wrote profile to ' + profile_file)
+        return profile_file
@@ -0,0 +1,232 @@
+import os
+import json
+import time
+import shutil
+import hashlib
+import logging
+import tempfile
+
+import cellmaps_ppidownloader
+from cellmaps_ppidownloader.exceptions import CellMapsPPIDownloaderError
+from cellmaps_ppidownloader import fileutils
+
+logger = logging.getLogger(__name__)
+
+
+class RunCache(object):
+    """
+    Content addressed cache of output files of
+    :py:meth:`~cellmaps_ppidownloader.runner.CellmapsPPIDownloader.run`.
+    Each entry is a directory named by a key from :py:meth:`get_key`,
+    which hashes the contents of the input files, the parameters that
+    affect outputs and the version of this package, so a run with the
+    same inputs can reuse the outputs of an earlier run.
+
+    Files are hardlinked, or if that fails reflinked or copied, into
+    and out of the cache via
+    :py:func:`~cellmaps_ppidownloader.fileutils.link_or_copy_file`.
+    If **max_age** is set, entries older than it are ignored and
+    replaced by the next :py:meth:`put` with the same key, otherwise
+    entries never expire. Remove the cache directory to clear it.
+
+    .. note::
+
+        A hardlinked output shares its contents with the cache entry
+        so output files should not be edited in place
+    """
+
+    ENTRY_FILE = 'cache_entry.json'
+    """
+    File in each entry listing files it holds, written last
+    so entries without it are incomplete and ignored
+    """
+
+    def __init__(self, cachedir=None, max_age=None):
+        """
+        Constructor
+
+        :param cachedir: directory holding cache entries, created
+                         when first entry is added
+        :type cachedir: str
+        :param max_age: Time in seconds after an entry is created that it
+                        is considered valid. If ``None`` entries never expire
+        :type max_age: float
+        """
+        if cachedir is None:
+            raise CellMapsPPIDownloaderError('cachedir is None')
+        self._cachedir = os.path.abspath(cachedir)
+        self._max_age = max_age
+
+    def get_cachedir(self):
+        """
+        Gets directory holding cache entries
+
+        :rtype: str
+        """
+        return self._cachedir
+
+    @staticmethod
+    def get_key(input_files=None, parameters=None):
+        """
+        Gets key of run with **input_files** and **parameters**, which
+        is a SHA-256 hex digest of the SHA-256 checksum of each input
+        file, **parameters** and the version of this package.
+        Paths of input files do not affect the key, only their contents
+
+        :param input_files: name => path to input file, entries with
+                            path of ``None`` are ignored
+        :type input_files: dict
+        :param parameters: name => value of each parameter that
+                           affects outputs. Values must be JSON
+                           serializable
+        :type parameters: dict
+        :rtype: str
+        """
+        checksums = {}
+        for name, path in (input_files or {}).items():
+            if path is None:
+                continue
+            checksums[name] = fileutils.sha256_file(path)
+        data = {'version': cellmaps_ppidownloader.__version__,
+                'input_files': checksums,
+                'parameters': parameters or {}}
+        return hashlib.sha256(json.dumps(data, sort_keys=True).encode('utf-8')).hexdigest()
+
+    def _get_entry_dir(self, key):
+        """
+        Gets directory of entry with **key**, under a subdirectory
+        named by the first two characters of **key** to keep
+        directories small
+
+        :rtype: str
+        """
+        return os.path.join(self._cachedir, key[:2], key)
+
+    def get_entry(self, key):
+        """
+        Gets complete entry with **key**
+
+        :param key: key from :py:meth:`get_key`
+        :type key: str
+        :return: contents of :py:const:`ENTRY_FILE` of entry with an
+                 added ``entrydir`` path to entry or ``None`` if
+                 not in cache or older than **max_age** set via
+                 constructor
+        :rtype: dict
+        """
+        entry_file = os.path.join(self._get_entry_dir(key), RunCache.ENTRY_FILE)
+        if not os.path.isfile(entry_file):
+            return None
+        with open(entry_file, 'r') as f:
+            entry = json.load(f)
+        if self._is_expired(entry):
+            logger.info('Run cache entry for key ' + key + ' is older than ' +
+                        str(self._max_age) + ' seconds, ignoring')
+            return None
+        entry['entrydir'] = os.path.dirname(entry_file)
+        return entry
+
+    def _is_expired(self, entry):
+        """
+        Checks if **entry** was created more than **max_age** seconds
+        ago. Entries without a creation time are treated as expired
+        when **max_age** is set
+
+        :param entry: contents of :py:const:`ENTRY_FILE`
+        :type entry: dict
+        :rtype: bool
+        """
+        if self._max_age is None:
+            return False
+        created = entry.get('created')
+        if created is None:
+            return True
+        return time.time() - created > self._max_age
+
+    def _remove_entry_dir(self, entrydir):
+        """
+        Removes **entrydir** by first renaming it so concurrent
+        runs never see a partially removed entry
+
+        :param entrydir: directory of entry
+        :type entrydir: str
+        """
+        olddir = tempfile.mkdtemp(prefix='.' + os.path.basename(entrydir) + '.old.',
+                                  dir=os.path.dirname(entrydir))
+        try:
+            os.rename(entrydir, os.path.join(olddir, 'entry'))
+        except OSError:
+            # another run already replaced the entry
+            logger.debug('Unable to move ' + entrydir + ' to ' + olddir)
+        shutil.rmtree(olddir)
+
+    def put(self, key, files):
+        """
+        Adds **files** to cache as entry with **key**. Files are put in
+        a temporary directory that is renamed to the entry directory so
+        concurrent runs never see a partial entry. If an entry with
+        **key** already exists it is kept, unless older than
+        **max_age** set via constructor in which case it is replaced
+
+        :param key: key from :py:meth:`get_key`
+        :type key: str
+        :param files: paths to files to add. Each is stored by its
+                      file name so names must be unique
+        :type files: list
+        :return: contents of :py:const:`ENTRY_FILE` of entry with an
+                 added ``entrydir`` path to entry
+        :rtype: dict
+        """
+        entrydir = self._get_entry_dir(key)
+        os.makedirs(os.path.dirname(entrydir), exist_ok=True)
+        tmpdir = tempfile.mkdtemp(prefix='.' + key + '.', dir=os.path.dirname(entrydir))
+        try:
+            entry = {'key': key,
+                     'version': cellmaps_ppidownloader.__version__,
+                     'created': int(time.time()),
+                     'files': {}}
+            for source in files:
+                name = os.path.basename(source)
+                method, sha256 = fileutils.link_or_copy_file(source,
+                                                             os.path.join(tmpdir, name),
+                                                             mode=fileutils.LINK_MODE)
+                entry['files'][name] = sha256
+            with open(os.path.join(tmpdir, RunCache.ENTRY_FILE), 'w') as f:
+                json.dump(entry, f, indent=2)
+            if os.path.isdir(entrydir) and self.get_entry(key) is None:
+                logger.info('Replacing expired run cache entry ' + entrydir)
+                self._remove_entry_dir(entrydir)
+            try:
+                os.rename(tmpdir, entrydir)
+                logger.info('Added ' + str(len(files)) + ' files to run cache ' + entrydir)
+            except OSError:
+                # another run added the same entry first
+                logger.debug('Run cache entry ' + entrydir + ' already exists')
+        finally:
+            if os.path.isdir(tmpdir):
+                shutil.rmtree(tmpdir)
+        return self.get_entry(key)
+
+    def materialize(self, entry, outdir):
+        """
+        Puts files of cache **entry** in **outdir** replacing
+        any existing files with the same name
+
+        :param entry: entry from :py:meth:`get_entry`
+        :type entry: dict
+        :param outdir: directory to put files in
+        :type outdir: str
+        :return: paths of files put in **outdir**
+        :rtype: list
+        """
+        outfiles = []
+        for name in sorted(entry['files'].keys()):
+            dest = os.path.join(outdir, name)
+            if os.path.lexists(dest):
+                os.remove(dest)
+            method, sha256 = fileutils.link_or_copy_file(os.path.join(entry['entrydir'], name),
+                                                         dest, mode=fileutils.LINK_MODE,
+                                                         checksum=False)
+            logger.debug('Put cached ' + name + ' in ' + outdir + ' via ' + method)
+            outfiles.append(dest)
+        return outfiles
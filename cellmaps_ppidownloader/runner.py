@@ -2,16 +2,21 @@
 
 import os
 import csv
+import json
 import logging
 import logging.config
 import time
 from datetime import date
-from tqdm import tqdm
+from concurrent.futures import ThreadPoolExecutor
 from cellmaps_utils import logutils
 from cellmaps_utils import constants
 from cellmaps_utils.provenance import ProvenanceUtil
 import cellmaps_ppidownloader
 from cellmaps_ppidownloader.exceptions import CellMapsPPIDownloaderError
+from cellmaps_ppidownloader.edgetable import EdgeTable
+from cellmaps_ppidownloader.profiling import StageTimer, RunProfiler
+from cellmaps_ppidownloader import fileutils
+from cellmaps_ppidownloader.columnar import ColumnarWriter
 
 logger = logging.getLogger(__name__)
 
@@ -25,14 +30,46 @@ class CellmapsPPIDownloader(object):
     BAITLIST_FILEKEY = 'baitlist'
     CM4AI_ROCRATE = 'cm4ai_rocrate'
 
+    PPI_GENE_NODE_IDS_FILE = 'ppi_gene_node_ids.tsv'
+    """
+    Gene node attributes keyed by gene id, read by later
+    runs that set **previous_outdir**
+    """
+
+    PPI_GENE_NODE_IDS_COL = 'GeneID'
+
+    PPI_CHANGELOG_FILE = 'ppi_changelog.json'
+    """
+    Differences from run in **previous_outdir**
+    """
+
+    WRITE_BUFFER_SIZE = 1024 * 1024
+    """
+    Size in bytes of buffer used when writing output TSV files
+    """
+
+    CHECKSUM_KEYWORD_PREFIX = 'sha256:'
+    """
+    Prefix of keyword holding SHA-256 checksum of input
+    datasets put in output directory
+    """
+
     def __init__(self, outdir=None,
                  imgsuffix='.jpg',
                  apmsgen=None,
                  skip_logging=True,
                  provenance=None,
                  input_data_dict=None,
-                 provenance_utils=ProvenanceUtil(),
-                 skip_failed=False):
+                 provenance_utils=None,
+                 skip_failed=False,
+                 previous_outdir=None,
+                 profiler=None,
+                 input_copy_mode=None,
+                 columnar_format=None,
+                 output_compression=None,
+                 run_cache=None,
+                 run_cache_key=None,
+                 run_cache_entry=None):
         """
         Constructor
 
@@ -83,6 +120,57 @@ class CellmapsPPIDownloader(object):
 
                     The `imgsuffix` parameter is deprecated and will be removed in a future release.
         :type imgsuffix: str
+        :param provenance_utils: Registers datasets and software in RO-Crate,
+                                 if ``None`` one is created
+        :type provenance_utils: :py:class:`~cellmaps_utils.provenance.ProvenanceUtil`
+        :param previous_outdir: Output directory of an earlier run. If set,
+                                gene node attributes from that run are reused
+                                so only genes not seen before are queried and
+                                a changelog of differences is written
+        :type previous_outdir: str
+        :param profiler: If set, one of
+                         :py:const:`~cellmaps_ppidownloader.profiling.RunProfiler.PROFILERS`
+                         used to profile :py:meth:`run` writing the profile
+                         to the output directory
+        :type profiler: str
+        :param input_copy_mode: How edgelist and baitlist input files are
+                                put in the output directory. If ``None``
+                                they are copied by FAIRSCAPE. Otherwise one
+                                of :py:const:`~cellmaps_ppidownloader.fileutils.COPY_MODES`
+                                passed to
+                                :py:func:`~cellmaps_ppidownloader.fileutils.link_or_copy_file`
+                                and the SHA-256 checksum of each file is
+                                recorded in the RO-Crate
+        :type input_copy_mode: str
+        :param columnar_format: If set, one of
+                                :py:const:`~cellmaps_ppidownloader.columnar.ColumnarWriter.FORMATS`
+                                and the ppi edgelist and gene node attributes
+                                are also written and registered in this format.
+                                Requires pyarrow
+        :type columnar_format: str
+        :param output_compression: If set, one of
+                                   :py:const:`~cellmaps_ppidownloader.fileutils.COMPRESSIONS`
+                                   and the ppi edgelist and gene node attributes
+                                   files are compressed in this format as they
+                                   are written. Uncompressed edgelist and
+                                   baitlist inputs are also compressed when put
+                                   in the output directory
+        :type output_compression: str
+        :param run_cache: If set along with **run_cache_key**, outputs are
+                          taken from this cache when it has an entry for
+                          **run_cache_key**, in which case **apmsgen** can
+                          be ``None``, otherwise outputs are added to it.
+                          The RO-Crate is always created
+        :type run_cache: :py:class:`~cellmaps_ppidownloader.runcache.RunCache`
+        :param run_cache_key: key of this run from
+                              :py:meth:`~cellmaps_ppidownloader.runcache.RunCache.get_key`
+        :type run_cache_key: str
+        :param run_cache_entry: entry of **run_cache** for **run_cache_key**
+                                already looked up by the caller. If set,
+                                outputs are taken from it without looking
+                                it up again, so it is used even if it
+                                expires or is replaced before :py:meth:`run`
+        :type run_cache_entry: dict
         """
         if outdir is None:
             raise CellMapsPPIDownloaderError('outdir is None')
@@ -100,8 +188,38 @@ class CellmapsPPIDownloader(object):
         self._inputdataset_ids = []
         self._softwareid = None
         self._apms_gene_attrid = None
+        if provenance_utils is None:
+            provenance_utils = ProvenanceUtil()
         self._provenance_utils = provenance_utils
         self.skip_failed = skip_failed
+        if previous_outdir is None:
+            self._previous_outdir = None
+        else:
+            self._previous_outdir = os.path.abspath(previous_outdir)
+        self._stage_timer = StageTimer()
+        if profiler is None:
+            self._profiler = None
+        else:
+            self._profiler = RunProfiler(profiler=profiler)
+        if input_copy_mode is not None and input_copy_mode not in fileutils.COPY_MODES:
+            raise CellMapsPPIDownloaderError('Unknown input_copy_mode: ' + str(input_copy_mode) +
+                                             ' must be one of ' + ', '.join(fileutils.COPY_MODES))
+        self._input_copy_mode = input_copy_mode
+        self._input_checksums = {}
+        if columnar_format is None:
+            self._columnar_writer = None
+        else:
+            self._columnar_writer = ColumnarWriter(columnar_format=columnar_format)
+        self._columnar_ids = []
+        self._gene_node_ids_ids = []
+        if output_compression is not None and output_compression not in fileutils.COMPRESSIONS:
+            raise CellMapsPPIDownloaderError('Unknown output_compression: ' + str(output_compression) +
+                                             ' must be one of ' + ', '.join(fileutils.COMPRESSIONS))
+        self._output_compression = output_compression
+        self._run_cache = run_cache
+        self._run_cache_key = run_cache_key
+        self._run_cache_entry = run_cache_entry
+        self._run_cache_hit = None
 
         if self._input_data_dict is None or not self._input_data_dict:
             self._input_data_dict = {'outdir': self._outdir,
@@ -212,6 +330,26 @@ class CellmapsPPIDownloader(object):
                                                                     keywords=software_keywords,
                                                                     url=cellmaps_ppidownloader.__repo_url__)
 
+    @staticmethod
+    def _get_data_format(data_format='tsv', compression=None):
+        """
+        Gets data format to register for a file in **data_format**
+        compressed in format **compression**
+
+        :param data_format: format of file once decompressed
+        :type data_format: str
+        :param compression: One of
+                            :py:const:`~cellmaps_ppidownloader.fileutils.COMPRESSIONS`
+                            or ``None`` if file is not compressed
+        :type compression: str
+        :return: **data_format** with compression suffix appended
+                 (ex: ``tsv.gz``) or **data_format** if **compression**
+                 is ``None``
+        :rtype: str
+        """
+        return fileutils.get_compressed_file(data_format,
+                                             compression=compression)
+
     def _register_apms_gene_node_attrs(self):
         """
         Registers image_gene_node_attributes.tsv file with create as a dataset
@@ -222,7 +360,7 @@ class CellmapsPPIDownloader(object):
         description = self._provenance['description'] + ' AP-MS gene node attributes file'
         data_dict = {'name': cellmaps_ppidownloader.__name__ + ' output file',
                      'description': description,
-                     'data-format': 'tsv',
+                     'data-format': self._get_data_format(compression=self._output_compression),
                      'author': cellmaps_ppidownloader.__author__,
                      'version': cellmaps_ppidownloader.__version__,
                      'schema': 'https://raw.githubusercontent.com/fairscape/cm4ai-schemas/main/v0.1.0/cm4ai_schema_apmsloader_ppi_gene_node_attributes.json',
@@ -241,7 +379,7 @@ class CellmapsPPIDownloader(object):
         description = self._provenance['description'] + ' AP-MS ppi edgelist file'
         data_dict = {'name': cellmaps_ppidownloader.__name__ + ' ppi edgelist file',
                      'description': description,
-                     'data-format': 'tsv',
+                     'data-format': self._get_data_format(compression=self._output_compression),
                      'author': cellmaps_ppidownloader.__author__,
                      'version': cellmaps_ppidownloader.__version__,
                      'schema': 'https://raw.githubusercontent.com/fairscape/cm4ai-schemas/main/v0.1.0/cm4ai_schema_apmsloader_ppi_edgelist.json',
@@ -249,6 +387,80 @@ class CellmapsPPIDownloader(object):
         self._provenance_utils.register_dataset(self._outdir, source_file=self.get_ppi_edgelist_file(),
                                                 data_dict=data_dict)
 
+    def _register_ppi_gene_node_ids(self):
+        """
+        Registers gene node attributes keyed by gene id file, and
+        changelog file if written, with crate as datasets
+        """
+        keywords = self._provenance['keywords']
+        keywords.extend(['gene', 'attributes', 'ids', 'file'])
+        data_dict = {'name': cellmaps_ppidownloader.__name__ + ' gene node ids file',
+                     'description': self._provenance['description'] +
+                     ' AP-MS gene node attributes keyed by gene id file',
+                     'data-format': self._get_data_format(compression=self._output_compression),
+                     'author': cellmaps_ppidownloader.__author__,
+                     'version': cellmaps_ppidownloader.__version__,
+                     'date-published': date.today().strftime(self._provenance_utils.get_default_date_format_str())}
+        self._gene_node_ids_ids.append(self._provenance_utils.register_dataset(self._outdir,
+                                                                               source_file=self.get_ppi_gene_node_ids_file(),
+                                                                               data_dict=data_dict))
+        if not os.path.isfile(self.get_ppi_changelog_file()):
+            return
+        data_dict = dict(data_dict)
+        data_dict.update({'name': cellmaps_ppidownloader.__name__ + ' ppi changelog file',
+                          'description': self._provenance['description'] +
+                          ' AP-MS changes from previous run file',
+                          'data-format': 'json'})
+        self._gene_node_ids_ids.append(self._provenance_utils.register_dataset(self._outdir,
+                                                                               source_file=self.get_ppi_changelog_file(),
+                                                                               data_dict=data_dict))
+
+    def get_columnar_files(self):
+        """
+        Gets full paths to columnar copies of the ppi gene node attributes
+        and edgelist files written when **columnar_format** is set
+
+        :return: paths or empty list if **columnar_format** is not set
+        :rtype: list
+        """
+        if self._columnar_writer is None:
+            return []
+        return [self._columnar_writer.get_columnar_file(self.get_ppi_gene_node_attributes_file()),
+                self._columnar_writer.get_columnar_file(self.get_ppi_edgelist_file())]
+
+    def _write_columnar_outputs(self):
+        """
+        Writes columnar copies of ppi gene node attributes and
+        edgelist files if **columnar_format** is set
+        """
+        if self._columnar_writer is None:
+            return
+        self._columnar_writer.write(self.get_ppi_gene_node_attributes_file())
+        self._columnar_writer.write(self.get_ppi_edgelist_file())
+
+    def _register_columnar_outputs(self):
+        """
+        Registers files from :py:meth:`get_columnar_files` as datasets
+        """
+        if self._columnar_writer is None:
+            return
+        columnar_format = self._columnar_writer.get_format()
+        for columnar_file, desc in zip(self.get_columnar_files(),
+                                       ['AP-MS gene node attributes', 'AP-MS ppi edgelist']):
+            keywords = self._provenance['keywords']
+            keywords.extend([columnar_format, 'file'])
+            data_dict = {'name': cellmaps_ppidownloader.__name__ + ' ' + desc + ' ' +
+                         columnar_format + ' file',
+                         'description': self._provenance['description'] + ' ' + desc +
+                         ' ' + columnar_format + ' file',
+                         'data-format': columnar_format,
+                         'author': cellmaps_ppidownloader.__author__,
+                         'version': cellmaps_ppidownloader.__version__,
+                         'date-published': date.today().strftime(self._provenance_utils.get_default_date_format_str())}
+            self._columnar_ids.append(self._provenance_utils.register_dataset(self._outdir,
+                                                                              source_file=columnar_file,
+                                                                              data_dict=data_dict))
+
     def _add_dataset_to_crate(self, data_dict=None,
                               source_file=None, skip_copy=True):
         """
@@ -262,6 +474,104 @@ class CellmapsPPIDownloader(object):
                                                        data_dict=data_dict,
                                                        skip_copy=skip_copy)
 
+    def _add_input_dataset_to_crate(self, filekey=None):
+        """
+        Registers input file **filekey** from input data dict
+        passed in via constructor. If **output_compression** was set
+        and the file is not already compressed, a compressed copy is
+        written to the output directory by
+        :py:func:`~cellmaps_ppidownloader.fileutils.compress_file`.
+        A compressed file is registered with its compression suffix
+        appended to its data format, for example ``tsv.gz``.
+        Otherwise, if **input_copy_mode** was set, the
+        file is linked or copied into the output directory by
+        :py:func:`~cellmaps_ppidownloader.fileutils.link_or_copy_file`.
+        Either way the file is registered without a copy by FAIRSCAPE,
+        with its SHA-256 checksum in its keywords and description.
+        If neither was set FAIRSCAPE copies the file
+
+        :param filekey: :py:const:`EDGELIST_FILEKEY` or :py:const:`BAITLIST_FILEKEY`
+        :type filekey: str
+        :return: dataset id
+        :rtype: str
+        """
+        source_file = os.path.abspath(self._input_data_dict[filekey])
+        source_compression = fileutils.get_compression(source_file)
+        compress = self._output_compression is not None and \
+            source_compression is None
+        data_dict = self._provenance[filekey]
+        compression = self._output_compression if compress else source_compression
+        if compression is not None:
+            data_dict = dict(data_dict)
+            data_dict['data-format'] = self._get_data_format(data_format=data_dict.get('data-format',
+                                                                                       'tsv'),
+                                                             compression=compression)
+        if self._input_copy_mode is None and not compress:
+            return self._add_dataset_to_crate(data_dict=data_dict,
+                                              source_file=source_file,
+                                              skip_copy=False)
+
+        dest_file = os.path.join(self._outdir, os.path.basename(source_file))
+        if compress:
+            dest_file = fileutils.get_compressed_file(dest_file,
+                                                      compression=self._output_compression)
+            method = self._output_compression
+            sha256 = fileutils.compress_file(source_file, dest_file,
+                                             compression=self._output_compression)
+            dest_sha256 = fileutils.sha256_file(dest_file)
+        else:
+            method, sha256 = fileutils.link_or_copy_file(source_file, dest_file,
+                                                         mode=self._input_copy_mode)
+            dest_sha256 = sha256
+        logger.info('Put ' + source_file + ' in output directory via ' + method)
+        datasetid = self._add_dataset_to_crate(data_dict=self._get_data_dict_with_checksum(data_dict,
+                                                                                           dest_sha256),
+                                               source_file=dest_file,
+                                               skip_copy=True)
+        self._input_checksums[filekey] = {'source': source_file,
+                                          'method': method,
+                                          'sha256': sha256}
+        return datasetid
+
+    @staticmethod
+    def _get_data_dict_with_checksum(data_dict, sha256):
+        """
+        Gets copy of dataset registration **data_dict** with SHA-256
+        checksum added as a keyword prefixed with
+        :py:const:`CHECKSUM_KEYWORD_PREFIX` and appended to the
+        description, so it is recorded in the RO-Crate by FAIRSCAPE
+        along with the rest of the dataset
+
+        :param data_dict: dataset registration information
+        :type data_dict: dict
+        :param sha256: hex digest of SHA-256 checksum of dataset
+        :type sha256: str
+        :return: copy of **data_dict** with checksum
+        :rtype: dict
+        """
+        data_dict = dict(data_dict)
+        keywords = data_dict.get('keywords', [])
+        if isinstance(keywords, str):
+            keywords = [keywords]
+        data_dict['keywords'] = list(keywords) + [CellmapsPPIDownloader.CHECKSUM_KEYWORD_PREFIX +
+                                                  sha256]
+        if 'description' in data_dict:
+            data_dict['description'] = data_dict['description'] + ' SHA-256: ' + sha256
+        return data_dict
+
+    def get_input_checksums(self):
+        """
+        Gets checksums of input files linked, copied or compressed into
+        the output directory when **input_copy_mode** or
+        **output_compression** is set. Checksums are of the source file,
+        before any compression. Also written to task_finish.json
+
+        :return: file key => {'source': PATH, 'method': METHOD,
+                 'sha256': CHECKSUM}
+        :rtype: dict
+        """
+        return dict(self._input_checksums)
+
     def _register_computation(self):
         """
 
@@ -278,7 +588,8 @@ class CellmapsPPIDownloader(object):
                                                     keywords=keywords,
                                                     used_software=[self._softwareid],
                                                     used_dataset=self._inputdataset_ids,
-                                                    generated=[self._apms_gene_attrid])
+                                                    generated=[self._apms_gene_attrid] +
+                                                    self._gene_node_ids_ids + self._columnar_ids)
 
     def _create_rocrate(self):
         """
@@ -322,10 +633,8 @@ class CellmapsPPIDownloader(object):
             if CellmapsPPIDownloader.EDGELIST_FILEKEY in self._input_data_dict and \
                 self._input_data_dict[CellmapsPPIDownloader.EDGELIST_FILEKEY] is not None:
                 # write file and add samples dataset
-                edgelist_datasetid = self._add_dataset_to_crate(
-                    data_dict=self._provenance[CellmapsPPIDownloader.EDGELIST_FILEKEY],
-                    source_file=os.path.abspath(self._input_data_dict[CellmapsPPIDownloader.EDGELIST_FILEKEY]),
-                    skip_copy=False)
+                edgelist_datasetid = self._add_input_dataset_to_crate(
+                    filekey=CellmapsPPIDownloader.EDGELIST_FILEKEY)
                 self._inputdataset_ids.append(edgelist_datasetid)
                 logger.debug('Edgelist dataset id: ' + str(edgelist_datasetid))
 
@@ -333,10 +642,8 @@ class CellmapsPPIDownloader(object):
             if CellmapsPPIDownloader.BAITLIST_FILEKEY in self._input_data_dict and \
                 self._input_data_dict[CellmapsPPIDownloader.BAITLIST_FILEKEY] is not None:
                 # write file and add unique dataset
-                baitlist_datasetid = self._add_dataset_to_crate(
-                    data_dict=self._provenance[CellmapsPPIDownloader.BAITLIST_FILEKEY],
-                    source_file=os.path.abspath(self._input_data_dict[CellmapsPPIDownloader.BAITLIST_FILEKEY]),
-                    skip_copy=False)
+                baitlist_datasetid = self._add_input_dataset_to_crate(
+                    filekey=CellmapsPPIDownloader.BAITLIST_FILEKEY)
                 self._inputdataset_ids.append(baitlist_datasetid)
                 logger.debug('Baitlist dataset id: ' + str(baitlist_datasetid))
         if CellmapsPPIDownloader.CM4AI_ROCRATE in self._provenance:
@@ -360,16 +667,73 @@ class CellmapsPPIDownloader(object):
                                        version=cellmaps_ppidownloader.__version__,
                                        data=data)
 
+    def _write_task_finish_json(self, status=None):
+        """
+        Writes task_finish.json file adding a ``stages`` list
+        with timings from :py:meth:`get_stage_timings`,
+        ``input_checksums`` from :py:meth:`get_input_checksums`
+        and, if a run cache was used, ``run_cache`` with the
+        key and whether it was a hit
+
+        :param status: exit code of run
+        :type status: int
+        """
+        logutils.write_task_finish_json(outdir=self._outdir,
+                                        start_time=self._start_time,
+                                        end_time=self._end_time,
+                                        status=status)
+        task_finish_file = os.path.join(self._outdir,
+                                        constants.TASK_FILE_PREFIX +
+                                        str(self._start_time) +
+                                        constants.TASK_FINISH_FILE_SUFFIX)
+        if not os.path.isfile(task_finish_file):
+            return
+        with open(task_finish_file, 'r') as f:
+            task = json.load(f)
+        task['stages'] = self.get_stage_timings()
+        if len(self._input_checksums) > 0:
+            task['input_checksums'] = self.get_input_checksums()
+        if self._run_cache_hit is not None:
+            task['run_cache'] = {'key': self._run_cache_key,
+                                 'hit': self._run_cache_hit}
+        with open(task_finish_file, 'w') as f:
+            json.dump(task, f, indent=2)
+
+    def get_stage_timings(self):
+        """
+        Gets wall clock time and memory use of each stage
+        of :py:meth:`run` that has finished. Also written
+        to task_finish.json
+
+        :return: list of dicts of format:
+
+                 .. code-block::
+
+                    {'name': STAGE NAME,
+                     'elapsed_time': SECONDS AS FLOAT,
+                     'overlapped': TRUE IF STAGE RAN WHILE ANOTHER STAGE RAN,
+                     'rss_delta_kb': CHANGE IN MEMORY DURING STAGE IN KB,
+                     'peak_rss_increase_kb': AMOUNT STAGE RAISED PEAK MEMORY IN KB,
+                     'process_max_rss_kb': PEAK MEMORY OF PROCESS SO FAR IN KB}
+
+                 See :py:meth:`~cellmaps_ppidownloader.profiling.StageTimer.get_stage_timings`
+
+        :rtype: list
+        """
+        return self._stage_timer.get_stage_timings()
+
     def get_ppi_gene_node_attributes_file(self):
         """
         Gets full path to ppi gene node attribute file under output directory
-        created when invoking :py:meth:`~cellmaps_downloader.runner.CellmapsPPIDownloader.run`
+        created when invoking :py:meth:`~cellmaps_downloader.runner.CellmapsPPIDownloader.run`.
+        Ends with compression suffix if **output_compression** is set
 
         :return: Path to file
         :rtype: str
         """
-        return os.path.join(self._outdir,
-                            constants.PPI_GENE_NODE_ATTR_FILE)
+        return fileutils.get_compressed_file(os.path.join(self._outdir,
+                                                          constants.PPI_GENE_NODE_ATTR_FILE),
+                                             compression=self._output_compression)
 
     def get_ppi_gene_node_errors_file(self):
         """
@@ -385,60 +749,237 @@ class CellmapsPPIDownloader(object):
     def _write_ppi_gene_node_attrs(self, gene_node_attrs=None,
                                    errors=None):
         """
+        Writes **gene_node_attrs** passing all rows to a single
+        :py:meth:`csv.DictWriter.writerows` call through a
+        file buffer of :py:const:`WRITE_BUFFER_SIZE` bytes,
+        compressed if **output_compression** is set
 
         :param gene_node_attrs:
         :param errors:
         :return:
         """
-        with open(self.get_ppi_gene_node_attributes_file(), 'w', newline='') as f:
+        with fileutils.open_output(self.get_ppi_gene_node_attributes_file(),
+                                   compression=self._output_compression,
+                                   newline='',
+                                   buffer_size=CellmapsPPIDownloader.WRITE_BUFFER_SIZE) as f:
             writer = csv.DictWriter(f, fieldnames=constants.PPI_GENE_NODE_COLS, delimiter='\t')
 
             writer.writeheader()
-            for key in gene_node_attrs:
-                writer.writerow(gene_node_attrs[key])
+            writer.writerows(gene_node_attrs.values())
 
         if errors is not None:
             with open(self.get_ppi_gene_node_errors_file(), 'w') as f:
-                for e in errors:
-                    f.write(str(e) + '\n')
+                f.writelines(str(e) + '\n' for e in errors)
 
-    def get_ppi_edgelist_file(self):
+    def get_ppi_gene_node_ids_file(self):
         """
+        Gets full path to gene node attributes keyed by gene id file.
+        Ends with compression suffix if **output_compression** is set
 
-        :return:
+        :return: Path to file
+        :rtype: str
+        """
+        return fileutils.get_compressed_file(os.path.join(self._outdir,
+                                                          CellmapsPPIDownloader.PPI_GENE_NODE_IDS_FILE),
+                                             compression=self._output_compression)
+
+    def _get_previous_outdir_file(self, filename):
+        """
+        Gets path to **filename** in **previous_outdir**, which the
+        previous run may have compressed
+
+        :return: path to file or ``None`` if not found
+        :rtype: str
+        """
+        for compression in [None] + fileutils.COMPRESSIONS:
+            candidate = fileutils.get_compressed_file(os.path.join(self._previous_outdir,
+                                                                   filename),
+                                                      compression=compression)
+            if os.path.isfile(candidate):
+                return candidate
+        return None
+
+    def get_ppi_changelog_file(self):
+        """
+        Gets full path to changelog file written when
+        **previous_outdir** is set
+
+        :return: Path to file
+        :rtype: str
         """
         return os.path.join(self._outdir,
-                            constants.PPI_EDGELIST_FILE)
+                            CellmapsPPIDownloader.PPI_CHANGELOG_FILE)
+
+    def _write_ppi_gene_node_ids(self, gene_node_attrs=None):
+        """
+        Writes **gene_node_attrs** with gene id as first column so
+        a later run can reuse them via **previous_outdir**
+
+        :param gene_node_attrs:
+        """
+        fieldnames = [CellmapsPPIDownloader.PPI_GENE_NODE_IDS_COL] + constants.PPI_GENE_NODE_COLS
+        with fileutils.open_output(self.get_ppi_gene_node_ids_file(),
+                                   compression=self._output_compression,
+                                   newline='',
+                                   buffer_size=CellmapsPPIDownloader.WRITE_BUFFER_SIZE) as f:
+            writer = csv.writer(f, delimiter='\t')
+            writer.writerow(fieldnames)
+            writer.writerows([geneid] + [attrs.get(c) for c in constants.PPI_GENE_NODE_COLS]
+                             for geneid, attrs in gene_node_attrs.items())
+
+    def _load_previous_gene_node_attrs(self):
+        """
+        Loads gene node attributes written by run in **previous_outdir**
+
+        :raises CellMapsPPIDownloaderError: If gene node ids file is
+                                            not found in **previous_outdir**
+        :return: gene id => gene node attributes
+        :rtype: dict
+        """
+        ids_file = self._get_previous_outdir_file(CellmapsPPIDownloader.PPI_GENE_NODE_IDS_FILE)
+        if ids_file is None:
+            raise CellMapsPPIDownloaderError(os.path.join(self._previous_outdir,
+                                                          CellmapsPPIDownloader.PPI_GENE_NODE_IDS_FILE) +
+                                             ' not found. previous_outdir must be '
+                                             'from a run that wrote ' +
+                                             CellmapsPPIDownloader.PPI_GENE_NODE_IDS_FILE)
+        gene_node_attrs = {}
+        with fileutils.open_input(ids_file, newline='') as f:
+            reader = csv.DictReader(f, delimiter='\t')
+            for row in reader:
+                geneid = row.pop(CellmapsPPIDownloader.PPI_GENE_NODE_IDS_COL)
+                row['bait'] = row['bait'] == 'True'
+                gene_node_attrs[geneid] = row
+        logger.info('Loaded ' + str(len(gene_node_attrs)) + ' genes from ' + ids_file)
+        return gene_node_attrs
+
+    @staticmethod
+    def _read_ppi_edgelist_set(edgelist_file):
+        """
+        Reads edges in **edgelist_file** into a set
+
+        :return: set of ``(geneA, geneB)`` tuples
+        :rtype: set
+        """
+        with fileutils.open_input(edgelist_file, newline='') as f:
+            reader = csv.reader(f, delimiter='\t')
+            next(reader, None)
+            return set(tuple(row) for row in reader)
+
+    def _write_ppi_changelog(self, previous_gene_node_attrs=None,
+                             gene_node_attrs=None):
+        """
+        Writes JSON file listing genes and edges added and removed
+        compared to run in **previous_outdir**
+
+        :param previous_gene_node_attrs: gene node attributes from
+                                         previous run
+        :type previous_gene_node_attrs: dict
+        :param gene_node_attrs: gene node attributes from this run
+        :type gene_node_attrs: dict
+        """
+        changelog = {'previous_outdir': self._previous_outdir,
+                     'genes': {'added': sorted(gene_node_attrs.keys() - previous_gene_node_attrs.keys()),
+                               'removed': sorted(previous_gene_node_attrs.keys() - gene_node_attrs.keys()),
+                               'reused': len(gene_node_attrs.keys() & previous_gene_node_attrs.keys())}}
+        previous_edgelist_file = self._get_previous_outdir_file(constants.PPI_EDGELIST_FILE)
+        if previous_edgelist_file is not None:
+            previous_edges = CellmapsPPIDownloader._read_ppi_edgelist_set(previous_edgelist_file)
+            edges = CellmapsPPIDownloader._read_ppi_edgelist_set(self.get_ppi_edgelist_file())
+            changelog['edges'] = {'added': sorted(edges - previous_edges),
+                                  'removed': sorted(previous_edges - edges),
+                                  'unchanged': len(edges & previous_edges)}
+        with open(self.get_ppi_changelog_file(), 'w') as f:
+            json.dump(changelog, f, indent=2)
+        logger.info('Compared to previous run ' + str(len(changelog['genes']['added'])) +
+                    ' genes added and ' + str(len(changelog['genes']['removed'])) +
+                    ' genes removed')
+
+    def get_ppi_edgelist_file(self):
+        """
+        Gets full path to ppi edgelist file under output directory.
+        Ends with compression suffix if **output_compression** is set
+
+        :return: Path to file
+        :rtype: str
+        """
+        return fileutils.get_compressed_file(os.path.join(self._outdir,
+                                                          constants.PPI_EDGELIST_FILE),
+                                             compression=self._output_compression)
+
+    @staticmethod
+    def _iter_edge_geneids(edgelist):
+        """
+        Generator that yields ``(GeneID1, GeneID2, edge)`` for each edge
+        in **edgelist** where edge is a callable returning the full edge
+        for log messages
+
+        :param edgelist: iterable of dicts or
+                         :py:class:`~cellmaps_ppidownloader.edgetable.EdgeTable`
+        :rtype: tuple
+        """
+        if isinstance(edgelist, EdgeTable):
+            # read only the two id columns instead of building a dict per edge
+            for index, (geneid1, geneid2) in enumerate(zip(edgelist.get_column('GeneID1'),
+                                                            edgelist.get_column('GeneID2'))):
+                yield geneid1, geneid2, lambda i=index: edgelist[i]
+        else:
+            for edge in edgelist:
+                yield edge['GeneID1'], edge['GeneID2'], lambda e=edge: e
+
+    @staticmethod
+    def _iter_ppi_edgelist_rows(edgelist=None, gene_node_attrs=None):
+        """
+        Generator that yields ``(geneA, geneB)`` symbol pairs for edges
+        in **edgelist** skipping, with an error logged, any edge where a gene
+        lacks a symbol in **gene_node_attrs**
+
+        :rtype: tuple
+        """
+        for geneid1, geneid2, edge in CellmapsPPIDownloader._iter_edge_geneids(edgelist):
+            if geneid1 not in gene_node_attrs:
+                logger.error('Skipping ' + str(geneid1 + ' cause it lacks a symbol'))
+                continue
+            if geneid2 not in gene_node_attrs:
+                logger.error('Skipping ' + str(geneid2 + ' cause it lacks a symbol'))
+                continue
+
+            genea = gene_node_attrs[geneid1]['name']
+            geneb = gene_node_attrs[geneid2]['name']
+            if genea is None or geneb is None:
+                logger.error('Skipping edge cause no symbol is found: ' + str(edge()))
+                continue
+            if len(genea) == 0 or len(geneb) == 0:
+                logger.error('Skipping edge cause no symbol is found: ' + str(edge()))
+                continue
+            yield genea, geneb
 
     def _write_ppi_network(self, edgelist=None,
                            gene_node_attrs=None):
         """
-
-        :param edgelist:
+        Streams edges from **edgelist** through symbol lookup in
+        **gene_node_attrs** into the edgelist file. Only one edge is
+        held at a time, aside from what **edgelist** itself holds,
+        and output is written through a file buffer of
+        :py:const:`WRITE_BUFFER_SIZE` bytes. If **output_compression**
+        is set, buffered chunks are compressed in a background thread or
+        process while later rows are produced
+
+        :param edgelist: iterable of dicts, such as
+                         :py:class:`~cellmaps_ppidownloader.edgetable.EdgeTable`
+                         or :py:class:`~cellmaps_ppidownloader.edgetable.TSVEdgeReader`,
+                         with ``GeneID1`` and ``GeneID2`` columns
         :param gene_node_attrs:
         :return:
         """
-        with open(self.get_ppi_edgelist_file(), 'w', newline='') as f:
-            writer = csv.DictWriter(f, fieldnames=constants.PPI_EDGELIST_COLS, delimiter='\t')
-            writer.writeheader()
-            for edge in edgelist:
-                if edge['GeneID1'] not in gene_node_attrs:
-                    logger.error('Skipping ' + str(edge['GeneID1'] + ' cause it lacks a symbol'))
-                    continue
-                if edge['GeneID2'] not in gene_node_attrs:
-                    logger.error('Skipping ' + str(edge['GeneID2'] + ' cause it lacks a symbol'))
-                    continue
-
-                genea = gene_node_attrs[edge['GeneID1']]['name']
-                geneb = gene_node_attrs[edge['GeneID2']]['name']
-                if genea is None or geneb is None:
-                    logger.error('Skipping edge cause no symbol is found: ' + str(edge))
-                    continue
-                if len(genea) == 0 or len(geneb) == 0:
-                    logger.error('Skipping edge cause no symbol is found: ' + str(edge))
-                    continue
-                writer.writerow({constants.PPI_EDGELIST_COLS[0]: genea,
-                                 constants.PPI_EDGELIST_COLS[1]: geneb})
+        with fileutils.open_output(self.get_ppi_edgelist_file(),
+                                   compression=self._output_compression,
+                                   newline='',
+                                   buffer_size=CellmapsPPIDownloader.WRITE_BUFFER_SIZE) as f:
+            writer = csv.writer(f, delimiter='\t')
+            writer.writerow(constants.PPI_EDGELIST_COLS)
+            writer.writerows(CellmapsPPIDownloader._iter_ppi_edgelist_rows(edgelist=edgelist,
+                                                                           gene_node_attrs=gene_node_attrs))
 
     def generate_readme(self):
         description = getattr(cellmaps_ppidownloader, '__description__', 'No description provided.')
@@ -451,23 +992,47 @@ class CellmapsPPIDownloader(object):
         with open(os.path.join(self._outdir, 'README.txt'), 'w') as f:
             f.write(readme)
 
-    def run(self):
+    def _get_gene_node_attributes(self):
         """
-        Downloads ppi data to output directory specified in constructor
-
-        :raises CellMapsPPIDownloaderError: If there is an error
-        :return: 0 upon success, otherwise failure
+        Gets gene node attributes from generator passed in via
+        constructor, first loading attributes from **previous_outdir**
+        if set. Run by :py:meth:`run` in a separate thread while
+        datasets are registered
+
+        :return: (previous gene node attributes or ``None``,
+                  gene node attributes, errors)
+        :rtype: tuple
         """
-        try:
-            exitcode = 99
-            self._create_output_directory()
-            if self._skip_logging is False:
-                logutils.setup_filelogger(outdir=self._outdir,
-                                          handlerprefix='cellmaps_ppidownloader')
-            self._write_task_start_json()
+        with self._stage_timer.stage('gene_node_attributes'):
+            previous_gene_node_attrs = None
+            if self._previous_outdir is not None:
+                previous_gene_node_attrs = self._load_previous_gene_node_attrs()
+                self._apmsgen.set_known_gene_node_attributes(previous_gene_node_attrs)
 
-            self.generate_readme()
+            gene_node_attrs, errors = self._apmsgen.get_gene_node_attributes()
+        return previous_gene_node_attrs, gene_node_attrs, errors
+
+    def get_output_files(self):
+        """
+        Gets full paths to output files written by :py:meth:`run`
+        that exist, excluding README, logs, task and RO-Crate files.
+        These are the files stored in the run cache
 
+        :rtype: list
+        """
+        outfiles = [self.get_ppi_gene_node_attributes_file(),
+                    self.get_ppi_gene_node_errors_file(),
+                    self.get_ppi_edgelist_file(),
+                    self.get_ppi_gene_node_ids_file(),
+                    self.get_ppi_changelog_file()]
+        outfiles.extend(self.get_columnar_files())
+        return [f for f in outfiles if os.path.isfile(f)]
+
+    def _register_inputs(self):
+        """
+        Creates RO-Crate and registers input datasets and software
+        """
+        with self._stage_timer.stage('register_inputs'):
             self._update_provenance_with_description()
             self._update_provenance_with_keywords()
             self._create_rocrate()
@@ -475,25 +1040,144 @@ class CellmapsPPIDownloader(object):
 
             self._register_software()
 
-            gene_node_attrs, errors = self._apmsgen.get_gene_node_attributes()
+    def _register_inputs_and_get_gene_node_attributes(self, get_genes=True):
+        """
+        Runs :py:meth:`_register_inputs` while
+        :py:meth:`_get_gene_node_attributes` runs in a separate thread,
+        since gene resolution mostly waits on the network and
+        registration mostly waits on disk. If registration fails, gene
+        resolution is cancelled or, if already running, waited on so it
+        does not outlive the run and any error it raised is logged.
+
+        If **profiler** is set both run in this thread, one after the
+        other, because the profilers only see the thread that
+        started them
+
+        :param get_genes: If ``False`` only register inputs
+        :type get_genes: bool
+        :return: result of :py:meth:`_get_gene_node_attributes` or
+                 ``None`` if **get_genes** is ``False``
+        :rtype: tuple
+        """
+        if get_genes is False:
+            self._register_inputs()
+            return None
+        if self._profiler is not None:
+            self._register_inputs()
+            return self._get_gene_node_attributes()
+
+        executor = ThreadPoolExecutor(max_workers=1)
+        gene_future = executor.submit(self._get_gene_node_attributes)
+        try:
+            self._register_inputs()
+        except Exception:
+            if not gene_future.cancel():
+                logger.info('Registration failed, waiting for gene node '
+                            'attributes to finish')
+                gene_error = gene_future.exception()
+                if gene_error is not None:
+                    logger.error('Getting gene node attributes also failed: ' +
+                                 str(gene_error))
+            raise
+        finally:
+            executor.shutdown(wait=True)
+        return gene_future.result()
 
-            # write apms attribute data
-            self._write_ppi_gene_node_attrs(gene_node_attrs, errors)
+    def _get_run_cache_entry(self):
+        """
+        Gets entry of run cache for this run, which is **run_cache_entry**
+        passed to constructor if set, otherwise it is looked up in
+        **run_cache**
+
+        :raises CellMapsPPIDownloaderError: If there is no entry and
+                                            **apmsgen** is ``None``
+        :return: entry or ``None`` if no run cache is set or it has
+                 no entry for this run
+        :rtype: dict
+        """
+        if self._run_cache is None or self._run_cache_key is None:
+            return None
+        entry = self._run_cache_entry
+        if entry is None:
+            entry = self._run_cache.get_entry(self._run_cache_key)
+        self._run_cache_hit = entry is not None
+        if entry is None:
+            if self._apmsgen is None:
+                raise CellMapsPPIDownloaderError('apmsgen is None and run cache has no '
+                                                 'entry for key ' + self._run_cache_key)
+            logger.info('Run cache miss for key ' + self._run_cache_key)
+        else:
+            logger.info('Run cache hit for key ' + self._run_cache_key +
+                        ', taking outputs from ' + entry['entrydir'])
+        return entry
 
-            # write apms network
-            self._write_ppi_network(edgelist=self._apmsgen.get_apms_edgelist(),
-                                    gene_node_attrs=gene_node_attrs)
+    def run(self):
+        """
+        Downloads ppi data to output directory specified in constructor.
+        Gene node attributes are fetched in a separate thread while the
+        RO-Crate is created and input datasets and software are
+        registered, unless **profiler** is set. Outputs are written
+        once both are done.
 
-            self._register_apms_gene_node_attrs()
-            self._register_ppi_edgelist()
+        If **run_cache** has an entry for this run, outputs are put
+        in the output directory from the cache instead and only the
+        RO-Crate is created
 
-            self._register_computation()
+        :raises CellMapsPPIDownloaderError: If there is an error
+        :return: 0 upon success, otherwise failure
+        """
+        if self._profiler is not None:
+            self._profiler.start()
+        try:
+            exitcode = 99
+            with self._stage_timer.stage('setup'):
+                self._create_output_directory()
+                if self._skip_logging is False:
+                    logutils.setup_filelogger(outdir=self._outdir,
+                                              handlerprefix='cellmaps_ppidownloader')
+                self._write_task_start_json()
+
+                self.generate_readme()
+                cache_entry = self._get_run_cache_entry()
+
+            gene_results = self._register_inputs_and_get_gene_node_attributes(get_genes=cache_entry is None)
+            if cache_entry is None:
+                previous_gene_node_attrs, gene_node_attrs, errors = gene_results
+
+            if cache_entry is not None:
+                with self._stage_timer.stage('materialize_outputs'):
+                    self._run_cache.materialize(cache_entry, self._outdir)
+            else:
+                with self._stage_timer.stage('write_outputs'):
+                    # write apms attribute data
+                    self._write_ppi_gene_node_attrs(gene_node_attrs, errors)
+
+                    # write apms network
+                    self._write_ppi_network(edgelist=self._apmsgen.get_apms_edgelist(),
+                                            gene_node_attrs=gene_node_attrs)
+
+                    self._write_ppi_gene_node_ids(gene_node_attrs)
+                    if previous_gene_node_attrs is not None:
+                        self._write_ppi_changelog(previous_gene_node_attrs=previous_gene_node_attrs,
+                                                  gene_node_attrs=gene_node_attrs)
+                    self._write_columnar_outputs()
+
+                if self._run_cache_hit is False:
+                    with self._stage_timer.stage('cache_outputs'):
+                        self._run_cache.put(self._run_cache_key, self.get_output_files())
+
+            with self._stage_timer.stage('register_outputs'):
+                self._register_apms_gene_node_attrs()
+                self._register_ppi_edgelist()
+                self._register_ppi_gene_node_ids()
+                self._register_columnar_outputs()
+
+                self._register_computation()
             exitcode = 0
             return exitcode
         finally:
             self._end_time = int(time.time())
+            if self._profiler is not None:
+                self._profiler.stop(self._outdir)
             # write a task finish file
-            logutils.write_task_finish_json(outdir=self._outdir,
-                                            start_time=self._start_time,
-                                            end_time=self._end_time,
-                                            status=exitcode)
+            self._write_task_finish_json(status=exitcode)
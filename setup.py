@@ -31,7 +31,11 @@ requirements = ['cellmaps_utils>=0.5.0,<1.0.0',
                 'requests>=2.32.3,<3.0.0',
                 'mygene>=3.2.2,<4.0.0',
                 'ndex2>=3.10.0,<3.11.0',
-                'tqdm>=4.67.1,<5.0.0']
+                'tqdm>=4.67.1,<5.0.0',
+                'ijson>=3.1,<4.0']
+
+extras_requirements = {'async': ['httpx>=0.24.0,<1.0.0'],
+                       'columnar': ['pyarrow>=10.0.0']}
 
 setup_requirements = [ ]
 
@@ -50,6 +54,7 @@ setup(
     ],
     description=desc,
     install_requires=requirements,
+    extras_require=extras_requirements,
     license="MIT license",
     long_description=readme + '\n\n' + history,
     long_description_content_type='text/x-rst',
@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+
+"""Local stub of the MyGene query service used by tests"""
+
+import json
+import threading
+from urllib.parse import parse_qs
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StubMyGeneServer(object):
+    """
+    Runs an HTTP server on localhost in a background thread
+    that answers MyGene ``POST /v3/query`` requests.
+
+    Each query id ``X`` is answered with symbol ``SYMX`` and
+    Ensembl gene ``ENSGX``. The first **fail_first** requests
+    get a ``500`` response.
+    """
+
+    def __init__(self, fail_first=0):
+        self.requests = []
+        self._fail_first = fail_first
+        self._lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length', 0))
+                params = parse_qs(self.rfile.read(length).decode())
+                with stub._lock:
+                    stub.requests.append(params)
+                    fail = len(stub.requests) <= stub._fail_first
+                if fail:
+                    self.send_response(500)
+                    self.end_headers()
+                    return
+                hits = []
+                for q in params['q'][0].split(','):
+                    q = q.strip('"')
+                    hits.append({'query': q, '_id': q,
+                                 'symbol': 'SYM' + q,
+                                 'ensembl': {'gene': 'ENSG' + q}})
+                body = json.dumps(hits).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self._thread = threading.Thread(target=self._server.serve_forever,
+                                        daemon=True)
+
+    def get_url(self):
+        """
+        Gets base url of server, ex: http://127.0.0.1:PORT/v3
+        """
+        return 'http://127.0.0.1:' + str(self._server.server_address[1]) + '/v3'
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._server.shutdown()
+        self._server.server_close()
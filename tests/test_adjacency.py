@@ -0,0 +1,110 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for `AdjacencyIndex`"""
+
+import random
+import unittest
+from collections import defaultdict
+
+from cellmaps_ppidownloader.edgetable import EdgeTable
+from cellmaps_ppidownloader.adjacency import AdjacencyIndex
+from cellmaps_ppidownloader.adjacency import count_edge_rows, check_interactor_counts
+
+
+class TestAdjacencyIndex(unittest.TestCase):
+    """Tests for `AdjacencyIndex`"""
+
+    def setUp(self):
+        # duplicate edge, reversed duplicate and a self loop
+        self._edges = [{'GeneID1': 'A', 'GeneID2': 'B'},
+                       {'GeneID1': 'A', 'GeneID2': 'C'},
+                       {'GeneID1': 'A', 'GeneID2': 'B'},
+                       {'GeneID1': 'B', 'GeneID2': 'A'},
+                       {'GeneID1': 'D', 'GeneID2': 'D'},
+                       {'GeneID1': 'C', 'GeneID2': 'E'}]
+
+    def test_from_edgelist(self):
+        for edgelist in [self._edges, EdgeTable.from_rows(self._edges)]:
+            index = AdjacencyIndex.from_edgelist(edgelist)
+            self.assertEqual(5, index.get_num_nodes())
+            self.assertEqual(4, index.get_num_edges())
+            self.assertEqual(['A', 'B', 'C', 'D', 'E'], sorted(index.get_nodes()))
+            self.assertEqual(2, index.get_degree('A'))
+            self.assertEqual(1, index.get_degree('D'))
+            self.assertEqual(0, index.get_degree('X'))
+            self.assertEqual(['B', 'C'], sorted(index.get_neighbors('A')))
+            self.assertEqual(['D'], index.get_neighbors('D'))
+            self.assertEqual([], index.get_neighbors('X'))
+            self.assertTrue('E' in index)
+            self.assertFalse('X' in index)
+            self.assertEqual([2, 0, 2], index.get_degrees(['A', 'X', 'C']).tolist())
+            self.assertEqual({'A': 2, 'X': 0}, index.get_interactor_counts(['A', 'X']))
+            self.assertEqual([2, 0, 0, 1],
+                             index.get_bait_neighbor_counts(['A', 'E'],
+                                                            nodes=['C', 'A', 'X', 'B']).tolist())
+
+    def test_from_arrays_skips_missing(self):
+        index = AdjacencyIndex.from_arrays([1, 5, EdgeTable.MISSING], [5, 7, 1])
+        self.assertEqual([1, 5, 7], index.get_nodes())
+        self.assertEqual({1: 1, 5: 2, 7: 1}, index.get_interactor_counts([1, 5, 7]))
+
+        # column not set in some rows of an edge table
+        table = EdgeTable.from_rows([{'GeneID1': 'A', 'GeneID2': 'B'},
+                                     {'GeneID1': 'A'}])
+        index = AdjacencyIndex.from_edgelist(table)
+        self.assertEqual(1, index.get_num_edges())
+
+    def test_empty(self):
+        index = AdjacencyIndex.from_edgelist([])
+        self.assertEqual(0, index.get_num_nodes())
+        self.assertEqual(0, index.get_num_edges())
+        self.assertEqual([0], index.get_degrees(['A']).tolist())
+        self.assertEqual([0], index.get_bait_neighbor_counts(['A'], nodes=['A']).tolist())
+
+    def test_matches_sets_of_neighbors(self):
+        rand = random.Random(1)
+        edges = [{'GeneID1': str(rand.randrange(20)),
+                  'GeneID2': str(rand.randrange(100))} for _ in range(500)]
+        neighbors = defaultdict(set)
+        for edge in edges:
+            neighbors[edge['GeneID1']].add(edge['GeneID2'])
+            neighbors[edge['GeneID2']].add(edge['GeneID1'])
+        index = AdjacencyIndex.from_edgelist(EdgeTable.from_rows(edges))
+        nodes = sorted(neighbors.keys())
+        self.assertEqual([len(neighbors[n]) for n in nodes],
+                         index.get_degrees(nodes).tolist())
+        for node in nodes:
+            self.assertEqual(sorted(neighbors[node]), sorted(index.get_neighbors(node)))
+        baits = set(str(i) for i in range(20))
+        self.assertEqual([len(neighbors[n] & baits) for n in nodes],
+                         index.get_bait_neighbor_counts(baits, nodes=nodes).tolist())
+
+    def test_check_interactor_counts(self):
+        index = AdjacencyIndex.from_edgelist(self._edges)
+        baitlist = [{'GeneID': 'A', 'NumInteractors': '2'},
+                    {'GeneID': 'C', 'NumInteractors': 2.0},
+                    {'GeneID': 'D', 'NumInteractors': 3},
+                    {'GeneID': 'E', 'NumInteractors': 'NA'},
+                    {'GeneID': 'X'}]
+        self.assertEqual(['Bait D has 3 interactors in baitlist, but 1 in edgelist',
+                          'Bait E has non numeric NumInteractors: NA',
+                          'Bait X has non numeric NumInteractors: None'],
+                         index.check_interactor_counts(baitlist))
+
+    def test_count_edge_rows(self):
+        expected = {'A': 4, 'B': 3, 'D': 1, 'X': 0}
+        for edgelist in [self._edges, EdgeTable.from_rows(self._edges)]:
+            self.assertEqual(expected,
+                             count_edge_rows(edgelist, ['A', 'B', 'D', 'X']))
+        self.assertEqual({'A': 0}, count_edge_rows(EdgeTable.from_rows([]), ['A']))
+
+    def test_check_interactor_counts_with_counts(self):
+        self.assertEqual(['Bait B has 2 interactors in baitlist, but 0 in edgelist'],
+                         check_interactor_counts([{'GeneID': 'A', 'NumInteractors': 1},
+                                                  {'GeneID': 'B', 'NumInteractors': 2}],
+                                                 {'A': 1}))
+
+
+if __name__ == '__main__':
+    unittest.main()
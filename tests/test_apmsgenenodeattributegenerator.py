@@ -4,6 +4,7 @@
 """Tests for `APMSGeneNodeAttributeGenerator`"""
 
 import os
+import gzip
 import unittest
 import shutil
 import tempfile
@@ -11,6 +12,7 @@ import csv
 from unittest.mock import MagicMock
 
 from cellmaps_ppidownloader.gene import APMSGeneNodeAttributeGenerator
+from cellmaps_ppidownloader.edgetable import EdgeTable
 
 SKIP_REASON = 'CELLMAPS_PPIDOWNLOADER_INTEGRATION_TEST ' \
               'environment variable not set, cannot run integration ' \
@@ -63,6 +65,21 @@ class TestAPMSGeneNodeAttributeGenerator(unittest.TestCase):
         self.assertEqual('219541', edgelist[0]['GeneID2'])
         self.assertEqual('MED19', edgelist[0]['Symbol2'])
 
+    def test_get_apms_edgelist_from_tsvfile_streaming(self):
+        edgelist = APMSGeneNodeAttributeGenerator.get_apms_edgelist_from_tsvfile(self.get_edgelist(),
+                                                                                 streaming=True)
+        self.assertEqual(self.get_edgelist(), edgelist.get_tsvfile())
+        self.assertEqual(APMSGeneNodeAttributeGenerator.get_apms_edgelist_from_tsvfile(self.get_edgelist()),
+                         list(edgelist))
+        # can be iterated more then once
+        self.assertEqual(2783, len(list(edgelist)))
+
+    def test_get_apms_edgelist_from_tsvfile_workers(self):
+        edgelist = APMSGeneNodeAttributeGenerator.get_apms_edgelist_from_tsvfile(self.get_edgelist(),
+                                                                                 workers=2)
+        self.assertEqual(APMSGeneNodeAttributeGenerator.get_apms_edgelist_from_tsvfile(self.get_edgelist()),
+                         edgelist)
+
     def test_get_apms_baitlist_from_tsvfile(self):
         baitlist_path = self.get_baitlist()
         baitlist = APMSGeneNodeAttributeGenerator.get_apms_baitlist_from_tsvfile(baitlist_path)
@@ -72,27 +89,52 @@ class TestAPMSGeneNodeAttributeGenerator(unittest.TestCase):
         self.assertIn('GeneID', first_entry)
         self.assertIn('NumInteractors', first_entry)
 
-    def test_process_query_results(self):
+    def test_get_apms_edgelist_and_baitlist_from_gzip_tsvfiles(self):
+        temp_dir = tempfile.mkdtemp()
+        try:
+            gzfiles = []
+            for tsvfile in [self.get_edgelist(), self.get_baitlist()]:
+                gzfile = os.path.join(temp_dir, os.path.basename(tsvfile) + '.gz')
+                with open(tsvfile, 'rb') as in_f:
+                    with gzip.open(gzfile, 'wb') as out_f:
+                        out_f.write(in_f.read())
+                gzfiles.append(gzfile)
+            expected = APMSGeneNodeAttributeGenerator.get_apms_edgelist_from_tsvfile(self.get_edgelist())
+            self.assertEqual(expected,
+                             APMSGeneNodeAttributeGenerator.get_apms_edgelist_from_tsvfile(gzfiles[0]))
+            # compressed files are parsed serially
+            self.assertEqual(expected,
+                             APMSGeneNodeAttributeGenerator.get_apms_edgelist_from_tsvfile(gzfiles[0],
+                                                                                           workers=2))
+            self.assertEqual(expected,
+                             list(APMSGeneNodeAttributeGenerator.get_apms_edgelist_from_tsvfile(gzfiles[0],
+                                                                                                streaming=True)))
+            self.assertEqual(APMSGeneNodeAttributeGenerator.get_apms_baitlist_from_tsvfile(self.get_baitlist()),
+                             APMSGeneNodeAttributeGenerator.get_apms_baitlist_from_tsvfile(gzfiles[1]))
+        finally:
+            shutil.rmtree(temp_dir)
+
+    def test_get_gene_node_attributes_from_query_results_without_symbol(self):
         query_results = [
             {'query': 'GENE1', 'symbol': 'Symbol1', 'ensembl': {'gene': 'ENSG000001'}},
             {'query': 'GENE2', 'ensembl': {'gene': 'ENSG000002'}}
         ]
-        _, symbol_query_dict, symbol_ensembl_dict, _ = self.generator._process_query_results(query_results)
-        self.assertIn('Symbol1', symbol_query_dict)
-        self.assertIn('GENE2', symbol_query_dict)
-        self.assertIn('ENSG000001', symbol_ensembl_dict['Symbol1'])
-        self.assertIn('ENSG000002', symbol_ensembl_dict['GENE2'])
-
-    def test_create_gene_node_attributes_dict(self):
-        symbol_query_dict = {'Symbol1': {'Query1'}, 'Symbol2': {'Query2'}}
-        symbol_ensembl_dict = {'Symbol1': {'ENSG000001'}, 'Symbol2': {'ENSG000002'}}
-        bait_set = {'Query1'}
-        ambiguous_gene_dict = {'Query1': 'Symbol2,Symbol3'}
-        gene_node_attrs = self.generator._create_gene_node_attributes_dict(
-            symbol_query_dict, symbol_ensembl_dict, bait_set, ambiguous_gene_dict)
-        self.assertIn('Query1', gene_node_attrs)
+        gene_node_attrs, errors = self.generator._get_gene_node_attributes_from_query_results(query_results,
+                                                                                              set(), {})
+        self.assertEqual([], errors)
+        self.assertEqual({'name': 'Symbol1', 'represents': 'ENSG000001',
+                          'ambiguous': '', 'bait': False}, gene_node_attrs['GENE1'])
+        self.assertEqual({'name': 'GENE2', 'represents': 'ENSG000002',
+                          'ambiguous': '', 'bait': False}, gene_node_attrs['GENE2'])
+
+    def test_get_gene_node_attributes_from_query_results_bait_and_ambiguous(self):
+        query_results = [{'query': 'Query1', 'symbol': 'Symbol1', 'ensembl': {'gene': 'ENSG000001'}},
+                         {'query': 'Query2', 'symbol': 'Symbol2', 'ensembl': {'gene': 'ENSG000002'}}]
+        gene_node_attrs, _ = self.generator._get_gene_node_attributes_from_query_results(
+            query_results, {'Query1'}, {'Query1': 'Symbol2,Symbol3'})
         self.assertTrue(gene_node_attrs['Query1']['bait'])
-        self.assertIn('Symbol2,Symbol3', gene_node_attrs['Query1']['ambiguous'])
+        self.assertFalse(gene_node_attrs['Query2']['bait'])
+        self.assertEqual('Symbol2,Symbol3', gene_node_attrs['Query1']['ambiguous'])
 
     def test_get_unique_genelist_from_edgelist(self):
         self.generator._apms_edgelist = [
@@ -115,6 +157,54 @@ class TestAPMSGeneNodeAttributeGenerator(unittest.TestCase):
         self.assertEqual(len(ambiguous_genes), 2)
         self.assertDictEqual(ambiguous_genes, {'2': '2,4', '4': '2,4'})
 
+    def test_get_unique_genelist_from_edgetable(self):
+        edges = [{'GeneID1': '1', 'Symbol1': 'GeneA', 'GeneID2': '2,4', 'Symbol2': 'GeneB,GeneD'},
+                 {'GeneID1': '3', 'Symbol1': 'GeneC', 'GeneID2': '4,5', 'Symbol2': 'GeneD,GeneE'},
+                 {'GeneID1': '1', 'Symbol1': 'GeneA', 'GeneID2': '2,4', 'Symbol2': 'GeneB,GeneD'}]
+        self.generator._apms_edgelist = edges
+        expected_genes, expected_ambiguous = self.generator._get_unique_genelist_from_edgelist()
+        self.generator._apms_edgelist = EdgeTable.from_rows(edges)
+        unique_genes, ambiguous_genes = self.generator._get_unique_genelist_from_edgelist()
+        self.assertEqual(set(expected_genes), set(unique_genes))
+        self.assertEqual(expected_ambiguous, ambiguous_genes)
+        self.assertEqual('2,4', ambiguous_genes['4'])
+
+    def test_get_gene_node_attributes_from_query_results(self):
+        query_results = [{'query': '1', 'symbol': 'A', 'ensembl': {'gene': 'E1'}},
+                         {'query': '2', 'symbol': 'B', 'ensembl': [{'gene': 'E3'},
+                                                                   {'gene': 'E2'}]},
+                         {'query': '1', 'symbol': 'X', 'ensembl': {'gene': 'E9'}},
+                         {'query': '3', 'symbol': 'A', 'ensembl': {'gene': 'E0'}},
+                         {'query': '4', 'symbol': 'D'},
+                         {'query': '5', 'ensembl': {'gene': 'E5'}}]
+        bait_set = {'1'}
+        ambiguous_gene_dict = {'2': '2,3', '3': '2,3'}
+        gene_node_attrs, errors = self.generator._get_gene_node_attributes_from_query_results(query_results,
+                                                                                              bait_set,
+                                                                                              ambiguous_gene_dict)
+        self.assertEqual(1, len(errors))
+        self.assertTrue(errors[0].startswith("Skipping {'query': '4', 'symbol': 'D'}"))
+        self.assertEqual({'1': {'name': 'A', 'represents': 'E0,E1',
+                                'ambiguous': '', 'bait': True},
+                          '3': {'name': 'A', 'represents': 'E0,E1',
+                                'ambiguous': '2,3', 'bait': False},
+                          '2': {'name': 'B', 'represents': 'E2,E3',
+                                'ambiguous': '2,3', 'bait': False},
+                          '5': {'name': '5', 'represents': 'E5',
+                                'ambiguous': '', 'bait': False}}, gene_node_attrs)
+        self.assertEqual(['1', '3', '2', '5'], list(gene_node_attrs.keys()))
+
+        # codes from gene vocabulary built when edgelist is loaded
+        self.generator._apms_edgelist = [{'GeneID1': '5', 'GeneID2': '3'},
+                                         {'GeneID1': '2', 'GeneID2': '1'}]
+        self.generator._get_unique_genelist_from_edgelist()
+        self.assertEqual(gene_node_attrs,
+                         self.generator._get_gene_node_attributes_from_query_results(query_results,
+                                                                                     bait_set,
+                                                                                     ambiguous_gene_dict)[0])
+        self.assertEqual({'name': 'A', 'represents': 'E0,E1',
+                          'ambiguous': '2,3', 'bait': False}, gene_node_attrs['3'])
+
     def test_get_gene_node_attributes_with_input(self):
         edge_list = [
             {'GeneID1': '101928739', 'Symbol1': 'PIK3CA', 'GeneID2': '219541', 'Symbol2': 'MED19'},
@@ -141,3 +231,100 @@ class TestAPMSGeneNodeAttributeGenerator(unittest.TestCase):
 
         self.assertTrue(len(gene_node_attrs) > 0)
         self.assertEqual(len(errors), 0)
+
+    def test_check_baitlist_interactor_counts(self):
+        edge_list = [{'GeneID1': '1', 'Symbol1': 'A', 'GeneID2': '2', 'Symbol2': 'B'},
+                     {'GeneID1': '1', 'Symbol1': 'A', 'GeneID2': '3', 'Symbol2': 'C'},
+                     {'GeneID1': '1', 'Symbol1': 'A', 'GeneID2': '3', 'Symbol2': 'C'},
+                     {'GeneID1': '4', 'Symbol1': 'D', 'GeneID2': '2', 'Symbol2': 'B'}]
+        bait_list = [{'GeneSymbol': 'A', 'GeneID': '1', 'NumInteractors': '3'},
+                     {'GeneSymbol': 'D', 'GeneID': '4', 'NumInteractors': '5'}]
+        ppigen = APMSGeneNodeAttributeGenerator(apms_edgelist=EdgeTable.from_rows(edge_list),
+                                                apms_baitlist=bait_list)
+        self.assertEqual({'1': 2, '4': 1}, ppigen.get_bait_interactor_counts())
+        self.assertEqual(2, ppigen.get_adjacency_index().get_degree('2'))
+
+        # rows are counted by default, as in BioPlex baitlists
+        with self.assertLogs('cellmaps_ppidownloader.gene', level='WARNING') as logs:
+            self.assertEqual(['Bait 4 has 5 interactors in baitlist, but 1 in edgelist'],
+                             ppigen.check_baitlist_interactor_counts(bait_list))
+        self.assertTrue('1 of 2 baits have a number of interactors' in logs.output[0])
+        self.assertEqual(['Bait 1 has 3 interactors in baitlist, but 2 in edgelist',
+                          'Bait 4 has 5 interactors in baitlist, but 1 in edgelist'],
+                         ppigen.check_baitlist_interactor_counts(bait_list,
+                                                                 unique_interactors=True))
+        self.assertEqual([], ppigen.check_baitlist_interactor_counts(None))
+
+    def test_check_baitlist_interactor_counts_with_test_data(self):
+        edgelist_file = os.path.join(os.path.dirname(__file__), 'data', 'edgelist.tsv')
+        baitlist_file = os.path.join(os.path.dirname(__file__), 'data', 'baitlist.tsv')
+        baitlist = APMSGeneNodeAttributeGenerator.get_apms_baitlist_from_tsvfile(baitlist_file)
+        for streaming in [False, True]:
+            edgelist = APMSGeneNodeAttributeGenerator.get_apms_edgelist_from_tsvfile(edgelist_file,
+                                                                                     streaming=streaming)
+            ppigen = APMSGeneNodeAttributeGenerator(apms_edgelist=edgelist,
+                                                    apms_baitlist=baitlist)
+            self.assertEqual([], ppigen.check_baitlist_interactor_counts(baitlist))
+
+    def test_get_gene_node_attributes_with_known_genes(self):
+        edge_list = [{'GeneID1': '1', 'Symbol1': 'A', 'GeneID2': '2,3', 'Symbol2': 'B,C'},
+                     {'GeneID1': '1', 'Symbol1': 'A', 'GeneID2': '4', 'Symbol2': 'D'}]
+        bait_list = [{'GeneSymbol': 'A', 'GeneID': '1', 'NumInteractors': 2}]
+        mockgenequery = MagicMock()
+        mockgenequery.get_symbols_for_genes = MagicMock(return_value=[{'query': '4',
+                                                                       'ensembl': {'gene': 'E4'},
+                                                                       'symbol': 'D'}])
+        ppigen = APMSGeneNodeAttributeGenerator(apms_edgelist=edge_list, apms_baitlist=bait_list,
+                                                genequery=mockgenequery)
+        ppigen.set_known_gene_node_attributes({'1': {'name': 'A', 'represents': 'E1',
+                                                     'ambiguous': '', 'bait': False},
+                                               '2': {'name': 'B', 'represents': 'E2',
+                                                     'ambiguous': '', 'bait': False},
+                                               '3': {'name': 'C', 'represents': 'E3',
+                                                     'ambiguous': '', 'bait': False},
+                                               '99': {'name': 'Z', 'represents': 'E99',
+                                                      'ambiguous': '', 'bait': False}})
+        gene_node_attrs, errors = ppigen.get_gene_node_attributes()
+        mockgenequery.get_symbols_for_genes.assert_called_once_with(genelist=['4'])
+        self.assertEqual([], errors)
+        self.assertEqual({'1': {'name': 'A', 'represents': 'E1',
+                                'ambiguous': '', 'bait': True},
+                          '2': {'name': 'B', 'represents': 'E2',
+                                'ambiguous': '2,3', 'bait': False},
+                          '3': {'name': 'C', 'represents': 'E3',
+                                'ambiguous': '2,3', 'bait': False},
+                          '4': {'name': 'D', 'represents': 'E4',
+                                'ambiguous': '', 'bait': False}}, gene_node_attrs)
+
+        # all genes known so no query at all
+        mockgenequery.get_symbols_for_genes.reset_mock()
+        ppigen.set_known_gene_node_attributes(gene_node_attrs)
+        self.assertEqual(gene_node_attrs, ppigen.get_gene_node_attributes()[0])
+        mockgenequery.get_symbols_for_genes.assert_not_called()
+
+    def test_get_gene_node_attributes_with_known_genes_same_order_as_full_run(self):
+        edge_list = [{'GeneID1': '1', 'Symbol1': 'A', 'GeneID2': '2', 'Symbol2': 'B'},
+                     {'GeneID1': '1', 'Symbol1': 'A', 'GeneID2': '3', 'Symbol2': 'C'},
+                     {'GeneID1': '4', 'Symbol1': 'D', 'GeneID2': '5', 'Symbol2': 'A2'}]
+        symbols = {'1': 'A', '2': 'B', '3': 'C', '4': 'D', '5': 'A2'}
+
+        def fake_get_symbols_for_genes(genelist=None):
+            # results in query order like MyGene
+            return [{'query': g, 'ensembl': {'gene': 'E' + g}, 'symbol': symbols[g]}
+                    for g in genelist]
+
+        mockgenequery = MagicMock()
+        mockgenequery.get_symbols_for_genes.side_effect = fake_get_symbols_for_genes
+        ppigen = APMSGeneNodeAttributeGenerator(apms_edgelist=edge_list,
+                                                apms_baitlist=[],
+                                                genequery=mockgenequery)
+        full_attrs = ppigen.get_gene_node_attributes()[0]
+        self.assertEqual(['2', '1', '3', '4', '5'], list(full_attrs.keys()))
+
+        # genes 1 and 3 known, rest queried
+        mockgenequery.get_symbols_for_genes.reset_mock()
+        ppigen.set_known_gene_node_attributes({'1': full_attrs['1'],
+                                               '3': full_attrs['3']})
+        incremental_attrs = ppigen.get_gene_node_attributes()[0]
+        mockgenequery.get_symbols_for_genes.assert_called_once_with(genelist=['2', '4', '5'])
+        self.assertEqual(list(full_attrs.items()), list(incremental_attrs.items()))
@@ -0,0 +1,107 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for `AsyncGeneQuery`"""
+
+import asyncio
+import shutil
+import tempfile
+import os
+import unittest
+
+from cellmaps_ppidownloader.asyncgene import AsyncGeneQuery
+from cellmaps_ppidownloader.genecache import GeneQueryCache
+from cellmaps_ppidownloader.exceptions import CellMapsPPIDownloaderError
+from tests.stubmygene import StubMyGeneServer
+
+
+class TestAsyncGeneQuery(unittest.TestCase):
+    """Tests for `AsyncGeneQuery`"""
+
+    def test_get_query_params(self):
+        self.assertEqual({'q': '"1","2"', 'scopes': '_id',
+                          'fields': 'ensembl.gene,symbol',
+                          'species': 'human'},
+                         AsyncGeneQuery._get_query_params(['1', 2], species='human',
+                                                          scopes='_id',
+                                                          fields=['ensembl.gene', 'symbol']))
+        self.assertEqual({'q': '"A"'}, AsyncGeneQuery._get_query_params(['A']))
+
+    def test_get_symbols_for_genes_batched_with_retry(self):
+        with StubMyGeneServer(fail_first=1) as server:
+            query = AsyncGeneQuery(url=server.get_url() + '/', batch_size=3,
+                                   max_concurrency=2, retries=1,
+                                   retry_wait=0.01)
+            self.assertEqual(server.get_url(), query.get_url())
+            genes = [str(x) for x in range(10)]
+            res = query.get_symbols_for_genes(genelist=genes)
+            self.assertEqual(genes, [r['query'] for r in res])
+            self.assertEqual(['SYM' + g for g in genes], [r['symbol'] for r in res])
+            self.assertEqual({'gene': 'ENSG3'}, res[3]['ensembl'])
+            # 4 batches plus one retry
+            self.assertEqual(5, len(server.requests))
+            self.assertEqual('human', server.requests[0]['species'][0])
+            self.assertEqual('ensembl.gene,symbol', server.requests[0]['fields'][0])
+
+            self.assertEqual([], query.querymany([]))
+
+    def test_fails_after_retries(self):
+        with StubMyGeneServer(fail_first=3) as server:
+            query = AsyncGeneQuery(url=server.get_url(), retries=2,
+                                   retry_wait=0.01)
+            try:
+                query.get_symbols_for_genes(genelist=['1'])
+                self.fail('Expected exception')
+            except CellMapsPPIDownloaderError as ce:
+                self.assertTrue(str(ce).startswith('MyGene query of 1 genes '
+                                                   'failed after 3 attempts: '))
+            self.assertEqual(3, len(server.requests))
+
+    def test_async_session_with_cache(self):
+        temp_dir = tempfile.mkdtemp()
+        try:
+            cache = GeneQueryCache(cachefile=os.path.join(temp_dir, 'cache.sqlite'))
+
+            async def run_queries(url):
+                async with AsyncGeneQuery(url=url, cache=cache) as query:
+                    first = await query.aget_symbols_for_genes(['1', '2'])
+                    second = await query.aget_symbols_for_genes(['2', '3', '1'])
+                return first, second
+
+            with StubMyGeneServer() as server:
+                first, second = asyncio.run(run_queries(server.get_url()))
+                self.assertEqual(['SYM1', 'SYM2'], [r['symbol'] for r in first])
+                self.assertEqual(['SYM2', 'SYM3', 'SYM1'], [r['symbol'] for r in second])
+                # second query only sent gene missing from cache
+                self.assertEqual(2, len(server.requests))
+                self.assertEqual('"3"', server.requests[1]['q'][0])
+        finally:
+            shutil.rmtree(temp_dir)
+
+    def test_sync_call_in_running_event_loop(self):
+        async def run_query():
+            AsyncGeneQuery(url='http://localhost:1').get_symbols_for_genes(['1'])
+
+        try:
+            asyncio.run(run_query())
+            self.fail('Expected exception')
+        except CellMapsPPIDownloaderError as ce:
+            self.assertTrue('cannot be called from a running event loop' in str(ce))
+
+    def test_sync_call_from_thread_in_async_session(self):
+        async def run_queries(url):
+            async with AsyncGeneQuery(url=url) as query:
+                first = await query.aget_symbols_for_genes(['1'])
+                second = await asyncio.get_running_loop().run_in_executor(None,
+                                                                          query.get_symbols_for_genes,
+                                                                          ['2'])
+                third = await query.aget_symbols_for_genes(['3'])
+            return first + second + third
+
+        with StubMyGeneServer() as server:
+            res = asyncio.run(run_queries(server.get_url()))
+            self.assertEqual(['SYM1', 'SYM2', 'SYM3'], [r['symbol'] for r in res])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -4,11 +4,22 @@
 """Tests for `cellmaps_ppidownloader` package."""
 
 import os
+import gzip
+import json
+import logging
+import time
+import threading
 import tempfile
 import shutil
 
 import unittest
+from unittest.mock import MagicMock
+from cellmaps_utils.provenance import ProvenanceUtil
 from cellmaps_ppidownloader.runner import CellmapsPPIDownloader
+from cellmaps_ppidownloader.edgetable import EdgeTable
+from cellmaps_ppidownloader.profiling import RunProfiler
+from cellmaps_ppidownloader.runcache import RunCache
+from cellmaps_ppidownloader import fileutils
 from cellmaps_ppidownloader.exceptions import CellMapsPPIDownloaderError
 
 
@@ -53,5 +64,526 @@ class TestCellmapsPPIDownloader(unittest.TestCase):
             self.assertTrue(os.path.isfile(os.path.join(run_dir, 'error.log')))
 
         finally:
+            # remove file handlers added by run() so later tests
+            # do not log to files in the deleted directory
+            root_logger = logging.getLogger()
+            for handler in list(root_logger.handlers):
+                if handler.get_name() is not None and \
+                        handler.get_name().startswith('cellmaps_ppidownloader'):
+                    root_logger.removeHandler(handler)
+                    handler.close()
             shutil.rmtree(temp_dir)
 
+    def test_write_ppi_gene_node_attrs_and_network(self):
+        temp_dir = tempfile.mkdtemp()
+        try:
+            myobj = CellmapsPPIDownloader(outdir=temp_dir,
+                                          provenance_utils=MagicMock())
+            gene_node_attrs = {'1': {'name': 'A', 'represents': 'ensembl:E1',
+                                     'ambiguous': '', 'bait': True},
+                               '2': {'name': 'B"X', 'represents': None,
+                                     'ambiguous': 'C,D', 'bait': False},
+                               '3': {'name': '', 'represents': '',
+                                     'ambiguous': '', 'bait': False}}
+            myobj._write_ppi_gene_node_attrs(gene_node_attrs, ['some error'])
+            with open(myobj.get_ppi_gene_node_attributes_file(), 'r', newline='') as f:
+                self.assertEqual('name\trepresents\tambiguous\tbait\r\n'
+                                 'A\tensembl:E1\t\tTrue\r\n'
+                                 '"B""X"\t\tC,D\tFalse\r\n'
+                                 '\t\t\tFalse\r\n', f.read())
+            with open(myobj.get_ppi_gene_node_errors_file(), 'r') as f:
+                self.assertEqual('some error\n', f.read())
+
+            edges = [{'GeneID1': '1', 'GeneID2': '2'},
+                     {'GeneID1': '1', 'GeneID2': '3'},
+                     {'GeneID1': '4', 'GeneID2': '1'},
+                     {'GeneID1': '2', 'GeneID2': '1'}]
+            expected = 'geneA\tgeneB\r\nA\t"B""X"\r\n"B""X"\tA\r\n'
+            for edgelist in [edges, iter(edges), EdgeTable.from_rows(edges)]:
+                myobj._write_ppi_network(edgelist=edgelist,
+                                         gene_node_attrs=gene_node_attrs)
+                with open(myobj.get_ppi_edgelist_file(), 'r', newline='') as f:
+                    self.assertEqual(expected, f.read())
+        finally:
+            shutil.rmtree(temp_dir)
+
+    def test_previous_outdir_gene_node_ids_and_changelog(self):
+        temp_dir = tempfile.mkdtemp()
+        try:
+            prev_dir = os.path.join(temp_dir, 'prev')
+            os.makedirs(prev_dir)
+            prevobj = CellmapsPPIDownloader(outdir=prev_dir,
+                                            provenance_utils=MagicMock())
+            prev_attrs = {'1': {'name': 'A', 'represents': 'ensembl:E1',
+                                'ambiguous': '', 'bait': True},
+                          '2': {'name': 'B', 'represents': 'ensembl:E2',
+                                'ambiguous': '', 'bait': False}}
+            prevobj._write_ppi_gene_node_ids(prev_attrs)
+            prevobj._write_ppi_network(edgelist=[{'GeneID1': '1', 'GeneID2': '2'}],
+                                       gene_node_attrs=prev_attrs)
+
+            run_dir = os.path.join(temp_dir, 'run')
+            os.makedirs(run_dir)
+            myobj = CellmapsPPIDownloader(outdir=run_dir,
+                                          provenance_utils=MagicMock(),
+                                          previous_outdir=prev_dir)
+            self.assertEqual(prev_attrs, myobj._load_previous_gene_node_attrs())
+
+            attrs = {'1': prev_attrs['1'],
+                     '3': {'name': 'C', 'represents': 'ensembl:E3',
+                           'ambiguous': '', 'bait': False}}
+            myobj._write_ppi_network(edgelist=[{'GeneID1': '1', 'GeneID2': '3'}],
+                                     gene_node_attrs=attrs)
+            myobj._write_ppi_changelog(previous_gene_node_attrs=prev_attrs,
+                                       gene_node_attrs=attrs)
+            with open(myobj.get_ppi_changelog_file(), 'r') as f:
+                changelog = json.load(f)
+            self.assertEqual({'previous_outdir': prev_dir,
+                              'genes': {'added': ['3'], 'removed': ['2'],
+                                        'reused': 1},
+                              'edges': {'added': [['A', 'C']],
+                                        'removed': [['A', 'B']],
+                                        'unchanged': 0}}, changelog)
+
+            # previous outdir without gene node ids file
+            myobj = CellmapsPPIDownloader(outdir=run_dir,
+                                          provenance_utils=MagicMock(),
+                                          previous_outdir=run_dir)
+            try:
+                myobj._load_previous_gene_node_attrs()
+                self.fail('Expected exception')
+            except CellMapsPPIDownloaderError as ce:
+                self.assertTrue('ppi_gene_node_ids.tsv not found' in str(ce))
+        finally:
+            shutil.rmtree(temp_dir)
+
+    def test_run_records_stage_timings_and_profile(self):
+        temp_dir = tempfile.mkdtemp()
+        try:
+            run_dir = os.path.join(temp_dir, 'run')
+            apmsgen = MagicMock()
+            apmsgen.get_gene_node_attributes.return_value = ({'1': {'name': 'A',
+                                                                    'represents': '',
+                                                                    'ambiguous': '',
+                                                                    'bait': True}}, [])
+            apmsgen.get_apms_edgelist.return_value = [{'GeneID1': '1', 'GeneID2': '1'}]
+            prov_utils = MagicMock()
+            prov_utils.get_default_date_format_str.return_value = '%m-%d-%Y'
+            myobj = CellmapsPPIDownloader(outdir=run_dir,
+                                          apmsgen=apmsgen,
+                                          provenance=CellmapsPPIDownloader.get_example_provenance(with_ids=True),
+                                          provenance_utils=prov_utils,
+                                          profiler=RunProfiler.CPROFILE)
+            self.assertEqual(0, myobj.run())
+            timings = myobj.get_stage_timings()
+            # register_inputs and gene_node_attributes run concurrently
+            # so they can finish in either order
+            self.assertEqual(['setup', 'write_outputs', 'register_outputs'],
+                             [t['name'] for t in timings if t['name'] not in
+                              ['register_inputs', 'gene_node_attributes']])
+            self.assertEqual({'register_inputs', 'gene_node_attributes'},
+                             {t['name'] for t in timings[1:3]})
+
+            finish_files = [f for f in os.listdir(run_dir) if f.endswith('finish.json')]
+            self.assertEqual(1, len(finish_files))
+            with open(os.path.join(run_dir, finish_files[0]), 'r') as f:
+                task = json.load(f)
+            self.assertEqual('0', task['status'])
+            self.assertEqual(timings, task['stages'])
+            self.assertTrue(os.path.isfile(os.path.join(run_dir, RunProfiler.CPROFILE_FILE)))
+        finally:
+            shutil.rmtree(temp_dir)
+
+    def test_run_resolves_genes_while_registering_inputs(self):
+        temp_dir = tempfile.mkdtemp()
+        try:
+            run_dir = os.path.join(temp_dir, 'run')
+            registering = threading.Event()
+            genes_resolved = threading.Event()
+
+            def fake_register_software(*args, **kwargs):
+                registering.set()
+                # blocks forever if genes are not resolved concurrently
+                self.assertTrue(genes_resolved.wait(timeout=10))
+                return 'softwareid'
+
+            def fake_get_gene_node_attributes():
+                self.assertTrue(registering.wait(timeout=10))
+                genes_resolved.set()
+                return {'1': {'name': 'A', 'represents': '',
+                              'ambiguous': '', 'bait': True}}, []
+
+            apmsgen = MagicMock()
+            apmsgen.get_gene_node_attributes.side_effect = fake_get_gene_node_attributes
+            apmsgen.get_apms_edgelist.return_value = [{'GeneID1': '1', 'GeneID2': '1'}]
+            prov_utils = MagicMock()
+            prov_utils.get_default_date_format_str.return_value = '%m-%d-%Y'
+            prov_utils.register_software.side_effect = fake_register_software
+            myobj = CellmapsPPIDownloader(outdir=run_dir,
+                                          apmsgen=apmsgen,
+                                          provenance=CellmapsPPIDownloader.get_example_provenance(with_ids=True),
+                                          provenance_utils=prov_utils)
+            self.assertEqual(0, myobj.run())
+            with open(myobj.get_ppi_edgelist_file(), 'r') as f:
+                self.assertEqual('geneA\tgeneB\nA\tA\n', f.read())
+            self.assertTrue(myobj.get_ppi_gene_node_ids_file() in
+                            [c.kwargs['source_file'] for c in
+                             prov_utils.register_dataset.call_args_list])
+        finally:
+            shutil.rmtree(temp_dir)
+
+    def test_run_waits_for_genes_if_registration_fails(self):
+        temp_dir = tempfile.mkdtemp()
+        try:
+            run_dir = os.path.join(temp_dir, 'run')
+            genes_started = threading.Event()
+            genes_finished = threading.Event()
+
+            def fake_register_software(*args, **kwargs):
+                self.assertTrue(genes_started.wait(timeout=10))
+                raise CellMapsPPIDownloaderError('registration failed')
+
+            def fake_get_gene_node_attributes():
+                genes_started.set()
+                time.sleep(0.2)
+                genes_finished.set()
+                raise CellMapsPPIDownloaderError('mygene failed')
+
+            apmsgen = MagicMock()
+            apmsgen.get_gene_node_attributes.side_effect = fake_get_gene_node_attributes
+            prov_utils = MagicMock()
+            prov_utils.get_default_date_format_str.return_value = '%m-%d-%Y'
+            prov_utils.register_software.side_effect = fake_register_software
+            myobj = CellmapsPPIDownloader(outdir=run_dir,
+                                          apmsgen=apmsgen,
+                                          provenance=CellmapsPPIDownloader.get_example_provenance(with_ids=True),
+                                          provenance_utils=prov_utils)
+            with self.assertLogs('cellmaps_ppidownloader.runner', level='ERROR') as logs:
+                try:
+                    myobj.run()
+                    self.fail('Expected CellMapsPPIDownloaderError')
+                except CellMapsPPIDownloaderError as ce:
+                    self.assertEqual('registration failed', str(ce))
+            self.assertTrue(genes_finished.is_set())
+            self.assertTrue('mygene failed' in logs.output[0])
+        finally:
+            shutil.rmtree(temp_dir)
+
+    def test_run_with_profiler_gets_genes_in_main_thread(self):
+        temp_dir = tempfile.mkdtemp()
+        try:
+            run_dir = os.path.join(temp_dir, 'run')
+            threads = []
+
+            def fake_get_gene_node_attributes():
+                threads.append(threading.current_thread())
+                return {'1': {'name': 'A', 'represents': '',
+                              'ambiguous': '', 'bait': True}}, []
+
+            apmsgen = MagicMock()
+            apmsgen.get_gene_node_attributes.side_effect = fake_get_gene_node_attributes
+            apmsgen.get_apms_edgelist.return_value = [{'GeneID1': '1', 'GeneID2': '1'}]
+            prov_utils = MagicMock()
+            prov_utils.get_default_date_format_str.return_value = '%m-%d-%Y'
+            myobj = CellmapsPPIDownloader(outdir=run_dir,
+                                          apmsgen=apmsgen,
+                                          provenance=CellmapsPPIDownloader.get_example_provenance(with_ids=True),
+                                          provenance_utils=prov_utils,
+                                          profiler=RunProfiler.CPROFILE)
+            self.assertEqual(0, myobj.run())
+            self.assertEqual([threading.current_thread()], threads)
+        finally:
+            shutil.rmtree(temp_dir)
+
+    def test_run_with_run_cache(self):
+        temp_dir = tempfile.mkdtemp()
+        try:
+            run_cache = RunCache(os.path.join(temp_dir, 'cache'))
+            key = RunCache.get_key(parameters={'a': 1})
+            apmsgen = MagicMock()
+            apmsgen.get_gene_node_attributes.return_value = ({'1': {'name': 'A',
+                                                                    'represents': '',
+                                                                    'ambiguous': '',
+                                                                    'bait': True}}, [])
+            apmsgen.get_apms_edgelist.return_value = [{'GeneID1': '1', 'GeneID2': '1'}]
+            prov_utils = MagicMock()
+            prov_utils.get_default_date_format_str.return_value = '%m-%d-%Y'
+            miss_dir = os.path.join(temp_dir, 'miss')
+            myobj = CellmapsPPIDownloader(outdir=miss_dir,
+                                          apmsgen=apmsgen,
+                                          provenance=CellmapsPPIDownloader.get_example_provenance(with_ids=True),
+                                          provenance_utils=prov_utils,
+                                          run_cache=run_cache,
+                                          run_cache_key=key)
+            self.assertEqual(0, myobj.run())
+            self.assertTrue('cache_outputs' in [t['name'] for t in myobj.get_stage_timings()])
+            entry = run_cache.get_entry(key)
+            self.assertEqual(sorted(os.path.basename(f) for f in myobj.get_output_files()),
+                             sorted(entry['files'].keys()))
+
+            # second run takes outputs from cache without apmsgen
+            prov_utils.reset_mock()
+            hit_dir = os.path.join(temp_dir, 'hit')
+            myobj = CellmapsPPIDownloader(outdir=hit_dir,
+                                          provenance=CellmapsPPIDownloader.get_example_provenance(with_ids=True),
+                                          provenance_utils=prov_utils,
+                                          run_cache=run_cache,
+                                          run_cache_key=key)
+            self.assertEqual(0, myobj.run())
+            self.assertEqual(['setup', 'register_inputs', 'materialize_outputs',
+                              'register_outputs'],
+                             [t['name'] for t in myobj.get_stage_timings()])
+            with open(myobj.get_ppi_edgelist_file(), 'r') as f:
+                self.assertEqual('geneA\tgeneB\nA\tA\n', f.read())
+            self.assertEqual(1, apmsgen.get_gene_node_attributes.call_count)
+            prov_utils.register_computation.assert_called_once()
+            finish_files = [f for f in os.listdir(hit_dir) if f.endswith('finish.json')]
+            with open(os.path.join(hit_dir, finish_files[0]), 'r') as f:
+                self.assertEqual({'key': key, 'hit': True}, json.load(f)['run_cache'])
+
+            # entry looked up by caller is used even if it expires
+            # before the run
+            expiring_cache = RunCache(run_cache.get_cachedir(), max_age=60)
+            expiring_entry = expiring_cache.get_entry(key)
+            entry_file = os.path.join(expiring_entry['entrydir'], RunCache.ENTRY_FILE)
+            with open(entry_file, 'r') as f:
+                data = json.load(f)
+            data['created'] -= 120
+            with open(entry_file, 'w') as f:
+                json.dump(data, f)
+            self.assertIsNone(expiring_cache.get_entry(key))
+            expired_dir = os.path.join(temp_dir, 'expired')
+            myobj = CellmapsPPIDownloader(outdir=expired_dir,
+                                          provenance=CellmapsPPIDownloader.get_example_provenance(with_ids=True),
+                                          provenance_utils=prov_utils,
+                                          run_cache=expiring_cache,
+                                          run_cache_key=key,
+                                          run_cache_entry=expiring_entry)
+            self.assertEqual(0, myobj.run())
+            with open(myobj.get_ppi_edgelist_file(), 'r') as f:
+                self.assertEqual('geneA\tgeneB\nA\tA\n', f.read())
+
+            # no entry and no apmsgen
+            myobj = CellmapsPPIDownloader(outdir=os.path.join(temp_dir, 'fail'),
+                                          provenance=CellmapsPPIDownloader.get_example_provenance(with_ids=True),
+                                          provenance_utils=prov_utils,
+                                          run_cache=run_cache,
+                                          run_cache_key=RunCache.get_key())
+            try:
+                myobj.run()
+                self.fail('Expected CellMapsPPIDownloaderError')
+            except CellMapsPPIDownloaderError as ce:
+                self.assertTrue('run cache has no entry' in str(ce))
+        finally:
+            shutil.rmtree(temp_dir)
+
+    def test_register_input_datasets_with_input_copy_mode(self):
+        temp_dir = tempfile.mkdtemp()
+        try:
+            edgelist = os.path.join(temp_dir, 'edgelist.tsv')
+            with open(edgelist, 'w') as f:
+                f.write('GeneID1\tGeneID2\n1\t2\n')
+            run_dir = os.path.join(temp_dir, 'run')
+            os.makedirs(run_dir)
+            prov_utils = MagicMock()
+            prov_utils.register_dataset.return_value = 'edgeid\n'
+            provenance = {'edgelist': {'name': 'edgelist'},
+                          'baitlist': {'guid': 'baitid'}}
+            myobj = CellmapsPPIDownloader(outdir=run_dir,
+                                          provenance=provenance,
+                                          provenance_utils=prov_utils,
+                                          input_data_dict={'edgelist': edgelist},
+                                          input_copy_mode='symlink')
+            myobj._register_input_datasets()
+            self.assertEqual(['edgeid\n'], myobj._inputdataset_ids)
+            dest = os.path.join(run_dir, 'edgelist.tsv')
+            self.assertTrue(os.path.islink(dest))
+            checksums = myobj.get_input_checksums()
+            self.assertEqual(['edgelist'], list(checksums.keys()))
+            self.assertEqual('symlink', checksums['edgelist']['method'])
+            prov_utils.register_dataset.assert_called_once_with(run_dir,
+                                                                source_file=dest,
+                                                                data_dict={'name': 'edgelist',
+                                                                           'keywords': ['sha256:' +
+                                                                                        checksums['edgelist']['sha256']]},
+                                                                skip_copy=True)
+            # provenance passed in is not modified
+            self.assertEqual({'name': 'edgelist'}, provenance['edgelist'])
+
+            try:
+                CellmapsPPIDownloader(outdir=run_dir, input_copy_mode='move')
+                self.fail('Expected exception')
+            except CellMapsPPIDownloaderError as ce:
+                self.assertTrue('Unknown input_copy_mode: move' in str(ce))
+        finally:
+            shutil.rmtree(temp_dir)
+
+    def test_register_columnar_outputs(self):
+        temp_dir = tempfile.mkdtemp()
+        try:
+            prov_utils = MagicMock()
+            prov_utils.get_default_date_format_str.return_value = '%m-%d-%Y'
+            prov_utils.register_dataset.side_effect = ['attrid', 'edgeid']
+            myobj = CellmapsPPIDownloader(outdir=temp_dir,
+                                          provenance={'keywords': [],
+                                                      'description': 'desc'},
+                                          provenance_utils=prov_utils)
+            self.assertEqual([], myobj.get_columnar_files())
+            myobj._register_columnar_outputs()
+            self.assertEqual(0, prov_utils.register_dataset.call_count)
+
+            myobj = CellmapsPPIDownloader(outdir=temp_dir,
+                                          provenance={'keywords': [],
+                                                      'description': 'desc'},
+                                          provenance_utils=prov_utils,
+                                          columnar_format='arrow')
+            self.assertEqual([os.path.join(temp_dir, 'ppi_gene_node_attributes.arrow'),
+                              os.path.join(temp_dir, 'ppi_edgelist.arrow')],
+                             myobj.get_columnar_files())
+            myobj._register_columnar_outputs()
+            self.assertEqual(['attrid', 'edgeid'], myobj._columnar_ids)
+            call = prov_utils.register_dataset.call_args_list[1]
+            self.assertEqual(os.path.join(temp_dir, 'ppi_edgelist.arrow'),
+                             call.kwargs['source_file'])
+            self.assertEqual('arrow', call.kwargs['data_dict']['data-format'])
+        finally:
+            shutil.rmtree(temp_dir)
+
+    def test_get_data_dict_with_checksum(self):
+        data_dict = {'name': 'edgelist', 'description': 'AP-MS edgelist',
+                     'keywords': ['ppi']}
+        self.assertEqual({'name': 'edgelist',
+                          'description': 'AP-MS edgelist SHA-256: abc',
+                          'keywords': ['ppi', 'sha256:abc']},
+                         CellmapsPPIDownloader._get_data_dict_with_checksum(data_dict, 'abc'))
+        self.assertEqual(['ppi'], data_dict['keywords'])
+        self.assertEqual(['ppi', 'sha256:abc'],
+                         CellmapsPPIDownloader._get_data_dict_with_checksum({'keywords': 'ppi'},
+                                                                            'abc')['keywords'])
+
+    @unittest.skipIf(shutil.which('fairscape-cli') is None, 'fairscape-cli is not installed')
+    def test_input_checksum_in_rocrate(self):
+        temp_dir = tempfile.mkdtemp()
+        try:
+            edgelist = os.path.join(temp_dir, 'edgelist.tsv')
+            with open(edgelist, 'w') as f:
+                f.write('GeneID1\tGeneID2\n1\t2\n')
+            run_dir = os.path.join(temp_dir, 'run')
+            os.makedirs(run_dir)
+            prov_utils = ProvenanceUtil()
+            prov_utils.register_rocrate(run_dir, name='ppi downloader test',
+                                        organization_name='test organization',
+                                        project_name='test project',
+                                        description='test of checksum registration',
+                                        keywords=['test'])
+            provenance = CellmapsPPIDownloader.get_example_provenance()
+            myobj = CellmapsPPIDownloader(outdir=run_dir,
+                                          provenance=provenance,
+                                          provenance_utils=prov_utils,
+                                          input_data_dict={'edgelist': edgelist},
+                                          input_copy_mode='copy')
+            myobj._register_input_datasets()
+            sha256 = myobj.get_input_checksums()['edgelist']['sha256']
+            with open(os.path.join(run_dir, 'ro-crate-metadata.json'), 'r') as f:
+                rocrate = json.load(f)
+            entities = [e for e in rocrate['@graph']
+                        if e['@id'] == myobj._inputdataset_ids[0]]
+            self.assertEqual(1, len(entities))
+            self.assertTrue('sha256:' + sha256 in entities[0]['keywords'])
+            self.assertTrue(entities[0]['description'].endswith('SHA-256: ' + sha256))
+        finally:
+            shutil.rmtree(temp_dir)
+
+    def test_get_data_format(self):
+        self.assertEqual('tsv', CellmapsPPIDownloader._get_data_format())
+        self.assertEqual('tsv.gz', CellmapsPPIDownloader._get_data_format(compression=fileutils.GZIP))
+        self.assertEqual('csv.zst', CellmapsPPIDownloader._get_data_format(data_format='csv',
+                                                                           compression=fileutils.ZSTD))
+
+    def test_output_compression(self):
+        temp_dir = tempfile.mkdtemp()
+        try:
+            edgelist = os.path.join(temp_dir, 'edgelist.tsv')
+            with open(edgelist, 'w') as f:
+                f.write('GeneID1\tGeneID2\n1\t2\n')
+            run_dir = os.path.join(temp_dir, 'run')
+            os.makedirs(run_dir)
+            prov_utils = MagicMock()
+            prov_utils.get_default_date_format_str.return_value = '%m-%d-%Y'
+            prov_utils.register_dataset.side_effect = ['edgeid', 'attrid', 'ppiedgeid']
+            myobj = CellmapsPPIDownloader(outdir=run_dir,
+                                          provenance={'edgelist': {'name': 'edgelist'},
+                                                      'baitlist': {'guid': 'baitid'},
+                                                      'keywords': [],
+                                                      'description': 'desc'},
+                                          provenance_utils=prov_utils,
+                                          input_data_dict={'edgelist': edgelist},
+                                          output_compression='gzip')
+            self.assertEqual(os.path.join(run_dir, 'ppi_edgelist.tsv.gz'),
+                             myobj.get_ppi_edgelist_file())
+            self.assertEqual(os.path.join(run_dir, 'ppi_gene_node_attributes.tsv.gz'),
+                             myobj.get_ppi_gene_node_attributes_file())
+
+            # uncompressed input is compressed into output directory
+            myobj._register_input_datasets()
+            dest = os.path.join(run_dir, 'edgelist.tsv.gz')
+            with gzip.open(dest, 'rt') as f:
+                self.assertEqual('GeneID1\tGeneID2\n1\t2\n', f.read())
+            self.assertEqual(dest, prov_utils.register_dataset.call_args_list[0].kwargs['source_file'])
+            checksums = myobj.get_input_checksums()
+            self.assertEqual('gzip', checksums['edgelist']['method'])
+            self.assertEqual(fileutils.sha256_file(edgelist), checksums['edgelist']['sha256'])
+            self.assertEqual(['sha256:' + fileutils.sha256_file(dest)],
+                             prov_utils.register_dataset.call_args_list[0].kwargs['data_dict']['keywords'])
+
+            gene_node_attrs = {'1': {'name': 'A', 'represents': 'ensembl:E1',
+                                     'ambiguous': '', 'bait': True},
+                               '2': {'name': 'B', 'represents': 'ensembl:E2',
+                                     'ambiguous': '', 'bait': False}}
+            myobj._write_ppi_gene_node_attrs(gene_node_attrs)
+            myobj._write_ppi_network(edgelist=[{'GeneID1': '1', 'GeneID2': '2'}],
+                                     gene_node_attrs=gene_node_attrs)
+            with gzip.open(myobj.get_ppi_gene_node_attributes_file(), 'rt', newline='') as f:
+                self.assertEqual('name\trepresents\tambiguous\tbait\r\n'
+                                 'A\tensembl:E1\t\tTrue\r\n'
+                                 'B\tensembl:E2\t\tFalse\r\n', f.read())
+            with gzip.open(myobj.get_ppi_edgelist_file(), 'rt', newline='') as f:
+                self.assertEqual('geneA\tgeneB\r\nA\tB\r\n', f.read())
+
+            myobj._register_apms_gene_node_attrs()
+            myobj._register_ppi_edgelist()
+            self.assertEqual([myobj.get_ppi_gene_node_attributes_file(),
+                              myobj.get_ppi_edgelist_file()],
+                             [c.kwargs['source_file'] for c in
+                              prov_utils.register_dataset.call_args_list[1:]])
+            self.assertEqual(['tsv.gz', 'tsv.gz', 'tsv.gz'],
+                             [c.kwargs['data_dict']['data-format'] for c in
+                              prov_utils.register_dataset.call_args_list])
+            # provenance passed in is not modified
+            self.assertFalse('data-format' in myobj._provenance['edgelist'])
+
+            # later run reads compressed edgelist of previous run
+            myobj._write_ppi_gene_node_ids(gene_node_attrs)
+            next_dir = os.path.join(temp_dir, 'next')
+            os.makedirs(next_dir)
+            nextobj = CellmapsPPIDownloader(outdir=next_dir,
+                                            provenance_utils=MagicMock(),
+                                            previous_outdir=run_dir)
+            nextobj._write_ppi_network(edgelist=[{'GeneID1': '1', 'GeneID2': '2'}],
+                                       gene_node_attrs=gene_node_attrs)
+            nextobj._write_ppi_changelog(previous_gene_node_attrs=gene_node_attrs,
+                                         gene_node_attrs=gene_node_attrs)
+            self.assertEqual(os.path.join(run_dir, 'ppi_gene_node_ids.tsv.gz'),
+                             myobj.get_ppi_gene_node_ids_file())
+            self.assertEqual(gene_node_attrs, nextobj._load_previous_gene_node_attrs())
+            with open(nextobj.get_ppi_changelog_file(), 'r') as f:
+                self.assertEqual({'added': [], 'removed': [], 'unchanged': 1},
+                                 json.load(f)['edges'])
+
+            try:
+                CellmapsPPIDownloader(outdir=run_dir, output_compression='bz2')
+                self.fail('Expected exception')
+            except CellMapsPPIDownloaderError as ce:
+                self.assertTrue('Unknown output_compression: bz2' in str(ce))
+        finally:
+            shutil.rmtree(temp_dir)
@@ -4,11 +4,17 @@
 """Tests for `cellmaps_imagedownloader` package."""
 
 import os
+import sys
+import json
 import tempfile
 import shutil
+import subprocess
 
 import unittest
+from unittest.mock import MagicMock, patch
 from cellmaps_ppidownloader import cellmaps_ppidownloadercmd
+from cellmaps_ppidownloader.exceptions import CellMapsPPIDownloaderError
+from cellmaps_ppidownloader.genecache import GeneQueryCache
 
 
 class TestCellmapsDownloader(unittest.TestCase):
@@ -48,3 +54,144 @@ class TestCellmapsDownloader(unittest.TestCase):
             self.assertEqual(res, 1)
         finally:
             shutil.rmtree(temp_dir)
+
+    def test_import_does_not_load_heavy_dependencies(self):
+        code = ('import sys\n'
+                'import cellmaps_ppidownloader.cellmaps_ppidownloadercmd\n'
+                'from cellmaps_ppidownloader.gene import GeneQuery\n'
+                'GeneQuery()\n'
+                'print(",".join(m for m in ["pandas", "ndex2", "mygene", "tqdm", "ijson"]'
+                ' if m in sys.modules))\n')
+        res = subprocess.run([sys.executable, '-c', code], check=True,
+                             stdout=subprocess.PIPE, universal_newlines=True)
+        self.assertEqual('', res.stdout.strip())
+
+    def test_get_batch_jobs(self):
+        temp_dir = tempfile.mkdtemp()
+        try:
+            manifest = os.path.join(temp_dir, 'manifest.json')
+            with open(manifest, 'w') as f:
+                json.dump([{'outdir': 'one', 'edgelist': 'e.tsv',
+                            'provenance': 'p.json'},
+                           {'outdir': '/abs/two', 'cm4ai_table': 'apms.tsv'}], f)
+            batchdir = os.path.join(temp_dir, 'batch')
+            theargs = cellmaps_ppidownloadercmd._parse_arguments('hi', [batchdir,
+                                                                        '--batch_manifest',
+                                                                        manifest,
+                                                                        '--mygene_workers', '2'])
+            jobs = cellmaps_ppidownloadercmd._get_batch_jobs(theargs)
+            self.assertEqual(2, len(jobs))
+            self.assertEqual(os.path.join(batchdir, 'one'), jobs[0].outdir)
+            self.assertEqual('e.tsv', jobs[0].edgelist)
+            self.assertEqual('p.json', jobs[0].provenance)
+            self.assertEqual(2, jobs[0].mygene_workers)
+            self.assertIsNone(jobs[0].batch_manifest)
+            self.assertEqual(os.path.join(batchdir, 'mygene_cache.sqlite'),
+                             jobs[0].mygene_cache)
+            self.assertEqual('/abs/two', jobs[1].outdir)
+            self.assertEqual('apms.tsv', jobs[1].cm4ai_table)
+            self.assertIsNone(jobs[1].edgelist)
+
+            with open(manifest, 'w') as f:
+                json.dump([{'outdir': 'one', 'foo': 'bar'}], f)
+            try:
+                cellmaps_ppidownloadercmd._get_batch_jobs(theargs)
+                self.fail('Expected exception')
+            except CellMapsPPIDownloaderError as ce:
+                self.assertEqual('Job 0 in ' + manifest +
+                                 ' sets unknown flag: foo', str(ce))
+        finally:
+            shutil.rmtree(temp_dir)
+
+    def test_get_run_cache_key(self):
+        temp_dir = tempfile.mkdtemp()
+        try:
+            edgelist = os.path.join(temp_dir, 'edgelist.tsv')
+            with open(edgelist, 'w') as f:
+                f.write('GeneID1\tGeneID2\n1\t2\n')
+
+            def get_key(*extra_args):
+                theargs = cellmaps_ppidownloadercmd._parse_arguments('hi', [temp_dir,
+                                                                            '--edgelist',
+                                                                            edgelist] +
+                                                                     list(extra_args))
+                return cellmaps_ppidownloadercmd._get_run_cache_key(theargs)
+
+            key = get_key()
+            self.assertEqual(key, get_key('--mygene_workers', '8', '--run_cache', 'foo'))
+            self.assertNotEqual(key, get_key('--edgelist_geneid_one_col', 'X'))
+            self.assertNotEqual(key, get_key('--output_compression', 'gzip'))
+            self.assertNotEqual(key, get_key('--gene_info', edgelist))
+            cache_key = get_key('--mygene_cache', 'foo')
+            self.assertEqual(cache_key, get_key('--mygene_cache', 'bar'))
+            self.assertNotEqual(cache_key, get_key('--mygene_cache', 'foo',
+                                                   '--mygene_cache_ttl', '10'))
+
+            with open(edgelist, 'a') as f:
+                f.write('1\t3\n')
+            self.assertNotEqual(key, get_key())
+        finally:
+            shutil.rmtree(temp_dir)
+
+    def test_get_run_cache_max_age(self):
+        def get_max_age(*extra_args):
+            theargs = cellmaps_ppidownloadercmd._parse_arguments('hi', ['outdir'] +
+                                                                 list(extra_args))
+            return cellmaps_ppidownloadercmd._get_run_cache_max_age(theargs)
+
+        self.assertEqual(GeneQueryCache.DEFAULT_TTL, get_max_age())
+        self.assertEqual(10.0, get_max_age('--mygene_cache_ttl', '10'))
+        self.assertIsNone(get_max_age('--gene_info', 'foo'))
+        self.assertEqual(5.0, get_max_age('--gene_info', 'foo',
+                                          '--run_cache_max_age', '5'))
+
+    def test_run_looks_up_run_cache_entry_once(self):
+        temp_dir = tempfile.mkdtemp()
+        try:
+            edgelist = os.path.join(temp_dir, 'edgelist.tsv')
+            with open(edgelist, 'w') as f:
+                f.write('GeneID1\tGeneID2\n1\t2\n')
+            provenance = os.path.join(temp_dir, 'provenance.json')
+            with open(provenance, 'w') as f:
+                json.dump({}, f)
+            theargs = cellmaps_ppidownloadercmd._parse_arguments('hi', [os.path.join(temp_dir, 'out'),
+                                                                        '--edgelist', edgelist,
+                                                                        '--provenance', provenance,
+                                                                        '--run_cache',
+                                                                        os.path.join(temp_dir, 'cache')])
+            entry = {'key': 'x', 'files': {}, 'entrydir': temp_dir}
+            # entry expires after it is first looked up
+            get_entry = MagicMock(side_effect=[entry, None])
+            with patch.object(cellmaps_ppidownloadercmd.RunCache, 'get_entry', get_entry), \
+                    patch.object(cellmaps_ppidownloadercmd, 'CellmapsPPIDownloader') as runner:
+                runner.return_value.run.return_value = 0
+                self.assertEqual(0, cellmaps_ppidownloadercmd._run(theargs))
+            get_entry.assert_called_once()
+            kwargs = runner.call_args.kwargs
+            self.assertIsNone(kwargs['apmsgen'])
+            self.assertEqual(entry, kwargs['run_cache_entry'])
+        finally:
+            shutil.rmtree(temp_dir)
+
+    def test_main_batch_writes_summary(self):
+        temp_dir = tempfile.mkdtemp()
+        try:
+            manifest = os.path.join(temp_dir, 'manifest.json')
+            with open(manifest, 'w') as f:
+                json.dump([{'outdir': 'one'},
+                           {'outdir': 'two',
+                            'provenance': os.path.join(temp_dir, 'doesnotexist.json')}], f)
+            batchdir = os.path.join(temp_dir, 'batch')
+            res = cellmaps_ppidownloadercmd.main(['myprog.py', batchdir,
+                                                  '--batch_manifest', manifest,
+                                                  '--batch_workers', '2'])
+            self.assertEqual(2, res)
+            with open(os.path.join(batchdir,
+                                   cellmaps_ppidownloadercmd.BATCH_SUMMARY_FILE), 'r') as f:
+                summary = json.load(f)
+            self.assertEqual(os.path.abspath(manifest), summary['manifest'])
+            self.assertEqual([{'outdir': os.path.join(batchdir, 'one'), 'exitcode': 1},
+                              {'outdir': os.path.join(batchdir, 'two'), 'exitcode': 2}],
+                             summary['jobs'])
+        finally:
+            shutil.rmtree(temp_dir)
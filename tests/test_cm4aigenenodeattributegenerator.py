@@ -4,12 +4,14 @@
 """Tests for `CM4AIGeneNodeAttributeGenerator`"""
 
 import os
+import gzip
 import unittest
 import shutil
 import tempfile
 import csv
+from unittest.mock import MagicMock
 
-
+from cellmaps_ppidownloader.exceptions import CellMapsPPIDownloaderError
 from cellmaps_ppidownloader.gene import CM4AIGeneNodeAttributeGenerator
 
 SKIP_REASON = 'CELLMAPS_PPIDOWNLOADER_INTEGRATION_TEST ' \
@@ -61,6 +63,63 @@ class TestCM4AIGeneNodeAttributeGenerator(unittest.TestCase):
         finally:
             shutil.rmtree(temp_dir)
 
+    def test_get_apms_edgelist_from_tsvfile_with_filtering(self):
+        temp_dir = tempfile.mkdtemp()
+        try:
+            tsvfile = os.path.join(temp_dir, 'foo.tsv')
+            self.create_tsvfile(tsvfile)
+            with open(tsvfile, 'a') as f:
+                f.write('NA\tP12345\tbad\t5.0\n')
+                f.write('SAP18\tO00422\t0.05\t1.5\n')
+            edgelist = CM4AIGeneNodeAttributeGenerator.get_apms_edgelist_from_tsvfile(tsvfile,
+                                                                                      bfdr_col='BFDR.x',
+                                                                                      foldchange_col='FoldChange.x')
+            # BFDR of 10.0, negative FoldChange, missing values and
+            # non numeric BFDR are all filtered out
+            self.assertEqual([{'Bait': 'DNMT3A', 'Prey': 'O00422'},
+                              {'Bait': 'SAP18', 'Prey': 'O00422'}], list(edgelist))
+
+            edgelist = CM4AIGeneNodeAttributeGenerator.get_apms_edgelist_from_tsvfile(tsvfile,
+                                                                                      foldchange_col='FoldChange.x')
+            self.assertEqual(['DNMT3A', 'NA', 'SAP18'], edgelist.get_column('Bait'))
+
+            # NA bait kept as a string when not filtering
+            edgelist = CM4AIGeneNodeAttributeGenerator.get_apms_edgelist_from_tsvfile(tsvfile,
+                                                                                      bfdr_col='nonexistent')
+            self.assertEqual(5, len(edgelist))
+            self.assertEqual({'Bait': 'NA', 'Prey': 'P12345'}, edgelist[3])
+        finally:
+            shutil.rmtree(temp_dir)
+
+    def test_get_apms_edgelist_from_gzip_tsvfile(self):
+        temp_dir = tempfile.mkdtemp()
+        try:
+            tsvfile = os.path.join(temp_dir, 'foo.tsv')
+            self.create_tsvfile(tsvfile)
+            gzfile = tsvfile + '.gz'
+            with open(tsvfile, 'rb') as in_f:
+                with gzip.open(gzfile, 'wb') as out_f:
+                    out_f.write(in_f.read())
+            edgelist = CM4AIGeneNodeAttributeGenerator.get_apms_edgelist_from_tsvfile(gzfile,
+                                                                                      bfdr_col='BFDR.x',
+                                                                                      foldchange_col='FoldChange.x')
+            self.assertEqual([{'Bait': 'DNMT3A', 'Prey': 'O00422'}], list(edgelist))
+        finally:
+            shutil.rmtree(temp_dir)
+
+    def test_get_apms_edgelist_from_tsvfile_missing_bait_col(self):
+        temp_dir = tempfile.mkdtemp()
+        try:
+            tsvfile = os.path.join(temp_dir, 'foo.tsv')
+            self.create_tsvfile(tsvfile)
+            CM4AIGeneNodeAttributeGenerator.get_apms_edgelist_from_tsvfile(tsvfile,
+                                                                           bait_col='foo')
+            self.fail('Expected exception')
+        except CellMapsPPIDownloaderError as ce:
+            self.assertEqual('Column foo not found in ' + tsvfile, str(ce))
+        finally:
+            shutil.rmtree(temp_dir)
+
     @unittest.skip('This needs to be refactored to hit mock object. skipping for now')
     def test_get_baits_to_ensemblsymbolmap(self):
         temp_dir = tempfile.mkdtemp()
@@ -77,6 +136,44 @@ class TestCM4AIGeneNodeAttributeGenerator(unittest.TestCase):
         finally:
             shutil.rmtree(temp_dir)
 
-
-
-
+    def test_get_apms_edgelist_resolves_baits_and_preys_once(self):
+        def fake_get_symbols_for_genes(genelist, scopes=None):
+            if scopes == 'symbol':
+                return [{'query': 'DNMT3A', '_id': '1788', 'symbol': 'DNMT3A',
+                         'ensembl': {'gene': 'ENSG00000119772'}},
+                        {'query': 'HDAC2', '_id': '3066', 'symbol': 'HDAC2',
+                         'ensembl': {'gene': 'ENSG00000196591'}}]
+            return [{'query': 'O00422', '_id': '10284', 'symbol': 'SAP18',
+                     'ensembl': {'gene': 'ENSG00000150459'}},
+                    {'query': 'Q9Y2K7', '_id': '22992', 'symbol': 'KDM2A',
+                     'ensembl': [{'gene': 'ENSG00000173120'},
+                                 {'gene': 'ENSG00000999999'}]},
+                    {'query': 'P09429', 'notfound': True}]
+
+        mockquery = MagicMock()
+        mockquery.get_symbols_for_genes = MagicMock(side_effect=fake_get_symbols_for_genes)
+        gen = CM4AIGeneNodeAttributeGenerator(apms_edgelist=[{'Bait': 'DNMT3A', 'Prey': 'O00422'},
+                                                             {'Bait': 'HDAC2', 'Prey': 'Q9Y2K7'},
+                                                             {'Bait': 'HDAC2', 'Prey': 'P09429'}],
+                                              genequery=mockquery)
+        edgelist = gen.get_apms_edgelist()
+        self.assertEqual(2, mockquery.get_symbols_for_genes.call_count)
+        scopes = {}
+        for call in mockquery.get_symbols_for_genes.call_args_list:
+            scopes[call.kwargs['scopes']] = sorted(call.args[0])
+        self.assertEqual({'symbol': ['DNMT3A', 'HDAC2'],
+                          'uniprot': ['O00422', 'P09429', 'Q9Y2K7']}, scopes)
+
+        self.assertEqual(2, len(edgelist))
+        self.assertEqual({'GeneID1': '1788', 'Symbol1': 'DNMT3A',
+                          'Ensembl1': 'ENSG00000119772',
+                          'GeneID2': '10284', 'Symbol2': 'SAP18',
+                          'Ensembl2': 'ENSG00000150459'}, edgelist[0])
+        self.assertEqual('ENSG00000173120;ENSG00000999999', edgelist[1]['Ensembl2'])
+
+        # second call should not query again
+        gen.get_apms_edgelist()
+        self.assertEqual(2, mockquery.get_symbols_for_genes.call_count)
+
+        # baits are genes in GeneID1 column
+        self.assertEqual({'1788': 1, '3066': 1}, gen.get_bait_interactor_counts())
@@ -0,0 +1,104 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for `ColumnarWriter`"""
+
+import os
+import gzip
+import shutil
+import tempfile
+import unittest
+
+from cellmaps_ppidownloader.exceptions import CellMapsPPIDownloaderError
+from cellmaps_ppidownloader.columnar import ColumnarWriter
+
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+SKIP_REASON = 'pyarrow is not installed'
+
+
+class TestColumnarWriter(unittest.TestCase):
+    """Tests for `ColumnarWriter`"""
+
+    def setUp(self):
+        self._temp_dir = tempfile.mkdtemp()
+        self._edgelist = os.path.join(self._temp_dir, 'ppi_edgelist.tsv')
+        with open(self._edgelist, 'w', newline='') as f:
+            f.write('geneA\tgeneB\r\nA\t"B""X"\r\nA\tC\r\n')
+        self._attrs = os.path.join(self._temp_dir, 'ppi_gene_node_attributes.tsv')
+        with open(self._attrs, 'w', newline='') as f:
+            f.write('name\trepresents\tambiguous\tbait\r\n'
+                    'A\tensembl:E1\t\tTrue\r\n'
+                    'C\t\tD,E\tFalse\r\n')
+
+    def tearDown(self):
+        shutil.rmtree(self._temp_dir)
+
+    def test_invalid_format(self):
+        try:
+            ColumnarWriter(columnar_format='csv')
+            self.fail('Expected exception')
+        except CellMapsPPIDownloaderError as ce:
+            self.assertEqual('Unknown columnar format: csv must be one of '
+                             'parquet, arrow', str(ce))
+
+    def test_get_columnar_file(self):
+        self.assertEqual(os.path.join(self._temp_dir, 'ppi_edgelist.parquet'),
+                         ColumnarWriter().get_columnar_file(self._edgelist))
+        self.assertEqual(os.path.join(self._temp_dir, 'ppi_edgelist.arrow'),
+                         ColumnarWriter(columnar_format='arrow').get_columnar_file(self._edgelist))
+        self.assertEqual(os.path.join(self._temp_dir, 'ppi_edgelist.parquet'),
+                         ColumnarWriter().get_columnar_file(self._edgelist + '.gz'))
+
+    @unittest.skipUnless(pyarrow is None, 'pyarrow is installed')
+    def test_write_without_pyarrow(self):
+        try:
+            ColumnarWriter().write(self._edgelist)
+            self.fail('Expected exception')
+        except CellMapsPPIDownloaderError as ce:
+            self.assertEqual('pyarrow is required for columnar output, '
+                             'but it is not installed. Install with: '
+                             'pip install cellmaps_ppidownloader[columnar]',
+                             str(ce))
+
+    @unittest.skipIf(pyarrow is None, SKIP_REASON)
+    def test_write_parquet(self):
+        import pyarrow.parquet as pq
+        writer = ColumnarWriter()
+        outfile = writer.write(self._edgelist)
+        table = pq.read_table(outfile)
+        self.assertEqual(['A', 'A'], table.column('geneA').to_pylist())
+        self.assertEqual(['B"X', 'C'], table.column('geneB').to_pylist())
+        self.assertTrue(pyarrow.types.is_dictionary(table.schema.field('geneA').type))
+
+        table = pq.read_table(writer.write(self._attrs))
+        self.assertEqual([True, False], table.column('bait').to_pylist())
+        self.assertEqual(['', 'D,E'], table.column('ambiguous').to_pylist())
+        self.assertTrue(pyarrow.types.is_dictionary(table.schema.field('name').type))
+
+    @unittest.skipIf(pyarrow is None, SKIP_REASON)
+    def test_write_arrow(self):
+        outfile = ColumnarWriter(columnar_format='arrow').write(self._edgelist)
+        with pyarrow.memory_map(outfile, 'r') as source:
+            table = pyarrow.ipc.open_file(source).read_all()
+        self.assertEqual(['B"X', 'C'], table.column('geneB').to_pylist())
+        self.assertTrue(pyarrow.types.is_dictionary(table.schema.field('geneB').type))
+
+    @unittest.skipIf(pyarrow is None, SKIP_REASON)
+    def test_write_compression_detected_from_contents(self):
+        import pyarrow.parquet as pq
+        with open(self._attrs, 'rb') as f:
+            data = f.read()
+        # gzip compressed file without .gz extension
+        with gzip.open(self._attrs, 'wb') as f:
+            f.write(data)
+        table = pq.read_table(ColumnarWriter().write(self._attrs))
+        self.assertEqual(['A', 'C'], table.column('name').to_pylist())
+        self.assertEqual([True, False], table.column('bait').to_pylist())
+
+
+if __name__ == '__main__':
+    unittest.main()
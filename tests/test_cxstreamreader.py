@@ -0,0 +1,114 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for `CXStreamReader`"""
+
+import io
+import os
+import json
+import unittest
+import tempfile
+import shutil
+from unittest.mock import MagicMock
+import ndex2
+
+from cellmaps_ppidownloader.exceptions import CellMapsPPIDownloaderError
+from cellmaps_ppidownloader.cx import CXStreamReader
+from cellmaps_ppidownloader.ndexloader import NdexNetworkLoader
+from cellmaps_ppidownloader.gene import NdexGeneNodeAttributeGenerator
+from tests.test_ndexnetworkloader import TEST_CX
+
+TEST_CX2 = [{'CXVersion': '2.0', 'hasFragments': False},
+            {'metaData': [{'name': 'attributeDeclarations', 'elementCount': 1},
+                          {'name': 'nodes', 'elementCount': 3},
+                          {'name': 'edges', 'elementCount': 2}]},
+            {'attributeDeclarations': [{'nodes': {'name': {'d': 'string'},
+                                                  'represents': {'d': 'string'},
+                                                  'bait': {'d': 'boolean', 'a': 'b',
+                                                           'v': False}},
+                                        'edges': {'score': {'d': 'double'}}}]},
+            {'edges': [{'id': 3, 's': 0, 't': 1, 'v': {'score': 0.5}},
+                       {'id': 4, 's': 0, 't': 2, 'v': {}}]},
+            {'nodes': [{'id': 0, 'v': {'name': 'HDAC2', 'b': True,
+                                       'represents': 'ensembl:ENSG00000196591'}},
+                       {'id': 1, 'v': {'name': 'SAP18'}},
+                       {'id': 2, 'v': {}}]},
+            {'status': [{'error': '', 'success': True}]}]
+
+
+class TestCXStreamReader(unittest.TestCase):
+    """Tests for `CXStreamReader`"""
+
+    def setUp(self):
+        """Set up test fixtures, if any."""
+        self._temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        """Tear down test fixtures, if any."""
+        shutil.rmtree(self._temp_dir)
+
+    def test_constructor_none_source(self):
+        try:
+            CXStreamReader()
+            self.fail('Expected exception')
+        except CellMapsPPIDownloaderError as ce:
+            self.assertEqual('source is None', str(ce))
+
+    def test_iter_aspect_elements(self):
+        reader = CXStreamReader(io.BytesIO(json.dumps(TEST_CX).encode()))
+        res = list(reader.iter_aspect_elements(['edges', 'edgeAttributes']))
+        self.assertEqual([('edges', {'@id': 3, 's': 0, 't': 1}),
+                          ('edges', {'@id': 4, 's': 0, 't': 2}),
+                          ('edgeAttributes', {'po': 3, 'n': 'score',
+                                              'v': 0.5, 'd': 'double'})], res)
+
+    def test_get_apms_tables_matches_nicecx(self):
+        cx_file = os.path.join(self._temp_dir, 'net.cx')
+        with open(cx_file, 'w') as f:
+            json.dump(TEST_CX, f)
+        edgelist, baitlist, gene_node_attrs, errors = CXStreamReader(cx_file).get_apms_tables()
+
+        loader = NdexNetworkLoader(cachedir=self._temp_dir, ndex_client=MagicMock())
+        loader._networks['net'] = ndex2.create_nice_cx_from_file(cx_file)
+        self.assertEqual(NdexGeneNodeAttributeGenerator.get_apms_edgelist_from_ndex('net', loader=loader),
+                         edgelist)
+        self.assertEqual(NdexGeneNodeAttributeGenerator.get_apms_baitlist_from_ndex('net', loader=loader),
+                         baitlist)
+        nicecx_gen = NdexGeneNodeAttributeGenerator(uuid='net', loader=loader)
+        self.assertEqual(nicecx_gen.get_gene_node_attributes(), (gene_node_attrs, errors))
+
+    def test_get_apms_tables_cx2(self):
+        cx_file = os.path.join(self._temp_dir, 'net.cx2')
+        with open(cx_file, 'w') as f:
+            json.dump(TEST_CX2, f)
+        gen = NdexGeneNodeAttributeGenerator.create_from_cx(cx_file, genequery=MagicMock())
+        self.assertEqual([{'GeneID1': '0', 'Symbol1': 'HDAC2',
+                           'GeneID2': '1', 'Symbol2': 'SAP18', 'score': 0.5},
+                          {'GeneID1': '0', 'Symbol1': 'HDAC2',
+                           'GeneID2': '2', 'Symbol2': None}],
+                         gen.get_apms_edgelist())
+        self.assertEqual([{'GeneSymbol': 'HDAC2', 'GeneID': '0',
+                           'NumInteractors': 2}], gen._apms_baitlist)
+        gene_node_attrs, errors = gen.get_gene_node_attributes()
+        self.assertEqual(["Node 2 has no 'name'"], errors)
+        self.assertEqual({'0': {'name': 'HDAC2',
+                                'represents': 'ensembl:ENSG00000196591',
+                                'ambiguous': None, 'bait': True},
+                          '1': {'name': 'SAP18', 'represents': None,
+                                'ambiguous': None, 'bait': False}},
+                         gene_node_attrs)
+
+    def test_create_from_ndex_streaming(self):
+        client = MagicMock()
+        resp = MagicMock()
+        resp.status_code = 200
+        resp.raw = io.BytesIO(json.dumps(TEST_CX).encode())
+        client.get_network_as_cx_stream = MagicMock(return_value=resp)
+        loader = NdexNetworkLoader(ndex_client=client)
+        gen = NdexGeneNodeAttributeGenerator.create_from_ndex('abc', loader=loader,
+                                                              genequery=MagicMock(),
+                                                              streaming=True)
+        self.assertEqual('abc', gen.uuid)
+        self.assertIsNone(gen.nice_cx)
+        self.assertEqual(2, len(gen.get_apms_edgelist()))
+        self.assertTrue(resp.raw.closed)
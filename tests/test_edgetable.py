@@ -0,0 +1,145 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for `EdgeTable`"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from cellmaps_ppidownloader.exceptions import CellMapsPPIDownloaderError
+from cellmaps_ppidownloader.edgetable import (EdgeTable, Vocabulary, TSVEdgeReader,
+                                              ParallelTSVEdgeReader)
+
+
+class TestEdgeTable(unittest.TestCase):
+    """Tests for `EdgeTable`"""
+
+    def test_vocabulary(self):
+        vocab = Vocabulary()
+        self.assertEqual(0, vocab.intern('a'))
+        self.assertEqual(1, vocab.intern('b'))
+        self.assertEqual(0, vocab.intern('a'))
+        self.assertEqual(2, len(vocab))
+        self.assertEqual('b', vocab.get_value(1))
+        self.assertEqual(1, vocab.get_code('b'))
+        self.assertIsNone(vocab.get_code('c'))
+
+        # unhashable values are stored but not deduplicated
+        self.assertEqual(2, vocab.intern(['x']))
+        self.assertEqual(3, vocab.intern(['x']))
+        self.assertIsNone(vocab.get_code(['x']))
+
+    def test_vocabulary_intern_many(self):
+        vocab = Vocabulary()
+        vocab.intern('b')
+        self.assertEqual([1, 0, 1, 2], list(vocab.intern_many(['a', 'b', 'a', 'c'])))
+        self.assertEqual(['b', 'a', 'c'], vocab.get_values())
+        try:
+            vocab.intern_many([['x']])
+            self.fail('Expected exception')
+        except TypeError:
+            pass
+
+    def test_empty_table(self):
+        table = EdgeTable(columns=['GeneID1', 'GeneID2'])
+        self.assertEqual(0, len(table))
+        self.assertEqual([], list(table))
+        self.assertEqual([], table)
+        self.assertEqual(['GeneID1', 'GeneID2'], table.get_columns())
+
+    def test_append_values_and_codes(self):
+        table = EdgeTable(columns=['GeneID1', 'GeneID2'])
+        table.append_values(('1', '2'))
+        table.append_values(('1', '3'))
+        self.assertEqual(2, len(table))
+        self.assertEqual({'GeneID1': '1', 'GeneID2': '3'}, table[1])
+        self.assertEqual({'GeneID1': '1', 'GeneID2': '3'}, table[-1])
+        self.assertEqual([0, 0], list(table.get_codes('GeneID1')))
+        self.assertEqual(['2', '3'], table.get_column('GeneID2'))
+        # repeated value is stored once
+        self.assertEqual(3, len(table.get_vocabulary()))
+
+        try:
+            table[2]
+            self.fail('Expected exception')
+        except IndexError:
+            pass
+
+    def test_from_rows_with_new_and_missing_columns(self):
+        rows = [{'GeneID1': '1', 'GeneID2': '2'},
+                {'GeneID1': '1', 'GeneID2': '3', 'score': 0.5},
+                {'GeneID1': '4', 'GeneID2': None}]
+        table = EdgeTable.from_rows(rows)
+        self.assertEqual(rows, table)
+        self.assertEqual(table, rows)
+        self.assertEqual(['GeneID1', 'GeneID2', 'score'], table.get_columns())
+        self.assertEqual([None, 0.5, None], table.get_column('score'))
+        self.assertEqual(EdgeTable.MISSING, table.get_codes('score')[0])
+
+        table.set_value(0, 'score', 0.1)
+        table.set_value(2, 'other', 'x')
+        self.assertEqual({'GeneID1': '1', 'GeneID2': '2', 'score': 0.1}, table[0])
+        self.assertEqual({'GeneID1': '4', 'GeneID2': None, 'other': 'x'}, table[2])
+        self.assertNotEqual(rows, table)
+
+    def test_from_columns(self):
+        table = EdgeTable.from_columns({'Bait': ['A', 'A'],
+                                        'Prey': ['B', 'C']})
+        self.assertEqual([{'Bait': 'A', 'Prey': 'B'},
+                          {'Bait': 'A', 'Prey': 'C'}], list(table))
+
+        try:
+            EdgeTable.from_columns({'Bait': ['A'], 'Prey': []})
+            self.fail('Expected exception')
+        except CellMapsPPIDownloaderError as ce:
+            self.assertEqual('Column Prey has 0 values, expected 1', str(ce))
+
+    def test_tsvedgereader_none_tsvfile(self):
+        try:
+            TSVEdgeReader()
+            self.fail('Expected exception')
+        except CellMapsPPIDownloaderError as ce:
+            self.assertEqual('tsvfile is None', str(ce))
+
+    def test_paralleltsvedgereader_matches_serial_read(self):
+        tsvfile = os.path.join(os.path.dirname(__file__), 'data', 'edgelist.tsv')
+        columns = {'GeneID1': 'GeneID1', 'Symbol1': 'Symbol1',
+                   'GeneID2': 'GeneID2', 'Symbol2': 'Symbol2'}
+        expected = list(TSVEdgeReader(tsvfile, columns=columns))
+        for workers in [1, 2]:
+            table = ParallelTSVEdgeReader(tsvfile, columns=columns,
+                                          workers=workers,
+                                          chunk_size=4096).read()
+            self.assertEqual(list(columns.keys()), table.get_columns())
+            self.assertEqual(expected, table)
+
+    def test_paralleltsvedgereader_renamed_columns_and_line_endings(self):
+        temp_dir = tempfile.mkdtemp()
+        try:
+            tsvfile = os.path.join(temp_dir, 'foo.tsv')
+            with open(tsvfile, 'w', newline='') as f:
+                f.write('x\tA\tB\r\n1\t2\t3\r\n\r\n4\t5\r\n6\t"7"\t8')
+            reader = ParallelTSVEdgeReader(tsvfile, columns={'one': 'B', 'two': 'A'},
+                                           workers=1, chunk_size=1)
+            self.assertEqual([{'one': '3', 'two': '2'},
+                              {'one': None, 'two': '5'},
+                              {'one': '8', 'two': '7'}], reader.read())
+
+            reader = ParallelTSVEdgeReader(tsvfile, columns={'one': 'C'})
+            try:
+                reader.read()
+                self.fail('Expected exception')
+            except CellMapsPPIDownloaderError as ce:
+                self.assertEqual('Column C not found in ' + tsvfile, str(ce))
+
+            open(tsvfile, 'w').close()
+            self.assertEqual(0, len(ParallelTSVEdgeReader(tsvfile,
+                                                          columns={'one': 'B'}).read()))
+        finally:
+            shutil.rmtree(temp_dir)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,205 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for `fileutils` module"""
+
+import os
+import gzip
+import hashlib
+import shutil
+import tempfile
+import unittest
+import subprocess
+from unittest.mock import patch, MagicMock
+
+from cellmaps_ppidownloader.exceptions import CellMapsPPIDownloaderError
+from cellmaps_ppidownloader import fileutils
+
+
+class TestFileUtils(unittest.TestCase):
+    """Tests for `fileutils` module"""
+
+    def setUp(self):
+        self._temp_dir = tempfile.mkdtemp()
+        self._source = os.path.join(self._temp_dir, 'source.tsv')
+        self._data = b'GeneID1\tGeneID2\n' + b'1\t2\n' * 1000
+        with open(self._source, 'wb') as f:
+            f.write(self._data)
+        self._sha256 = hashlib.sha256(self._data).hexdigest()
+
+    def tearDown(self):
+        shutil.rmtree(self._temp_dir)
+
+    def test_sha256_file_and_copy_file(self):
+        self.assertEqual(self._sha256, fileutils.sha256_file(self._source, chunk_size=7))
+        dest = os.path.join(self._temp_dir, 'dest.tsv')
+        self.assertEqual(self._sha256, fileutils.copy_file(self._source, dest,
+                                                           chunk_size=7))
+        with open(dest, 'rb') as f:
+            self.assertEqual(self._data, f.read())
+
+    def test_link_or_copy_file_modes(self):
+        dest = os.path.join(self._temp_dir, 'hardlink.tsv')
+        self.assertEqual(('hardlink', self._sha256),
+                         fileutils.link_or_copy_file(self._source, dest))
+        self.assertTrue(os.path.samefile(self._source, dest))
+
+        dest = os.path.join(self._temp_dir, 'symlink.tsv')
+        self.assertEqual(('symlink', self._sha256),
+                         fileutils.link_or_copy_file(self._source, dest,
+                                                     mode=fileutils.SYMLINK_MODE))
+        self.assertEqual(self._source, os.readlink(dest))
+
+        dest = os.path.join(self._temp_dir, 'copy.tsv')
+        self.assertEqual(('copy', self._sha256),
+                         fileutils.link_or_copy_file(self._source, dest,
+                                                     mode=fileutils.COPY_MODE))
+        self.assertFalse(os.path.islink(dest))
+        self.assertFalse(os.path.samefile(self._source, dest))
+
+    def test_link_or_copy_file_falls_back_to_copy(self):
+        dest = os.path.join(self._temp_dir, 'dest.tsv')
+        with patch('os.link', side_effect=OSError('cross device link')):
+            with patch('cellmaps_ppidownloader.fileutils.reflink_file',
+                       side_effect=OSError('not supported')):
+                self.assertEqual(('copy', self._sha256),
+                                 fileutils.link_or_copy_file(self._source, dest))
+        with open(dest, 'rb') as f:
+            self.assertEqual(self._data, f.read())
+
+    def test_link_or_copy_file_invalid_mode(self):
+        try:
+            fileutils.link_or_copy_file(self._source, 'foo', mode='move')
+            self.fail('Expected exception')
+        except CellMapsPPIDownloaderError as ce:
+            self.assertEqual('Unknown copy mode: move must be one of '
+                             'copy, link, symlink', str(ce))
+
+    def test_get_compression(self):
+        gzfile = self._source + '.gz'
+        with gzip.open(gzfile, 'wb') as f:
+            f.write(self._data)
+        zstfile = os.path.join(self._temp_dir, 'source.zst')
+        with open(zstfile, 'wb') as f:
+            f.write(fileutils.MAGIC_BYTES[fileutils.ZSTD] + b'rest')
+        emptyfile = os.path.join(self._temp_dir, 'empty.tsv')
+        open(emptyfile, 'w').close()
+        self.assertIsNone(fileutils.get_compression(self._source))
+        self.assertIsNone(fileutils.get_compression(emptyfile))
+        self.assertEqual(fileutils.GZIP, fileutils.get_compression(gzfile))
+        self.assertEqual(fileutils.ZSTD, fileutils.get_compression(zstfile))
+
+    def test_open_input_uncompressed(self):
+        with fileutils.open_input(self._source, mode='rb') as f:
+            self.assertEqual(self._data, f.read())
+        with fileutils.open_input(self._source, newline='') as f:
+            self.assertEqual(self._data.decode('utf-8'), f.read())
+
+    def test_open_input_gzip_without_pigz(self):
+        # named without .gz to show detection does not rely on suffix
+        gzfile = os.path.join(self._temp_dir, 'compressed.tsv')
+        with gzip.open(gzfile, 'wb') as f:
+            f.write(self._data)
+        with patch('shutil.which', return_value=None):
+            with fileutils.open_input(gzfile, mode='rb') as f:
+                self.assertEqual(self._data, f.read())
+            with fileutils.open_input(gzfile) as f:
+                self.assertEqual('GeneID1\tGeneID2\n', f.readline())
+                self.assertEqual(1000, len(f.readlines()))
+
+    def test_open_input_zstd_with_command(self):
+        if shutil.which('zstd') is None:
+            self.skipTest('zstd command not available')
+        zstfile = self._source + '.zst'
+        subprocess.run(['zstd', '-q', self._source, '-o', zstfile], check=True)
+        with fileutils.open_input(zstfile, mode='rb') as f:
+            self.assertEqual(self._data, f.read())
+
+        # closing before end of output stops command without error
+        with fileutils.open_input(zstfile) as f:
+            self.assertEqual('GeneID1\tGeneID2\n', f.readline())
+
+    def test_open_input_command_fails(self):
+        if shutil.which('zstd') is None:
+            self.skipTest('zstd command not available')
+        zstfile = os.path.join(self._temp_dir, 'corrupt.zst')
+        with open(zstfile, 'wb') as f:
+            f.write(fileutils.MAGIC_BYTES[fileutils.ZSTD] + b'not zstd data')
+        try:
+            with fileutils.open_input(zstfile, mode='rb') as f:
+                f.read()
+            self.fail('Expected exception')
+        except CellMapsPPIDownloaderError as ce:
+            self.assertTrue(str(ce).startswith('zstd -dcq ' + zstfile +
+                                               ' failed with exit code'))
+
+    def test_open_input_zstd_without_decompressor(self):
+        zstfile = os.path.join(self._temp_dir, 'source.zst')
+        with open(zstfile, 'wb') as f:
+            f.write(fileutils.MAGIC_BYTES[fileutils.ZSTD] + b'rest')
+        with patch('shutil.which', return_value=None):
+            with patch.dict('sys.modules', {'zstandard': None}):
+                try:
+                    fileutils.open_input(zstfile)
+                    self.fail('Expected exception')
+                except CellMapsPPIDownloaderError as ce:
+                    self.assertEqual(zstfile + ' is zstd compressed, but neither the '
+                                     'zstd command or zstandard package is '
+                                     'available', str(ce))
+
+
+    def test_get_compressed_file_and_strip_compression_suffix(self):
+        self.assertEqual('a.tsv', fileutils.get_compressed_file('a.tsv'))
+        self.assertEqual('a.tsv.gz', fileutils.get_compressed_file('a.tsv', compression='gzip'))
+        self.assertEqual('a.tsv.zst', fileutils.get_compressed_file('a.tsv', compression='zstd'))
+        for path in ['a.tsv', 'a.tsv.gz', 'a.tsv.zst']:
+            self.assertEqual('a.tsv', fileutils.strip_compression_suffix(path))
+        try:
+            fileutils.get_compressed_file('a.tsv', compression='bz2')
+            self.fail('Expected exception')
+        except CellMapsPPIDownloaderError as ce:
+            self.assertEqual('Unknown compression: bz2 must be one of gzip, zstd', str(ce))
+
+    def test_open_output_gzip_in_background_thread(self):
+        gzfile = os.path.join(self._temp_dir, 'out.tsv.gz')
+        with patch('shutil.which', return_value=None):
+            # small buffer so many chunks are handed to the thread
+            with fileutils.open_output(gzfile, compression=fileutils.GZIP,
+                                       newline='', buffer_size=64) as f:
+                self.assertTrue(isinstance(f.buffer.raw, fileutils._BackgroundWriter))
+                f.write(self._data.decode('utf-8'))
+        with gzip.open(gzfile, 'rb') as f:
+            self.assertEqual(self._data, f.read())
+
+    def test_open_output_uncompressed(self):
+        outfile = os.path.join(self._temp_dir, 'out.tsv')
+        with fileutils.open_output(outfile, mode='wb') as f:
+            f.write(self._data)
+        with open(outfile, 'rb') as f:
+            self.assertEqual(self._data, f.read())
+
+    def test_compress_file_zstd_with_command(self):
+        if shutil.which('zstd') is None:
+            self.skipTest('zstd command not available')
+        zstfile = self._source + '.zst'
+        self.assertEqual(self._sha256, fileutils.compress_file(self._source, zstfile,
+                                                               fileutils.ZSTD,
+                                                               chunk_size=7))
+        self.assertEqual(fileutils.ZSTD, fileutils.get_compression(zstfile))
+        with fileutils.open_input(zstfile, mode='rb') as f:
+            self.assertEqual(self._data, f.read())
+
+    def test_background_writer_error(self):
+        fileobj = MagicMock()
+        fileobj.write.side_effect = OSError('disk full')
+        writer = fileutils._BackgroundWriter(fileobj)
+        writer.write(b'abc')
+        try:
+            writer.close()
+            self.fail('Expected exception')
+        except CellMapsPPIDownloaderError as ce:
+            self.assertEqual('Error compressing output: disk full', str(ce))
+        fileobj.close.assert_called_once_with()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,144 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for `GeneInfoQuery`"""
+
+import os
+import gzip
+import unittest
+import tempfile
+import shutil
+
+from cellmaps_ppidownloader.exceptions import CellMapsPPIDownloaderError
+from cellmaps_ppidownloader.geneinfo import GeneInfoQuery
+
+GENE_INFO_HEADER = '#tax_id\tGeneID\tSymbol\tLocusTag\tSynonyms\tdbXrefs\t' \
+                   'chromosome\tmap_location\tdescription\n'
+
+
+class TestGeneInfoQuery(unittest.TestCase):
+    """Tests for `GeneInfoQuery`"""
+
+    def setUp(self):
+        """Set up test fixtures, if any."""
+        self._temp_dir = tempfile.mkdtemp()
+        self._gene_info = os.path.join(self._temp_dir, 'Homo_sapiens.gene_info')
+        with open(self._gene_info, 'w') as f:
+            f.write(GENE_INFO_HEADER)
+            f.write('9606\t2\tA2M\t-\tA2MD|CPAMD5\tMIM:103950|HGNC:HGNC:7|'
+                    'Ensembl:ENSG00000175899\t12\t12p13.31\talpha-2-macroglobulin\n')
+            f.write('9606\t3066\tHDAC2\t-\tHD2\tMIM:605164|HGNC:HGNC:4853|'
+                    'Ensembl:ENSG00000196591\t6\t6q21\thistone deacetylase 2\n')
+            f.write('9606\t100\tADA\t-\t-\tEnsembl:ENSG00000196839|'
+                    'Ensembl:ENSG00000999999\t20\t20q13.12\tadenosine deaminase\n')
+            f.write('9606\t55\tNOENS\t-\t-\t-\t1\t1p\tno ensembl\n')
+            f.write('10090\t11287\tPzp\t-\t-\tEnsembl:ENSMUSG00000030359\t6\t6 F2\tmouse\n')
+        self._uniprot = os.path.join(self._temp_dir, 'idmapping.tab')
+        with open(self._uniprot, 'w') as f:
+            f.write('P01023\tA2MG_HUMAN\t2\tNP_000005.3\n')
+            f.write('Q92769\tHDAC2_HUMAN\t3066; 999\tNP_001518.3\n')
+
+    def tearDown(self):
+        """Tear down test fixtures, if any."""
+        shutil.rmtree(self._temp_dir)
+
+    def test_constructor_none_gene_info(self):
+        try:
+            GeneInfoQuery()
+            self.fail('Expected exception')
+        except CellMapsPPIDownloaderError as ce:
+            self.assertEqual('gene_info_file is None', str(ce))
+
+    def test_missing_gene_info_file(self):
+        query = GeneInfoQuery(gene_info_file=os.path.join(self._temp_dir, 'nope'))
+        try:
+            query.get_symbols_for_genes(['2'])
+            self.fail('Expected exception')
+        except CellMapsPPIDownloaderError as ce:
+            self.assertTrue('is not a file' in str(ce))
+
+    def test_get_symbols_for_genes_by_id(self):
+        query = GeneInfoQuery(gene_info_file=self._gene_info)
+        try:
+            res = query.get_symbols_for_genes([2, '100', '55', '11287', 'foo'])
+            self.assertEqual([{'query': '2', '_id': '2', 'symbol': 'A2M',
+                               'ensembl': {'gene': 'ENSG00000175899'}},
+                              {'query': '100', '_id': '100', 'symbol': 'ADA',
+                               'ensembl': [{'gene': 'ENSG00000196839'},
+                                           {'gene': 'ENSG00000999999'}]},
+                              {'query': '55', '_id': '55', 'symbol': 'NOENS'},
+                              {'query': '11287', 'notfound': True},
+                              {'query': 'foo', 'notfound': True}], res)
+        finally:
+            query.close()
+
+    def test_get_symbols_for_genes_by_symbol_and_ensembl(self):
+        query = GeneInfoQuery(gene_info_file=self._gene_info)
+        try:
+            res = query.get_symbols_for_genes(['hdac2', 'Pzp'], scopes='symbol')
+            self.assertEqual([{'query': 'hdac2', '_id': '3066', 'symbol': 'HDAC2',
+                               'ensembl': {'gene': 'ENSG00000196591'}},
+                              {'query': 'Pzp', 'notfound': True}], res)
+            res = query.get_symbols_for_genes(['ENSG00000999999'],
+                                              scopes='ensembl.gene')
+            self.assertEqual('ADA', res[0]['symbol'])
+
+            res = query.querymany(['Pzp'], species='mouse', scopes='symbol')
+            self.assertEqual('11287', res[0]['_id'])
+        finally:
+            query.close()
+
+    def test_get_symbols_for_genes_by_uniprot(self):
+        query = GeneInfoQuery(gene_info_file=self._gene_info,
+                              uniprot_mapping_file=self._uniprot)
+        try:
+            res = query.get_symbols_for_genes(['Q92769', 'P01023', 'P99999'],
+                                              scopes='uniprot')
+            self.assertEqual(['HDAC2', 'A2M'], [r['symbol'] for r in res[0:2]])
+            self.assertEqual({'query': 'P99999', 'notfound': True}, res[2])
+        finally:
+            query.close()
+
+    def test_get_symbols_for_genes_by_symbol_any_species(self):
+        query = GeneInfoQuery(gene_info_file=self._gene_info)
+        try:
+            res = query.querymany(['pzp', 'a2m', 'foo'], scopes='symbol')
+            self.assertEqual(['11287', '2'], [r['_id'] for r in res[0:2]])
+            self.assertEqual({'query': 'foo', 'notfound': True}, res[2])
+        finally:
+            query.close()
+
+    def test_get_symbols_for_genes_gzip_input(self):
+        gz_gene_info = self._gene_info + '.gz'
+        with open(self._gene_info, 'rb') as f:
+            with gzip.open(gz_gene_info, 'wb') as gz:
+                gz.write(f.read())
+        gz_uniprot = self._uniprot + '.gz'
+        with open(self._uniprot, 'rb') as f:
+            with gzip.open(gz_uniprot, 'wb') as gz:
+                gz.write(f.read())
+        plain_query = GeneInfoQuery(gene_info_file=self._gene_info,
+                                    uniprot_mapping_file=self._uniprot)
+        query = GeneInfoQuery(gene_info_file=gz_gene_info,
+                              uniprot_mapping_file=gz_uniprot)
+        try:
+            for genes, scopes in [(['2', '100', '11287'], '_id'),
+                                  (['hdac2'], 'symbol'),
+                                  (['Q92769'], 'uniprot')]:
+                self.assertEqual(plain_query.get_symbols_for_genes(genes,
+                                                                   scopes=scopes),
+                                 query.get_symbols_for_genes(genes,
+                                                             scopes=scopes))
+        finally:
+            query.close()
+            plain_query.close()
+
+    def test_unsupported_scope(self):
+        query = GeneInfoQuery(gene_info_file=self._gene_info)
+        try:
+            query.get_symbols_for_genes(['2'], scopes='refseq')
+            self.fail('Expected exception')
+        except CellMapsPPIDownloaderError as ce:
+            self.assertEqual('Unsupported scope: refseq', str(ce))
+        finally:
+            query.close()
@@ -61,8 +61,20 @@ class TestGeneNodeAttributeGenerator(unittest.TestCase):
                           'ISY1-RAB43': 'ISY1,ISY1-RAB43'},
                          ambiguous_dict)
 
-
-
-
-
+    def test_add_geneids_to_set_cached_split(self):
+        gen = GeneNodeAttributeGenerator()
+        g_set = set()
+        ambiguous_dict = {}
+        res = gen.add_geneids_to_set(gene_set=g_set,
+                                     ambiguous_gene_dict=ambiguous_dict,
+                                     geneid='A , B')
+        self.assertEqual(['A', 'B'], res)
+        # modifying returned list does not change cached split
+        res.append('C')
+        self.assertEqual(['A', 'B'],
+                         gen.add_geneids_to_set(gene_set=g_set,
+                                                ambiguous_gene_dict=ambiguous_dict,
+                                                geneid='A , B'))
+        self.assertEqual({'A', 'B'}, g_set)
+        self.assertEqual({'A': 'A , B', 'B': 'A , B'}, ambiguous_dict)
 
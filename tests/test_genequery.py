@@ -9,7 +9,11 @@ import tempfile
 import shutil
 import json
 from unittest.mock import MagicMock
+import mygene
 from cellmaps_ppidownloader.gene import GeneQuery
+from cellmaps_ppidownloader.genecache import GeneQueryCache
+from cellmaps_ppidownloader.exceptions import CellMapsPPIDownloaderError
+from tests.stubmygene import StubMyGeneServer
 
 SKIP_REASON = 'CELLMAPS_PPIDOWNLOADER_INTEGRATION_TEST ' \
               'environment variable not set, cannot run integration ' \
@@ -38,6 +42,71 @@ class TestGeneQuery(unittest.TestCase):
                                                     fields=['field1'],
                                                     species='human')
 
+    def test_querymany_with_cache(self):
+        temp_dir = tempfile.mkdtemp()
+        try:
+            cache = GeneQueryCache(cachefile=os.path.join(temp_dir, 'cache.sqlite'))
+            mockquery = MagicMock()
+            mockquery.querymany = MagicMock(return_value=[{'query': '2', 'symbol': 'A2M'},
+                                                          {'query': '16', 'symbol': 'AARS1'}])
+            query = GeneQuery(mygeneinfo=mockquery, cache=cache)
+            res = query.querymany(queries=['2', '16'], scopes='_id',
+                                  fields=['symbol'], species='human')
+            self.assertEqual([{'query': '2', 'symbol': 'A2M'},
+                              {'query': '16', 'symbol': 'AARS1'}], res)
+
+            # only the uncached id should be sent to mygene
+            mockquery.querymany = MagicMock(return_value=[{'query': '5', 'notfound': True}])
+            res = query.querymany(queries=['16', '5', '2'], scopes='_id',
+                                  fields=['symbol'], species='human')
+            mockquery.querymany.assert_called_once_with(['5'], scopes='_id',
+                                                        fields=['symbol'],
+                                                        species='human')
+            self.assertEqual([{'query': '16', 'symbol': 'AARS1'},
+                              {'query': '5', 'notfound': True},
+                              {'query': '2', 'symbol': 'A2M'}], res)
+            self.assertEqual(2, cache.get_hits())
+            self.assertEqual(3, cache.get_misses())
+            cache.close()
+        finally:
+            shutil.rmtree(temp_dir)
+
+    def test_querymany_batched_keeps_input_order(self):
+        mockquery = MagicMock()
+        mockquery.querymany = MagicMock(side_effect=lambda q, **kwargs: [{'query': x} for x in q])
+        query = GeneQuery(mygeneinfo=mockquery, batch_size=2, max_workers=3)
+        res = query.querymany(queries=['1', '2', '3', '4', '5'], scopes='_id',
+                              fields=['symbol'], species='human')
+        self.assertEqual(['1', '2', '3', '4', '5'], [r['query'] for r in res])
+        self.assertEqual(3, mockquery.querymany.call_count)
+
+    def test_querymany_batch_fails_after_retries(self):
+        mockquery = MagicMock()
+        mockquery.querymany = MagicMock(side_effect=IOError('down'))
+        query = GeneQuery(mygeneinfo=mockquery, batch_size=2, retries=2,
+                          retry_wait=0.01)
+        try:
+            query.querymany(queries=['1'], scopes='_id')
+            self.fail('Expected exception')
+        except CellMapsPPIDownloaderError as ce:
+            self.assertEqual('MyGene query of 1 genes failed after 3 attempts: down',
+                             str(ce))
+        self.assertEqual(3, mockquery.querymany.call_count)
+
+    def test_querymany_against_stub_server(self):
+        with StubMyGeneServer(fail_first=1) as server:
+            mg = mygene.MyGeneInfo()
+            mg.url = server.get_url()
+            query = GeneQuery(mygeneinfo=mg, batch_size=3, max_workers=4,
+                              retries=1, retry_wait=0.01)
+            genes = [str(x) for x in range(10)]
+            res = query.get_symbols_for_genes(genelist=genes)
+            self.assertEqual(genes, [r['query'] for r in res])
+            self.assertEqual(['SYM' + g for g in genes], [r['symbol'] for r in res])
+            # 4 batches plus one retry
+            self.assertEqual(5, len(server.requests))
+            self.assertEqual('human', server.requests[0]['species'][0])
+
     @unittest.skipUnless(os.getenv('CELLMAPS_PPIDOWNLOADER_INTEGRATION_TEST') is not None, SKIP_REASON)
     def test_simple_query(self):
         query = GeneQuery()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for `GeneQueryCache`"""
+
+import os
+import time
+import unittest
+import tempfile
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+
+from cellmaps_ppidownloader.exceptions import CellMapsPPIDownloaderError
+from cellmaps_ppidownloader.genecache import GeneQueryCache
+
+
+class TestGeneQueryCache(unittest.TestCase):
+    """Tests for `GeneQueryCache`"""
+
+    def setUp(self):
+        """Set up test fixtures, if any."""
+        self._temp_dir = tempfile.mkdtemp()
+        self._cachefile = os.path.join(self._temp_dir, 'cache.sqlite')
+
+    def tearDown(self):
+        """Tear down test fixtures, if any."""
+        shutil.rmtree(self._temp_dir)
+
+    def test_constructor_none_cachefile(self):
+        try:
+            GeneQueryCache()
+            self.fail('Expected exception')
+        except CellMapsPPIDownloaderError as ce:
+            self.assertEqual('cachefile is None', str(ce))
+
+    def test_get_many_empty_cache(self):
+        cache = GeneQueryCache(cachefile=self._cachefile)
+        try:
+            found, missing = cache.get_many(['1', 2, '1'], species='human',
+                                            scopes='_id',
+                                            fields=['symbol'])
+            self.assertEqual({}, found)
+            self.assertEqual(['1', '2'], missing)
+            self.assertEqual(0, cache.get_hits())
+            self.assertEqual(2, cache.get_misses())
+        finally:
+            cache.close()
+
+    def test_get_many_counts_from_several_threads(self):
+        cache = GeneQueryCache(cachefile=self._cachefile)
+        try:
+            cache.put_many([{'query': '1', 'symbol': 'A'}], scopes='_id')
+
+            def get_many(_):
+                return cache.get_many(['1', '2'], scopes='_id')
+
+            with ThreadPoolExecutor(max_workers=8) as executor:
+                list(executor.map(get_many, range(200)))
+            self.assertEqual(200, cache.get_hits())
+            self.assertEqual(200, cache.get_misses())
+        finally:
+            cache.close()
+
+    def test_put_and_get_many_persists_across_instances(self):
+        cache = GeneQueryCache(cachefile=self._cachefile)
+        try:
+            cache.put_many([{'query': '1', 'symbol': 'A1BG'},
+                            {'query': '9', 'notfound': True}],
+                           species='human', scopes='_id',
+                           fields=['symbol', 'ensembl.gene'])
+        finally:
+            cache.close()
+
+        cache = GeneQueryCache(cachefile=self._cachefile)
+        try:
+            found, missing = cache.get_many(['1', '9', '3'], species='human',
+                                            scopes='_id',
+                                            fields=['ensembl.gene', 'symbol'])
+            self.assertEqual({'1': [{'query': '1', 'symbol': 'A1BG'}],
+                              '9': [{'query': '9', 'notfound': True}]},
+                             found)
+            self.assertEqual(['3'], missing)
+            self.assertEqual(2, cache.get_hits())
+            self.assertEqual(1, cache.get_misses())
+
+            # different scope should miss
+            found, missing = cache.get_many(['1'], species='human',
+                                            scopes='symbol',
+                                            fields=['ensembl.gene', 'symbol'])
+            self.assertEqual({}, found)
+            self.assertEqual(['1'], missing)
+        finally:
+            cache.close()
+
+    def test_expired_entries_are_evicted(self):
+        cache = GeneQueryCache(cachefile=self._cachefile, ttl=1)
+        try:
+            cache.put_many([{'query': '1', 'symbol': 'A1BG'}],
+                           species='human', scopes='_id')
+            found, missing = cache.get_many(['1'], species='human',
+                                            scopes='_id')
+            self.assertEqual(1, len(found))
+            time.sleep(1.1)
+            found, missing = cache.get_many(['1'], species='human',
+                                            scopes='_id')
+            self.assertEqual({}, found)
+            self.assertEqual(1, cache.evict_expired())
+        finally:
+            cache.close()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for `NdexNetworkLoader`"""
+
+import os
+import json
+import unittest
+import tempfile
+import shutil
+from unittest.mock import MagicMock, patch
+import ndex2
+
+from cellmaps_ppidownloader.exceptions import CellMapsPPIDownloaderError
+from cellmaps_ppidownloader.ndexloader import NdexNetworkLoader
+from cellmaps_ppidownloader.gene import NdexGeneNodeAttributeGenerator
+
+TEST_CX = [{'numberVerification': [{'longNumber': 281474976710655}]},
+           {'metaData': [{'name': 'nodes', 'elementCount': 3, 'idCounter': 2, 'version': '1.0'},
+                         {'name': 'edges', 'elementCount': 2, 'idCounter': 4, 'version': '1.0'},
+                         {'name': 'nodeAttributes', 'elementCount': 3, 'version': '1.0'},
+                         {'name': 'edgeAttributes', 'elementCount': 1, 'version': '1.0'}]},
+           {'nodes': [{'@id': 0, 'n': 'HDAC2', 'r': 'ensembl:ENSG00000196591'},
+                      {'@id': 1, 'n': 'SAP18', 'r': 'ensembl:ENSG00000150459'},
+                      {'@id': 2, 'n': 'KDM2A', 'r': 'ensembl:ENSG00000173120'}]},
+           {'edges': [{'@id': 3, 's': 0, 't': 1},
+                      {'@id': 4, 's': 0, 't': 2}]},
+           {'nodeAttributes': [{'po': 0, 'n': 'bait', 'v': 'true'},
+                               {'po': 1, 'n': 'bait', 'v': 'false'},
+                               {'po': 2, 'n': 'bait', 'v': 'false'}]},
+           {'edgeAttributes': [{'po': 3, 'n': 'score', 'v': 0.5, 'd': 'double'}]},
+           {'status': [{'error': '', 'success': True}]}]
+
+
+class TestNdexNetworkLoader(unittest.TestCase):
+    """Tests for `NdexNetworkLoader`"""
+
+    def setUp(self):
+        """Set up test fixtures, if any."""
+        self._temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        """Tear down test fixtures, if any."""
+        shutil.rmtree(self._temp_dir)
+
+    def get_mock_client(self, modification_time=1):
+        client = MagicMock()
+        client.get_network_summary = MagicMock(return_value={'modificationTime': modification_time})
+        resp = MagicMock()
+        resp.status_code = 200
+        resp.iter_content = MagicMock(side_effect=lambda chunk_size: [json.dumps(TEST_CX).encode()])
+        client.get_network_as_cx_stream = MagicMock(return_value=resp)
+        return client
+
+    def test_get_cx_file_no_cachedir(self):
+        loader = NdexNetworkLoader()
+        try:
+            loader.get_cx_file('foo')
+            self.fail('Expected exception')
+        except CellMapsPPIDownloaderError as ce:
+            self.assertEqual('No cache directory set', str(ce))
+
+    def test_get_network_cached_in_memory(self):
+        with patch('ndex2.create_nice_cx_from_server') as mock_create:
+            mock_create.return_value = 'network'
+            loader = NdexNetworkLoader()
+            self.assertEqual('network', loader.get_network('abc'))
+            self.assertEqual('network', loader.get_network('abc'))
+            mock_create.assert_called_once_with(NdexNetworkLoader.DEFAULT_SERVER,
+                                                uuid='abc', ndex_client=None)
+            loader.clear()
+            loader.get_network('abc')
+            self.assertEqual(2, mock_create.call_count)
+
+    def test_get_cx_file_reused_until_modified(self):
+        cachedir = os.path.join(self._temp_dir, 'cache')
+        client = self.get_mock_client()
+        loader = NdexNetworkLoader(cachedir=cachedir, ndex_client=client)
+        cx_file = loader.get_cx_file('abc')
+        self.assertEqual(os.path.join(cachedir, 'abc.cx'), cx_file)
+        with open(cx_file, 'r') as f:
+            self.assertEqual(TEST_CX, json.load(f))
+        self.assertEqual(1, client.get_network_as_cx_stream.call_count)
+
+        # new loader, same modification time, no download
+        loader = NdexNetworkLoader(cachedir=cachedir, ndex_client=client)
+        loader.get_cx_file('abc')
+        self.assertEqual(1, client.get_network_as_cx_stream.call_count)
+
+        # network modified on NDEx so download again
+        client.get_network_summary = MagicMock(return_value={'modificationTime': 2})
+        loader.get_cx_file('abc')
+        self.assertEqual(2, client.get_network_as_cx_stream.call_count)
+
+    def test_create_from_ndex_parses_network_once(self):
+        cachedir = os.path.join(self._temp_dir, 'cache')
+        client = self.get_mock_client()
+        loader = NdexNetworkLoader(cachedir=cachedir, ndex_client=client)
+        with patch('ndex2.create_nice_cx_from_file',
+                   wraps=ndex2.create_nice_cx_from_file) as mock_create:
+            gen = NdexGeneNodeAttributeGenerator.create_from_ndex('abc', loader=loader,
+                                                                  genequery=MagicMock())
+            self.assertEqual(1, mock_create.call_count)
+        self.assertEqual(1, client.get_network_as_cx_stream.call_count)
+
+        edgelist = gen.get_apms_edgelist()
+        self.assertEqual(2, len(edgelist))
+        self.assertEqual({'GeneID1': '0', 'Symbol1': 'HDAC2',
+                          'GeneID2': '1', 'Symbol2': 'SAP18',
+                          'score': 0.5}, edgelist[0])
+        self.assertEqual([{'GeneSymbol': 'HDAC2', 'GeneID': '0',
+                           'NumInteractors': 2}], gen._apms_baitlist)
+        gene_node_attrs, errors = gen.get_gene_node_attributes()
+        self.assertEqual([], errors)
+        self.assertEqual({'name': 'HDAC2', 'represents': 'ensembl:ENSG00000196591',
+                          'ambiguous': None, 'bait': True}, gene_node_attrs['0'])
@@ -0,0 +1,112 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for `profiling` module"""
+
+import os
+import pstats
+import shutil
+import tempfile
+import threading
+import unittest
+
+from cellmaps_ppidownloader.exceptions import CellMapsPPIDownloaderError
+from cellmaps_ppidownloader.profiling import StageTimer, RunProfiler
+from cellmaps_ppidownloader.profiling import get_max_rss_kb, get_rss_kb
+
+
+class TestProfiling(unittest.TestCase):
+    """Tests for `profiling` module"""
+
+    def test_stage_timer(self):
+        timer = StageTimer()
+        self.assertEqual([], timer.get_stage_timings())
+        with timer.stage('one'):
+            pass
+        try:
+            with timer.stage('two'):
+                raise ValueError('fail')
+        except ValueError:
+            pass
+        timings = timer.get_stage_timings()
+        self.assertEqual(['one', 'two'], [t['name'] for t in timings])
+        for t in timings:
+            self.assertFalse(t['overlapped'])
+            self.assertGreaterEqual(t['elapsed_time'], 0.0)
+            self.assertEqual(get_max_rss_kb() is None, t['process_max_rss_kb'] is None)
+            self.assertEqual(get_max_rss_kb() is None, t['peak_rss_increase_kb'] is None)
+            self.assertEqual(get_rss_kb() is None, t['rss_delta_kb'] is None)
+
+    def test_stage_timer_memory_is_per_stage(self):
+        if get_rss_kb() is None or get_max_rss_kb() is None:
+            self.skipTest('memory use not available on this platform')
+        timer = StageTimer()
+        with timer.stage('big'):
+            data = bytearray(64 * 1024 * 1024)
+            data[::4096] = b'x' * len(data[::4096])
+        del data
+        with timer.stage('small'):
+            pass
+        big, small = timer.get_stage_timings()
+        self.assertGreater(big['rss_delta_kb'], 32 * 1024)
+        self.assertLess(abs(small['rss_delta_kb']), 32 * 1024)
+        self.assertEqual(0, small['peak_rss_increase_kb'])
+        self.assertGreaterEqual(small['process_max_rss_kb'],
+                                big['process_max_rss_kb'])
+
+    def test_stage_timer_overlapping_stages_have_no_memory_change(self):
+        timer = StageTimer()
+        started = threading.Event()
+        finish = threading.Event()
+
+        def run_stage():
+            with timer.stage('thread'):
+                started.set()
+                finish.wait(10)
+
+        thread = threading.Thread(target=run_stage)
+        thread.start()
+        try:
+            started.wait(10)
+            with timer.stage('main'):
+                pass
+        finally:
+            finish.set()
+            thread.join()
+        with timer.stage('after'):
+            pass
+        timings = {t['name']: t for t in timer.get_stage_timings()}
+        for name in ['thread', 'main']:
+            self.assertTrue(timings[name]['overlapped'])
+            self.assertIsNone(timings[name]['rss_delta_kb'])
+            self.assertIsNone(timings[name]['peak_rss_increase_kb'])
+            self.assertEqual(get_max_rss_kb() is None,
+                             timings[name]['process_max_rss_kb'] is None)
+        self.assertFalse(timings['after']['overlapped'])
+        self.assertEqual(get_rss_kb() is None, timings['after']['rss_delta_kb'] is None)
+
+    def test_run_profiler_invalid(self):
+        try:
+            RunProfiler(profiler='foo')
+            self.fail('Expected exception')
+        except CellMapsPPIDownloaderError as ce:
+            self.assertEqual('Unknown profiler: foo must be one of '
+                             'cprofile, pyinstrument', str(ce))
+
+    def test_run_profiler_cprofile(self):
+        temp_dir = tempfile.mkdtemp()
+        try:
+            profiler = RunProfiler()
+            self.assertIsNone(profiler.stop(temp_dir))
+            profiler.start()
+            sum(range(1000))
+            profile_file = profiler.stop(temp_dir)
+            self.assertEqual(os.path.join(temp_dir, RunProfiler.CPROFILE_FILE),
+                             profile_file)
+            self.assertGreater(pstats.Stats(profile_file).total_calls, 0)
+        finally:
+            shutil.rmtree(temp_dir)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for `RunCache`"""
+
+import os
+import json
+import shutil
+import tempfile
+import unittest
+
+from cellmaps_ppidownloader.runcache import RunCache
+from cellmaps_ppidownloader.exceptions import CellMapsPPIDownloaderError
+
+
+class TestRunCache(unittest.TestCase):
+    """Tests for `RunCache`"""
+
+    def setUp(self):
+        self._temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self._temp_dir)
+
+    def _write_file(self, name, content):
+        path = os.path.join(self._temp_dir, name)
+        with open(path, 'w') as f:
+            f.write(content)
+        return path
+
+    def test_constructor_none_cachedir(self):
+        try:
+            RunCache()
+            self.fail('Expected exception')
+        except CellMapsPPIDownloaderError as ce:
+            self.assertEqual('cachedir is None', str(ce))
+
+    def test_get_key(self):
+        edgelist = self._write_file('edgelist.tsv', 'GeneID1\tGeneID2\n1\t2\n')
+        same = self._write_file('same.tsv', 'GeneID1\tGeneID2\n1\t2\n')
+        other = self._write_file('other.tsv', 'GeneID1\tGeneID2\n1\t3\n')
+        key = RunCache.get_key(input_files={'edgelist': edgelist, 'baitlist': None},
+                               parameters={'col': 'GeneID1'})
+        self.assertEqual(64, len(key))
+
+        # only contents of input files matter
+        self.assertEqual(key, RunCache.get_key(input_files={'edgelist': same},
+                                               parameters={'col': 'GeneID1'}))
+        self.assertNotEqual(key, RunCache.get_key(input_files={'edgelist': other},
+                                                  parameters={'col': 'GeneID1'}))
+        self.assertNotEqual(key, RunCache.get_key(input_files={'baitlist': edgelist},
+                                                  parameters={'col': 'GeneID1'}))
+        self.assertNotEqual(key, RunCache.get_key(input_files={'edgelist': edgelist},
+                                                  parameters={'col': 'GeneID2'}))
+
+    def test_put_get_and_materialize(self):
+        run_cache = RunCache(os.path.join(self._temp_dir, 'cache'))
+        key = RunCache.get_key(parameters={'a': 1})
+        self.assertIsNone(run_cache.get_entry(key))
+
+        attrs = self._write_file('attrs.tsv', 'name\nA\n')
+        edges = self._write_file('edges.tsv', 'geneA\tgeneB\nA\tA\n')
+        entry = run_cache.put(key, [attrs, edges])
+        self.assertEqual(key, entry['key'])
+        self.assertEqual(['attrs.tsv', 'edges.tsv'], sorted(entry['files'].keys()))
+        self.assertEqual(entry, run_cache.get_entry(key))
+        self.assertEqual(sorted([RunCache.ENTRY_FILE, 'attrs.tsv', 'edges.tsv']),
+                         sorted(os.listdir(entry['entrydir'])))
+
+        # adding same key again keeps existing entry
+        other = self._write_file('other.tsv', 'x\n')
+        self.assertEqual(entry, run_cache.put(key, [other]))
+        self.assertEqual(1, len(os.listdir(os.path.dirname(entry['entrydir']))))
+
+        outdir = os.path.join(self._temp_dir, 'out')
+        os.makedirs(outdir)
+        with open(os.path.join(outdir, 'edges.tsv'), 'w') as f:
+            f.write('stale\n')
+        outfiles = run_cache.materialize(entry, outdir)
+        self.assertEqual([os.path.join(outdir, 'attrs.tsv'),
+                          os.path.join(outdir, 'edges.tsv')], outfiles)
+        with open(os.path.join(outdir, 'edges.tsv'), 'r') as f:
+            self.assertEqual('geneA\tgeneB\nA\tA\n', f.read())
+        self.assertTrue(os.path.samefile(os.path.join(entry['entrydir'], 'attrs.tsv'),
+                                         os.path.join(outdir, 'attrs.tsv')))
+
+    def test_max_age(self):
+        run_cache = RunCache(os.path.join(self._temp_dir, 'cache'), max_age=60)
+        key = RunCache.get_key(parameters={'a': 1})
+        attrs = self._write_file('attrs.tsv', 'name\nA\n')
+        entry = run_cache.put(key, [attrs])
+        self.assertEqual(entry, run_cache.get_entry(key))
+
+        # make entry older than max age
+        entry_file = os.path.join(entry['entrydir'], RunCache.ENTRY_FILE)
+        with open(entry_file, 'r') as f:
+            data = json.load(f)
+        data['created'] -= 120
+        with open(entry_file, 'w') as f:
+            json.dump(data, f)
+        self.assertIsNone(run_cache.get_entry(key))
+        self.assertIsNotNone(RunCache(run_cache.get_cachedir()).get_entry(key))
+
+        # expired entry is replaced by next put
+        other = self._write_file('other.tsv', 'x\n')
+        new_entry = run_cache.put(key, [other])
+        self.assertEqual(['other.tsv'], list(new_entry['files'].keys()))
+        self.assertEqual(new_entry, run_cache.get_entry(key))
+        self.assertEqual(1, len(os.listdir(os.path.dirname(entry['entrydir']))))
+
+
+if __name__ == '__main__':
+    unittest.main()